@@ -0,0 +1,41 @@
+"""Add task listing indexes
+
+Revision ID: 9c2d5e8f1a36
+Revises: 5e0b8c7a2f13
+Create Date: 2026-10-18 11:58:02.447610
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9c2d5e8f1a36'
+down_revision: Union[str, Sequence[str], None] = '5e0b8c7a2f13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 在大表上建索引时不锁写入，CONCURRENTLY 不能在事务中执行
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_created_at_id', 'task', ['created_at', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_task_status_created_at_id', 'task', ['status', 'created_at', 'id'], unique=False,
+                        postgresql_concurrently=True)
+        op.create_index('ix_task_filename_lower_pattern', 'task', [sa.text('lower(filename) text_pattern_ops')],
+                        unique=False, postgresql_concurrently=True)
+        # (status, created_at, id) 的前缀已覆盖单列 status 索引
+        op.drop_index('ix_task_status', table_name='task', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.create_index('ix_task_status', 'task', ['status'], unique=False, postgresql_concurrently=True)
+        op.drop_index('ix_task_filename_lower_pattern', table_name='task', postgresql_concurrently=True)
+        op.drop_index('ix_task_status_created_at_id', table_name='task', postgresql_concurrently=True)
+        op.drop_index('ix_task_created_at_id', table_name='task', postgresql_concurrently=True)
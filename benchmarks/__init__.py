@@ -0,0 +1,20 @@
+# benchmarks/__init__.py
+"""
+解析流水线的基准测试套件。
+
+用法 (在仓库根目录执行):
+    python -m benchmarks corpus                      # 只生成合成语料
+    python -m benchmarks run --output results.json   # 运行基准测试
+    python -m benchmarks compare results.json --baseline baseline.json
+"""
+
+import os
+import sys
+
+# mine_u 以顶层包的方式导入 (from mine_u.xxx import ...)，需要把 src 加入搜索路径；
+# pdf_extractor 与 run.py 一致，以 src.pdf_extractor 的方式导入
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_ROOT, "src")
+for _path in (REPO_ROOT, SRC_DIR):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
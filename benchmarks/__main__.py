@@ -0,0 +1,157 @@
+# benchmarks/__main__.py
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+from . import REPO_ROOT
+from .compare import DEFAULT_THRESHOLDS, compare_results, format_report, load_results
+from .corpus import DEFAULT_CORPUS_DIR, DEFAULT_PAGES, KINDS, QUICK_PAGES, CorpusSpec, ensure_corpus, iter_specs
+from .stages import DEFAULT_STAGES, STAGES, run_stage_case
+
+
+def _csv(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _metadata() -> Dict[str, Any]:
+    import fitz
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pymupdf": fitz.VersionBind,
+    }
+
+
+def cmd_corpus(args: argparse.Namespace) -> int:
+    pages = QUICK_PAGES if args.quick else [int(p) for p in _csv(args.pages)]
+    ensure_corpus(iter_specs(_csv(args.kinds), pages), args.corpus_dir)
+    return 0
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    stages = _csv(args.stages)
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        print(f"未知的阶段: {unknown}，可选: {sorted(STAGES)}", file=sys.stderr)
+        return 2
+
+    pages = QUICK_PAGES if args.quick else [int(p) for p in _csv(args.pages)]
+    specs = iter_specs(_csv(args.kinds), pages)
+    paths = ensure_corpus(specs, args.corpus_dir)
+
+    cases = []
+    for stage in stages:
+        for spec in specs:
+            case = run_stage_case(stage, spec.name, paths[spec.name], spec.pages, args.repeat)
+            cases.append(case)
+            if "skipped" in case:
+                print(f"[跳过] {case['name']}: {case['skipped']}")
+                break
+            m = case["metrics"]
+            print(f"{case['name']:<24} {m['median_seconds']:>9.4f}s {m['pages_per_sec'] or 0:>10.1f} 页/秒 "
+                  f"峰值RSS {m['peak_rss_mb']:>8.1f}MB")
+
+    if args.api:
+        from .api import run_api_case
+
+        api_spec = CorpusSpec(KINDS[0], min(pages))
+        api_paths = ensure_corpus([api_spec], args.corpus_dir)
+        case = run_api_case(api_spec.name, [api_paths[api_spec.name]], args.api_requests,
+                            args.api_concurrency, args.api_base_url)
+        cases.append(case)
+        print(f"{case['name']:<24} {json.dumps(case['metrics'], ensure_ascii=False)}")
+
+    results = {"meta": _metadata(), "cases": cases}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"结果已写入: {args.output}")
+
+    if args.baseline:
+        return _report(results, load_results(args.baseline), args.threshold)
+    return 0
+
+
+def _thresholds(overrides: List[str]) -> Dict[str, float]:
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for item in overrides or []:
+        metric, _, value = item.partition("=")
+        thresholds[metric] = float(value)
+    return thresholds
+
+
+def _report(current: Dict[str, Any], baseline: Dict[str, Any], overrides: List[str]) -> int:
+    comparisons = compare_results(current, baseline, _thresholds(overrides))
+    print(format_report(comparisons))
+    regressions = [c for c in comparisons if c.regressed]
+    if regressions:
+        print(f"发现 {len(regressions)} 项性能回归。")
+        return 1
+    print("未发现性能回归。")
+    return 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    return _report(load_results(args.results), load_results(args.baseline), args.threshold)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="PDF 解析流水线基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def corpus_options(p: argparse.ArgumentParser) -> None:
+        p.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR, help="合成语料目录")
+        p.add_argument("--kinds", default=",".join(KINDS), help="语料类型，逗号分隔")
+        p.add_argument("--pages", default=",".join(str(p) for p in DEFAULT_PAGES), help="页数，逗号分隔")
+        p.add_argument("--quick", action="store_true", help=f"只使用 {QUICK_PAGES} 页的小语料")
+
+    p_corpus = sub.add_parser("corpus", help="生成合成语料")
+    corpus_options(p_corpus)
+    p_corpus.set_defaults(func=cmd_corpus)
+
+    p_run = sub.add_parser("run", help="运行基准测试并输出 JSON 结果")
+    corpus_options(p_run)
+    p_run.add_argument("--stages", default=",".join(DEFAULT_STAGES),
+                       help=f"阶段，逗号分隔，可选: {','.join(STAGES)}")
+    p_run.add_argument("--repeat", type=int, default=3, help="每个用例的重复次数，取中位数")
+    p_run.add_argument("--output", default="bench-results.json", help="结果文件")
+    p_run.add_argument("--api", action="store_true", help="同时测试上传/状态查询端点")
+    p_run.add_argument("--api-base-url", default=None, help="对已运行的服务施压；为空时在进程内测试")
+    p_run.add_argument("--api-requests", type=int, default=50)
+    p_run.add_argument("--api-concurrency", type=int, default=8)
+    p_run.add_argument("--baseline", default=None, help="运行结束后与该基线对比")
+    p_run.add_argument("--threshold", action="append", metavar="METRIC=RATIO",
+                       help="覆盖回归阈值，例如 pages_per_sec=0.05，可重复")
+    p_run.set_defaults(func=cmd_run)
+
+    p_compare = sub.add_parser("compare", help="把结果与基线对比，发现回归时退出码为 1")
+    p_compare.add_argument("results")
+    p_compare.add_argument("--baseline", required=True)
+    p_compare.add_argument("--threshold", action="append", metavar="METRIC=RATIO",
+                           help="覆盖回归阈值，例如 pages_per_sec=0.05，可重复")
+    p_compare.set_defaults(func=cmd_compare)
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
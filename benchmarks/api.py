@@ -0,0 +1,123 @@
+# benchmarks/api.py
+
+import asyncio
+import statistics
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+# 上传时附加在文件末尾的注释，保证每次上传的摘要不同，走完整的未命中缓存路径
+_TRAILER = b"\n%bench-"
+
+
+class _DispatchStandIn:
+    """
+    本地替身：代替 Celery 的 process_pdf_file，只记录投递调用，不连接 Broker。
+    进程内基准测试只衡量 API 本身 (流式落盘、预检、数据库写入)。
+    """
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def apply_async(self, *args: Any, **kwargs: Any) -> None:
+        self.calls += 1
+
+
+@contextmanager
+def _in_process_app() -> Iterator[Any]:
+    from src.pdf_extractor.api import task as task_api
+    from src.pdf_extractor.main import app
+
+    original = task_api.process_pdf_file
+    task_api.process_pdf_file = _DispatchStandIn()
+    try:
+        yield app
+    finally:
+        task_api.process_pdf_file = original
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+async def _run(client: Any, payloads: List[bytes], requests: int, concurrency: int) -> Dict[str, Any]:
+    upload_ms: List[float] = []
+    status_ms: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(index: int) -> None:
+        nonlocal errors
+        body = payloads[index % len(payloads)] + _TRAILER + uuid.uuid4().hex.encode()
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.post(
+                "/api/tasks/", files={"file": (f"bench-{index}.pdf", body, "application/pdf")}
+            )
+            upload_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 202:
+                errors += 1
+                return
+            task_id = response.json()["task_id"]
+            start = time.perf_counter()
+            response = await client.get(f"/api/tasks/{task_id}/status")
+            status_ms.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(requests)))
+    elapsed = time.perf_counter() - start
+    uploaded_bytes = sum(len(payloads[index % len(payloads)]) for index in range(requests))
+    return {
+        "upload_p50_ms": statistics.median(upload_ms) if upload_ms else None,
+        "upload_p95_ms": _percentile(upload_ms, 0.95),
+        "status_p50_ms": statistics.median(status_ms) if status_ms else None,
+        "status_p95_ms": _percentile(status_ms, 0.95),
+        "uploads_per_sec": requests / elapsed if elapsed > 0 else None,
+        "upload_mb_per_sec": uploaded_bytes / (1024 * 1024) / elapsed if elapsed > 0 else None,
+        "errors": errors,
+    }
+
+
+def run_api_case(corpus_name: str, paths: List[str], requests: int, concurrency: int,
+                 base_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    对上传和状态查询端点施压。
+
+    - 未指定 base_url 时在进程内通过 ASGI 调用应用，Celery 投递由本地替身代替，
+      仍需要可连接的 PostgreSQL (docker-compose 中的 db 服务) 并已执行迁移。
+    - 指定 base_url 时对已经运行的完整服务施压，任务会真实进入队列。
+    """
+    import httpx
+
+    payloads = []
+    for path in paths:
+        with open(path, "rb") as f:
+            payloads.append(f.read())
+
+    async def main() -> Dict[str, Any]:
+        if base_url:
+            async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+                return await _run(client, payloads, requests, concurrency)
+        with _in_process_app() as app:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+                return await _run(client, payloads, requests, concurrency)
+
+    return {
+        "name": f"api/{corpus_name}",
+        "group": "api",
+        "params": {
+            "corpus": corpus_name,
+            "requests": requests,
+            "concurrency": concurrency,
+            "target": base_url or "in-process",
+        },
+        "metrics": asyncio.run(main()),
+    }
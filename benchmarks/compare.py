@@ -0,0 +1,84 @@
+# benchmarks/compare.py
+
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# 指标方向: True 表示越大越好
+METRIC_HIGHER_IS_BETTER: Dict[str, bool] = {
+    "pages_per_sec": True,
+    "uploads_per_sec": True,
+    "upload_mb_per_sec": True,
+    "median_seconds": False,
+    "peak_rss_mb": False,
+    "stage_rss_mb": False,
+    "upload_p95_ms": False,
+    "status_p95_ms": False,
+}
+
+# 默认的回归阈值 (相对变化)，未列出的指标不参与比较
+DEFAULT_THRESHOLDS: Dict[str, float] = {
+    "pages_per_sec": 0.10,
+    "median_seconds": 0.10,
+    "peak_rss_mb": 0.15,
+    "uploads_per_sec": 0.15,
+    "upload_p95_ms": 0.20,
+    "status_p95_ms": 0.20,
+}
+
+
+@dataclass
+class Comparison:
+    case: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+    threshold: float
+
+    @property
+    def regressed(self) -> bool:
+        return self.change > self.threshold
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _cases_by_name(results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return {case["name"]: case for case in results.get("cases", []) if "metrics" in case}
+
+
+def compare_results(current: Dict[str, Any], baseline: Dict[str, Any],
+                    thresholds: Optional[Dict[str, float]] = None) -> List[Comparison]:
+    """
+    按用例名称对比两份结果。change 为"变差"的相对幅度：
+    越大越好的指标下降、越小越好的指标上升都记为正数。
+    """
+    thresholds = thresholds or DEFAULT_THRESHOLDS
+    baseline_cases = _cases_by_name(baseline)
+    comparisons = []
+    for name, case in _cases_by_name(current).items():
+        base_case = baseline_cases.get(name)
+        if base_case is None:
+            continue
+        for metric, threshold in thresholds.items():
+            old, new = base_case["metrics"].get(metric), case["metrics"].get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if METRIC_HIGHER_IS_BETTER.get(metric, False):
+                change = -change
+            comparisons.append(Comparison(name, metric, old, new, change, threshold))
+    return comparisons
+
+
+def format_report(comparisons: List[Comparison]) -> str:
+    lines = [f"{'用例':<32} {'指标':<18} {'基线':>12} {'当前':>12} {'变差':>8}  结论"]
+    for c in sorted(comparisons, key=lambda c: (not c.regressed, c.case, c.metric)):
+        verdict = "回归" if c.regressed else "通过"
+        lines.append(
+            f"{c.case:<32} {c.metric:<18} {c.baseline:>12.4g} {c.current:>12.4g} {c.change:>+8.1%}  {verdict}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,140 @@
+# benchmarks/corpus.py
+
+import os
+import random
+from dataclasses import dataclass
+from typing import Dict, Iterable, List
+
+import fitz  # PyMuPDF
+
+# 生成逻辑变化时递增，旧语料会以新文件名重新生成
+CORPUS_VERSION = 1
+
+KIND_TEXT = "text"
+KIND_SCANNED = "scanned"
+KIND_MIXED = "mixed"
+KIND_TABLES = "tables"
+KINDS: List[str] = [KIND_TEXT, KIND_SCANNED, KIND_MIXED, KIND_TABLES]
+
+DEFAULT_PAGES: List[int] = [1, 20, 100, 500]
+QUICK_PAGES: List[int] = [1, 20]
+DEFAULT_CORPUS_DIR = "/tmp/pdf_extractor/bench-corpus"
+
+_WORDS = (
+    "revenue profit assets liabilities equity cash flow operating investing financing "
+    "segment quarter annual report audit statement balance income expense margin growth "
+    "capital dividend share market risk policy accounting note disclosure subsidiary"
+).split()
+
+# 扫描页的渲染分辨率，与常见扫描件接近
+SCAN_DPI = 100
+
+
+@dataclass(frozen=True)
+class CorpusSpec:
+    """
+    一份合成文档的规格。相同规格生成的文档内容完全一致。
+    """
+    kind: str
+    pages: int
+
+    @property
+    def name(self) -> str:
+        return f"{self.kind}-{self.pages}"
+
+    @property
+    def filename(self) -> str:
+        return f"v{CORPUS_VERSION}-{self.name}.pdf"
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _draw_text_page(page: fitz.Page, rng: random.Random, number: int) -> None:
+    """标题 + 若干段落的电子版页面。"""
+    page.insert_text((72, 72), f"Section {number + 1}", fontsize=18)
+    paragraph = " ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(18))
+    page.insert_textbox(fitz.Rect(72, 96, page.rect.width - 72, page.rect.height - 72),
+                        paragraph, fontsize=10)
+
+
+def _draw_table_page(page: fitz.Page, rng: random.Random, number: int) -> None:
+    """带框线的表格 + 一个无框线的对齐表格。"""
+    page.insert_text((72, 60), f"Table {number + 1}", fontsize=14)
+    rows, cols = 12, 5
+    x0, y0, width, height = 72, 80, page.rect.width - 144, 18
+    col_width = width / cols
+    for r in range(rows + 1):
+        page.draw_line((x0, y0 + r * height), (x0 + width, y0 + r * height), width=0.6)
+    for c in range(cols + 1):
+        page.draw_line((x0 + c * col_width, y0), (x0 + c * col_width, y0 + rows * height), width=0.6)
+    for r in range(rows):
+        for c in range(cols):
+            text = rng.choice(_WORDS) if r == 0 or c == 0 else f"{rng.uniform(0, 10000):,.2f}"
+            page.insert_text((x0 + c * col_width + 3, y0 + r * height + 13), text, fontsize=8)
+
+    y = y0 + rows * height + 40
+    for r in range(8):
+        for c in range(4):
+            text = rng.choice(_WORDS) if c == 0 else f"{rng.randint(0, 99999)}"
+            page.insert_text((72 + c * 110, y + r * 14), text, fontsize=9)
+
+
+def _draw_scanned_page(doc: fitz.Document, rng: random.Random, number: int) -> None:
+    """把电子版页面渲染为图片再插入，得到没有文本层的扫描页。"""
+    with fitz.open() as source:
+        src_page = source.new_page()
+        _draw_text_page(src_page, rng, number)
+        pixmap = src_page.get_pixmap(dpi=SCAN_DPI, colorspace=fitz.csGRAY)
+    page = doc.new_page()
+    page.insert_image(page.rect, pixmap=pixmap)
+
+
+def build_document(spec: CorpusSpec) -> fitz.Document:
+    """
+    按规格生成文档。mixed 每 4 页中有 1 页扫描页、1 页表格页，其余为文本页。
+    """
+    if spec.kind not in KINDS:
+        raise ValueError(f"未知的语料类型: {spec.kind}")
+    rng = random.Random(f"{spec.kind}:{spec.pages}")
+    doc = fitz.open()
+    toc = []
+    for number in range(spec.pages):
+        kind = spec.kind
+        if kind == KIND_MIXED:
+            kind = {1: KIND_SCANNED, 2: KIND_TABLES}.get(number % 4, KIND_TEXT)
+        if kind == KIND_SCANNED:
+            _draw_scanned_page(doc, rng, number)
+        else:
+            page = doc.new_page()
+            (_draw_table_page if kind == KIND_TABLES else _draw_text_page)(page, rng, number)
+        if number % 10 == 0:
+            toc.append([1, f"Chapter {number // 10 + 1}", number + 1])
+    doc.set_toc(toc)
+    return doc
+
+
+def iter_specs(kinds: Iterable[str], pages: Iterable[int]) -> List[CorpusSpec]:
+    return [CorpusSpec(kind, count) for kind in kinds for count in pages]
+
+
+def ensure_corpus(specs: Iterable[CorpusSpec], directory: str = DEFAULT_CORPUS_DIR) -> Dict[str, str]:
+    """
+    生成缺失的语料文件。
+
+    Returns:
+        {spec.name: 文件路径}
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths: Dict[str, str] = {}
+    for spec in specs:
+        path = os.path.join(directory, spec.filename)
+        if not os.path.exists(path):
+            tmp_path = f"{path}.tmp"
+            with build_document(spec) as doc:
+                doc.save(tmp_path, garbage=3, deflate=True)
+            os.replace(tmp_path, path)
+            print(f"已生成语料 {spec.name}: {path}")
+        paths[spec.name] = path
+    return paths
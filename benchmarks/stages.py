@@ -0,0 +1,129 @@
+# benchmarks/stages.py
+
+import multiprocessing
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List
+
+# 每个阶段对应一个加载函数，返回 fn(pdf_path, page_count)；
+# 加载时依赖缺失会抛出 ImportError，该阶段记为跳过。
+StageRunner = Callable[[str, int], Any]
+
+
+def _load_probe() -> StageRunner:
+    from src.pdf_extractor.services.upload_service import probe_pdf
+
+    return lambda path, pages: probe_pdf(path)
+
+
+def _load_toc() -> StageRunner:
+    from src.pdf_extractor.services.parser_service import PDFParserService
+
+    parser = PDFParserService()
+    return lambda path, pages: parser.get_toc(path)
+
+
+def _load_tables() -> StageRunner:
+    from src.pdf_extractor.services.parser_service import PDFParserService
+
+    parser = PDFParserService()
+    return lambda path, pages: parser.extract_tables(path)
+
+
+def _load_classify() -> StageRunner:
+    from mine_u.page_classifier import classify_pages
+
+    return lambda path, pages: classify_pages(path)
+
+
+def _load_split() -> StageRunner:
+    from mine_u.main import split_pdf_by_range_fitz
+
+    # 与分片解析一致：取文档的后半段
+    return lambda path, pages: split_pdf_by_range_fitz(path, pages // 2, pages - 1)
+
+
+def _load_doc_parse() -> StageRunner:
+    from mine_u.main import doc_parse
+
+    def run(path: str, pages: int) -> str:
+        with tempfile.TemporaryDirectory(prefix="bench-mineru-") as output_dir:
+            return doc_parse(path, output_dir)
+
+    return run
+
+
+STAGES: Dict[str, Callable[[], StageRunner]] = {
+    "probe": _load_probe,
+    "toc": _load_toc,
+    "tables": _load_tables,
+    "classify": _load_classify,
+    "split": _load_split,
+    "doc_parse": _load_doc_parse,
+}
+# 默认运行的阶段；doc_parse 需要模型且耗时很长，需显式指定
+DEFAULT_STAGES: List[str] = ["probe", "toc", "tables", "classify", "split"]
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 的单位为 KB，macOS 为字节
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _measure(stage: str, path: str, pages: int, repeat: int) -> Dict[str, Any]:
+    """在独立的子进程中执行，峰值 RSS 只反映该用例本身。"""
+    start = time.perf_counter()
+    try:
+        runner = STAGES[stage]()
+    except ImportError as e:
+        return {"skipped": f"依赖缺失: {e}"}
+    setup_seconds = time.perf_counter() - start
+    rss_before = _peak_rss_mb()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runner(path, pages)
+        timings.append(time.perf_counter() - start)
+    return {
+        "setup_seconds": setup_seconds,
+        "timings": timings,
+        "rss_before_mb": rss_before,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_stage_case(stage: str, corpus_name: str, path: str, pages: int,
+                   repeat: int) -> Dict[str, Any]:
+    """
+    运行一个 (阶段, 语料) 用例，返回结果记录；阶段依赖缺失时返回带 skipped 的记录。
+    """
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(processes=1) as pool:
+        raw = pool.apply(_measure, (stage, path, pages, repeat))
+
+    case: Dict[str, Any] = {
+        "name": f"{stage}/{corpus_name}",
+        "group": "stage",
+        "params": {"stage": stage, "corpus": corpus_name, "pages": pages, "repeat": repeat},
+    }
+    if "skipped" in raw:
+        case["skipped"] = raw["skipped"]
+        return case
+
+    median = statistics.median(raw["timings"])
+    case["metrics"] = {
+        "median_seconds": median,
+        "min_seconds": min(raw["timings"]),
+        "max_seconds": max(raw["timings"]),
+        "setup_seconds": raw["setup_seconds"],
+        "pages_per_sec": pages / median if median > 0 else None,
+        "peak_rss_mb": raw["peak_rss_mb"],
+        # 扣除解释器和依赖导入后的增量，更接近阶段本身的内存占用
+        "stage_rss_mb": raw["peak_rss_mb"] - raw["rss_before_mb"],
+    }
+    return case
@@ -0,0 +1,175 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from mine_u import stage_timer
+
+# magic-pdf 及模型注册表只在真正推理时导入，
+# 在 Worker 主进程 (worker_init) 中调用 configure 不会在 fork 之前加载 torch
+log = logging.getLogger(__name__)
+
+# magic-pdf 在 batch_doc_analyze 内部按该环境变量再次切分批次
+BATCH_SIZE_ENV = "MINERU_MIN_BATCH_INFERENCE_SIZE"
+
+
+class _Request:
+    __slots__ = ("dataset", "pages", "future", "enqueued_at")
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+        self.pages = len(dataset)
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class InferenceScheduler:
+    """
+    进程内的批量推理调度器
+
+    各任务（或同一文档的多个页码段）提交的数据集按 (ocr, lang) 分组排队，
+    凑满 max_batch_pages 页或最早的请求等待超过 max_wait_seconds 时，
+    一次性交给 batch_doc_analyze，让版面/公式/OCR 模型以较大的批次运行，
+    再把每个数据集的推理结果通过 Future 交还给提交者。
+
+    max_wait_seconds 是合批为单个文档带来的最大额外延迟。
+    同一进程内只有并发提交时才能跨任务合批（例如 Worker 使用 --pool threads）。
+    未启用时 submit 直接同步调用 doc_analyze，行为与原来一致。
+    """
+
+    def __init__(self, enabled=False, max_batch_pages=64, max_wait_seconds=0.2):
+        self.enabled = enabled
+        self.max_batch_pages = max_batch_pages
+        self.max_wait_seconds = max_wait_seconds
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._thread = None
+        self._pid = None
+        self._stats = {"batches": 0, "batched_pages": 0, "batched_requests": 0}
+
+    def configure(self, enabled, max_batch_pages, max_wait_seconds):
+        self.enabled = enabled
+        self.max_batch_pages = max(max_batch_pages, 1)
+        self.max_wait_seconds = max(max_wait_seconds, 0.0)
+        os.environ[BATCH_SIZE_ENV] = str(self.max_batch_pages)
+
+    def submit(self, dataset, ocr, lang):
+        """
+        提交一个数据集的推理请求
+        :return: concurrent.futures.Future，结果为 magic-pdf 的 InferenceResult
+        """
+        if dataset._lang is None:
+            # 与 ensure_loaded 使用同一语言，命中同一个模型实例
+            dataset._lang = lang
+        if not self.enabled:
+            return self._run_inline(dataset, ocr, lang)
+
+        request = _Request(dataset)
+        with self._cond:
+            self._ensure_thread()
+            self._pending.setdefault((bool(ocr), lang), []).append(request)
+            self._cond.notify()
+        return request.future
+
+    def analyze(self, dataset, ocr, lang):
+        return self.submit(dataset, ocr, lang).result()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._stats)
+
+    def _run_inline(self, dataset, ocr, lang):
+        from magic_pdf.model.doc_analyze_by_custom_model import doc_analyze
+        from mine_u.model_pool import model_registry
+
+        future = Future()
+        model_registry.ensure_loaded(ocr, lang)
+        start = time.perf_counter()
+        try:
+            future.set_result(dataset.apply(doc_analyze, ocr=ocr, lang=lang))
+        except Exception as e:
+            future.set_exception(e)
+        elapsed = time.perf_counter() - start
+        model_registry.record_inference(elapsed)
+        stage_timer.record("inference", elapsed)
+        return future
+
+    def _ensure_thread(self):
+        # fork 出的子进程不会继承父进程的线程，需要重新启动
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._thread = threading.Thread(target=self._loop, name="mineru-batch-inference", daemon=True)
+        self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                key, batch = self._next_batch()
+            self._execute(key, batch)
+
+    def _next_batch(self):
+        """在持有锁的情况下等待，直到某个分组凑满一批或等待超时"""
+        while True:
+            now = time.monotonic()
+            deadline = None
+            for key, requests in self._pending.items():
+                pages = sum(request.pages for request in requests)
+                oldest_deadline = requests[0].enqueued_at + self.max_wait_seconds
+                if pages >= self.max_batch_pages or now >= oldest_deadline:
+                    return key, self._take(key)
+                deadline = oldest_deadline if deadline is None else min(deadline, oldest_deadline)
+            self._cond.wait(timeout=None if deadline is None else deadline - now)
+
+    def _take(self, key):
+        """从分组头部取出不超过一批的请求，单个请求超过批大小时单独成批"""
+        requests = self._pending[key]
+        batch, pages = [], 0
+        while requests and (not batch or pages + requests[0].pages <= self.max_batch_pages):
+            request = requests.pop(0)
+            batch.append(request)
+            pages += request.pages
+        if not requests:
+            del self._pending[key]
+        return batch
+
+    def _execute(self, key, batch):
+        from magic_pdf.model.doc_analyze_by_custom_model import batch_doc_analyze
+        from mine_u.model_pool import model_registry
+
+        ocr, lang = key
+        batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        pages = sum(request.pages for request in batch)
+        try:
+            model_registry.ensure_loaded(ocr, lang)
+            start = time.perf_counter()
+            results = batch_doc_analyze(
+                [request.dataset for request in batch], "ocr" if ocr else "txt", lang=lang
+            )
+            elapsed = time.perf_counter() - start
+            # 结果与请求一一对应；数量不符时整批失败，不能让部分请求一直等待
+            if len(results) != len(batch):
+                raise ValueError(f"批量推理返回 {len(results)} 个结果，期望 {len(batch)} 个")
+        except Exception as e:
+            log.error("批量推理失败 (ocr=%s, %d 个请求, %d 页): %s", ocr, len(batch), pages, e)
+            for request in batch:
+                request.future.set_exception(e)
+            return
+
+        model_registry.record_inference(elapsed)
+        stage_timer.record("inference", elapsed)
+        with self._cond:
+            self._stats["batches"] += 1
+            self._stats["batched_pages"] += pages
+            self._stats["batched_requests"] += len(batch)
+        log.info("批量推理完成 (ocr=%s): %d 个请求, %d 页, 耗时 %.2fs, %.2f 页/秒",
+                 ocr, len(batch), pages, elapsed, pages / elapsed if elapsed else 0.0)
+        for request, result in zip(batch, results, strict=True):
+            request.future.set_result(result)
+
+
+# 每个 Worker 进程一个实例
+inference_scheduler = InferenceScheduler()
@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import shutil
+import time
+import uuid
+
+log = logging.getLogger(__name__)
+
+DONE_MARKER = "DONE"
+MIDDLE_JSON_NAME = "middle.json"
+IMAGES_DIR = "images"
+
+
+class DocumentCheckpoint:
+    """
+    单个文档按页码段保存的解析检查点
+
+    目录结构：<root>/<key>/<page_start>-<page_end>-<ocr|txt>/
+        middle.json  该段的 middle json（page_idx 从 0 开始）
+        images/      该段流水线写出的图片
+        DONE         完成标记，最后写入
+    key 通常为文档内容的摘要加任务ID，同一任务的重试、重复投递和各分片共用同一组检查点。
+
+    每段先在同级的临时目录中写完，再整体 rename 为正式目录，最后写 DONE，
+    进程在任何时刻被杀掉都不会留下看似完整的半成品。
+    """
+
+    def __init__(self, root, key):
+        self.root = root
+        self.key = key
+        self.doc_dir = os.path.join(root, key)
+
+    def _range_dir(self, page_start, page_end, ocr):
+        return os.path.join(self.doc_dir, f"{page_start}-{page_end}-{'ocr' if ocr else 'txt'}")
+
+    def image_dir(self, page_start, page_end, ocr):
+        return os.path.join(self._range_dir(page_start, page_end, ocr), IMAGES_DIR)
+
+    def load(self, page_start, page_end, ocr):
+        """
+        读取已完成段的 middle json
+        :return: middle json；该段没有完整的检查点时返回 None
+        """
+        range_dir = self._range_dir(page_start, page_end, ocr)
+        if not os.path.exists(os.path.join(range_dir, DONE_MARKER)):
+            return None
+        try:
+            with open(os.path.join(range_dir, MIDDLE_JSON_NAME), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning("检查点 %s 无法读取，将重新解析: %s", range_dir, e)
+            return None
+
+    def staging_dir(self, page_start, page_end, ocr):
+        """返回一个新的临时目录，该段的图片先写入其下的 images 目录"""
+        staging = f"{self._range_dir(page_start, page_end, ocr)}.tmp-{uuid.uuid4().hex[:8]}"
+        os.makedirs(os.path.join(staging, IMAGES_DIR), exist_ok=True)
+        return staging
+
+    def commit(self, staging, page_start, page_end, ocr, middle_json):
+        """把临时目录提交为该段的检查点"""
+        with open(os.path.join(staging, MIDDLE_JSON_NAME), "w", encoding="utf-8") as f:
+            json.dump(middle_json, f, ensure_ascii=False)
+        range_dir = self._range_dir(page_start, page_end, ocr)
+        # 并发的重复投递可能已提交过同一段，以先完成的为准
+        if os.path.exists(os.path.join(range_dir, DONE_MARKER)):
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        # 没有 DONE 标记的正式目录是被中断的提交，直接替换
+        shutil.rmtree(range_dir, ignore_errors=True)
+        try:
+            os.rename(staging, range_dir)
+        except OSError:
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+        with open(os.path.join(range_dir, DONE_MARKER), "w") as f:
+            f.write(str(time.time()))
+
+    def completed(self):
+        """
+        列出所有已完成的段，用于在解析被中断时拼出部分结果
+        :return: [(page_start, page_end, ocr, middle_json), ...]，按起始页排序
+        """
+        if not os.path.isdir(self.doc_dir):
+            return []
+        result = []
+        for name in os.listdir(self.doc_dir):
+            try:
+                pages, mode = name.rsplit("-", 1)
+                page_start, page_end = (int(value) for value in pages.split("-"))
+            except ValueError:
+                # 临时目录等其他条目
+                continue
+            middle_json = self.load(page_start, page_end, mode == "ocr")
+            if middle_json is not None:
+                result.append((page_start, page_end, mode == "ocr", middle_json))
+        return sorted(result, key=lambda item: item[0])
+
+    def clear(self):
+        """文档解析完成后删除其全部检查点"""
+        shutil.rmtree(self.doc_dir, ignore_errors=True)
+
+
+def restore_images(source_dir, target_dir):
+    """
+    把检查点中的图片放到输出目录，优先使用硬链接，跨文件系统时复制
+    图片名由内容摘要生成，已存在的同名文件直接跳过
+    """
+    if not os.path.isdir(source_dir):
+        return
+    os.makedirs(target_dir, exist_ok=True)
+    for name in os.listdir(source_dir):
+        target = os.path.join(target_dir, name)
+        if os.path.exists(target):
+            continue
+        source = os.path.join(source_dir, name)
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+
+
+def purge_stale(root, max_age_seconds):
+    """
+    删除超过 max_age_seconds 未更新的文档检查点（通常来自最终失败、不会再重试的任务）
+    :return: 删除的文档数
+    """
+    if not os.path.isdir(root):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for name in os.listdir(root):
+        doc_dir = os.path.join(root, name)
+        try:
+            if os.path.isdir(doc_dir) and os.path.getmtime(doc_dir) < cutoff:
+                shutil.rmtree(doc_dir, ignore_errors=True)
+                removed += 1
+        except OSError:
+            continue
+    return removed
@@ -0,0 +1,60 @@
+import fitz
+from magic_pdf.data.dataset import Doc, PymuDocDataset
+
+
+class PageRangeDataset(PymuDocDataset):
+    """
+    直接基于源文件的页码范围数据集
+
+    PymuDocDataset 需要整份文档的 bytes，切分后还要再序列化一次。
+    这里改为用 fitz.open(path) 打开源文件（MuPDF 按需从文件读取对象，不产生 Python 侧的整份拷贝），
+    再用 select() 只保留目标页。内存占用只与该范围内的页面相关。
+
+    只有在 magic-pdf 需要原始字节时（例如整份文档的 classify）才会把选中的页序列化，
+    且只序列化这一段页面。
+    """
+
+    def __init__(self, pdf_path, page_start=None, page_end=None, lang=None, doc=None):
+        """
+        :param pdf_path: PDF 文件路径
+        :param page_start: 起始页码（从 0 开始），为 None 时使用整个文档
+        :param page_end: 结束页码（包含，从 0 开始）
+        :param lang: 语言，与 PymuDocDataset 保持一致
+        :param doc: 可选，已打开的 fitz.Document，多个分片共享同一个源文档时使用
+        """
+        self._pdf_path = pdf_path
+        self._page_start = page_start
+        self._page_end = page_end
+
+        if doc is not None:
+            # 共享源文档：只把需要的页插入新文档，避免修改共享对象
+            self._raw_fitz = fitz.open()
+            self._raw_fitz.insert_pdf(doc, from_page=page_start or 0,
+                                      to_page=page_end if page_end is not None else -1)
+        else:
+            self._raw_fitz = fitz.open(pdf_path)
+            if page_start is not None and page_end is not None:
+                self._raw_fitz.select(list(range(page_start, page_end + 1)))
+
+        self._records = [Doc(v) for v in self._raw_fitz]
+        self._data_bits = None
+        self._raw_data = None
+        self._classify_result = None
+        self._lang = None if lang in (None, "", "auto") else lang
+
+    def data_bits(self):
+        """按需序列化选中的页面，结果只包含该范围内的页"""
+        if self._data_bits is None:
+            self._data_bits = self._raw_fitz.tobytes(garbage=1)
+            self._raw_data = self._data_bits
+        return self._data_bits
+
+    def classify(self):
+        if self._classify_result is None:
+            from magic_pdf.filter import classify
+
+            self._classify_result = classify(self.data_bits())
+        return self._classify_result
+
+    def clone(self):
+        return PageRangeDataset(self._pdf_path, self._page_start, self._page_end, self._lang)
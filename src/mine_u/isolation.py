@@ -0,0 +1,260 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+import traceback
+
+from mine_u import stage_timer
+
+log = logging.getLogger(__name__)
+
+_MB = 1024 * 1024
+
+
+class ParseMemoryError(MemoryError):
+    """解析子进程超出内存上限（被监控线程、cgroup 或内核 OOM killer 终止，或触发了 MemoryError）"""
+
+
+def _rss_bytes(pid):
+    """读取进程当前的常驻内存，无法读取（非 Linux）时返回 None"""
+    try:
+        with open(f"/proc/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _exit_with_parent():
+    """父进程（Worker 池进程）被杀死时子进程随之收到 SIGKILL，避免遗留占用内存的孤儿进程（仅 Linux）"""
+    try:
+        import ctypes
+
+        PR_SET_PDEATHSIG = 1
+        ctypes.CDLL("libc.so.6", use_errno=True).prctl(PR_SET_PDEATHSIG, signal.SIGKILL)
+    except (OSError, AttributeError):
+        pass
+
+
+def _child_main(conn, address_space_mb, initializer, initargs):
+    """
+    子进程主循环：逐个执行父进程发来的任务
+    进度回调和阶段耗时通过管道转发给父进程，由父进程写库和记录指标
+    """
+    _exit_with_parent()
+    if address_space_mb:
+        import resource
+
+        limit = address_space_mb * _MB
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    stage_timer.add_observer(lambda stage, seconds: conn.send(("stage", stage, seconds)))
+    if initializer is not None:
+        initializer(*initargs)
+
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        func, args, kwargs, with_progress = job
+        if with_progress:
+            kwargs = dict(kwargs, progress=lambda pages: conn.send(("progress", pages)))
+        try:
+            result = func(*args, **kwargs)
+        except MemoryError as e:
+            # 触发 RLIMIT_AS 后进程内的状态不可信，报告后直接退出，由父进程重新创建
+            conn.send(("oom", str(e)))
+            return
+        except BaseException as e:
+            try:
+                conn.send(("error", e, traceback.format_exc()))
+            except Exception:
+                # 异常对象无法序列化
+                conn.send(("error", RuntimeError(repr(e)), traceback.format_exc()))
+            continue
+        conn.send(("ok", result, _rss_bytes(os.getpid())))
+
+
+class IsolatedExecutor:
+    """
+    在受监管的常驻子进程中执行解析
+
+    - 子进程常驻，模型只在其中加载一次，多次解析复用
+    - 内存上限：父进程的监控线程按 poll_interval 检查子进程 RSS，超过 max_rss_mb 立即终止；
+      可选地以 RLIMIT_AS 限制子进程的地址空间，或把子进程放入 cgroup v2 并设置 memory.max
+    - 回收：以第一次解析完成后的 RSS 为基线（此时模型已加载），
+      之后某次解析结束时 RSS 比基线增长超过 recycle_growth_mb，就退出子进程，下次使用时重新创建
+    - 子进程因内存被终止时抛出 ParseMemoryError，只影响当前这次解析，调用方可以缩小页码范围重试
+    - 等待结果期间调用方被中断（取消、软时限、进度回调抛出异常）时终止子进程，避免其继续占用资源
+
+    同一执行器一次只执行一个任务，供 prefork 池的每个子进程各自使用。
+    """
+
+    def __init__(self, max_rss_mb=0, address_space_mb=0, cgroup_parent=None, recycle_growth_mb=1024,
+                 poll_interval=0.5, start_method="spawn", initializer=None, initargs=()):
+        self.configure(max_rss_mb, address_space_mb, cgroup_parent, recycle_growth_mb,
+                       poll_interval, start_method, initializer, initargs)
+        self._lock = threading.Lock()
+        self._process = None
+        self._conn = None
+        self._cgroup = None
+        self._baseline_rss = None
+        self._owner_pid = None
+        self._stats = {"jobs": 0, "recycles": 0, "memory_kills": 0}
+        atexit.register(self.shutdown)
+
+    def configure(self, max_rss_mb=0, address_space_mb=0, cgroup_parent=None, recycle_growth_mb=1024,
+                  poll_interval=0.5, start_method="spawn", initializer=None, initargs=()):
+        self.max_rss_mb = max_rss_mb
+        self.address_space_mb = address_space_mb
+        self.cgroup_parent = cgroup_parent
+        self.recycle_growth_mb = recycle_growth_mb
+        self.poll_interval = poll_interval
+        self.start_method = start_method
+        self.initializer = initializer
+        self.initargs = tuple(initargs)
+
+    def stats(self):
+        return dict(self._stats)
+
+    def run(self, func, args=(), kwargs=None, progress=None):
+        """
+        在子进程中执行 func(*args, **kwargs) 并返回结果
+        :param func: 可按模块路径序列化的函数，例如 mine_u.main.doc_parse
+        :param progress: 可选的进度回调，子进程中 func 收到的 progress 参数会转发到这里
+        :raises ParseMemoryError: 子进程超出内存上限
+        """
+        with self._lock:
+            self._ensure_child()
+            process, conn = self._process, self._conn
+            conn.send((func, tuple(args), dict(kwargs or {}), progress is not None))
+            finished = False
+            try:
+                while True:
+                    if not conn.poll(self.poll_interval):
+                        self._check_child(process)
+                        continue
+                    try:
+                        message = conn.recv()
+                    except (EOFError, OSError) as e:
+                        process.join(1)
+                        raise self._child_died(process) from e
+                    kind = message[0]
+                    if kind == "progress":
+                        progress(message[1])
+                    elif kind == "stage":
+                        stage_timer.record(message[1], message[2])
+                    elif kind == "ok":
+                        finished = True
+                        self._stats["jobs"] += 1
+                        self._after_job(message[2])
+                        return message[1]
+                    elif kind == "oom":
+                        self._stats["memory_kills"] += 1
+                        raise ParseMemoryError(f"解析子进程内存不足: {message[1]}")
+                    else:
+                        finished = True
+                        log.debug("解析子进程中的异常:\n%s", message[2])
+                        raise message[1]
+            finally:
+                if not finished:
+                    self._stop_child(kill=True)
+
+    def shutdown(self):
+        """退出子进程，Worker 进程退出时调用"""
+        with self._lock:
+            self._stop_child(kill=False)
+
+    def _ensure_child(self):
+        # fork 出的进程 (例如 Celery prefork 的子进程) 不能使用父进程创建的子进程和管道
+        if self._process is not None and self._owner_pid == os.getpid() and self._process.is_alive():
+            return
+        self._process = None
+        ctx = multiprocessing.get_context(self.start_method)
+        parent_conn, child_conn = ctx.Pipe()
+        process = ctx.Process(
+            target=_child_main,
+            args=(child_conn, self.address_space_mb, self.initializer, self.initargs),
+            name="mineru-parse",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        self._process, self._conn, self._owner_pid = process, parent_conn, os.getpid()
+        self._baseline_rss = None
+        if self.cgroup_parent and self.max_rss_mb:
+            self._cgroup = self._join_cgroup(process.pid)
+        log.info("解析子进程已启动 (pid=%s, 内存上限 %s MB)", process.pid, self.max_rss_mb or "不限")
+
+    def _join_cgroup(self, pid):
+        """把子进程放入单独的 cgroup v2 并设置 memory.max，失败时只依靠 RSS 监控"""
+        path = os.path.join(self.cgroup_parent, f"mineru-parse-{pid}")
+        try:
+            os.makedirs(path, exist_ok=True)
+            with open(os.path.join(path, "memory.max"), "w") as f:
+                f.write(str(self.max_rss_mb * _MB))
+            with open(os.path.join(path, "cgroup.procs"), "w") as f:
+                f.write(str(pid))
+            return path
+        except OSError as e:
+            log.warning("无法为解析子进程设置 cgroup %s: %s", path, e)
+            return None
+
+    def _check_child(self, process):
+        if not process.is_alive():
+            raise self._child_died(process)
+        if not self.max_rss_mb:
+            return
+        rss = _rss_bytes(process.pid)
+        if rss is not None and rss > self.max_rss_mb * _MB:
+            self._stats["memory_kills"] += 1
+            log.warning("解析子进程 RSS %d MB 超过上限 %s MB，终止该次解析", rss // _MB, self.max_rss_mb)
+            raise ParseMemoryError(f"解析子进程 RSS {rss // _MB} MB 超过上限 {self.max_rss_mb} MB")
+
+    def _child_died(self, process):
+        # SIGKILL 通常来自 cgroup 或内核的 OOM killer
+        if process.exitcode == -signal.SIGKILL:
+            self._stats["memory_kills"] += 1
+            return ParseMemoryError(f"解析子进程被 SIGKILL 终止 (pid={process.pid})，可能超出内存上限")
+        return RuntimeError(f"解析子进程异常退出 (pid={process.pid}, exitcode={process.exitcode})")
+
+    def _after_job(self, rss):
+        if rss is None or not self.recycle_growth_mb:
+            return
+        if self._baseline_rss is None:
+            self._baseline_rss = rss
+            return
+        growth = rss - self._baseline_rss
+        if growth > self.recycle_growth_mb * _MB:
+            self._stats["recycles"] += 1
+            log.info("解析子进程 RSS 比基线增长 %.0f MB，回收并在下次解析时重新创建", growth / _MB)
+            self._stop_child(kill=False)
+
+    def _stop_child(self, kill):
+        process, conn = self._process, self._conn
+        self._process = self._conn = None
+        if process is None or self._owner_pid != os.getpid():
+            return
+        if not kill and process.is_alive():
+            try:
+                conn.send(None)
+                process.join(10)
+            except (OSError, ValueError):
+                pass
+        if process.is_alive():
+            process.kill()
+            process.join(5)
+        conn.close()
+        if self._cgroup:
+            try:
+                os.rmdir(self._cgroup)
+            except OSError:
+                pass
+            self._cgroup = None
+
+
+# 每个 Worker 进程一个实例，参数由上层在使用前通过 configure 设置
+parse_executor = IsolatedExecutor()
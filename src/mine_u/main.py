@@ -1,38 +1,197 @@
+import json
+import logging
 import os
-from io import BytesIO
+import time
+from contextlib import closing
 
 import fitz
 from magic_pdf.data.data_reader_writer import FileBasedDataWriter, FileBasedDataReader
 from magic_pdf.data.dataset import PymuDocDataset
-from magic_pdf.model.doc_analyze_by_custom_model import doc_analyze
 from magic_pdf.config.enums import SupportedPdfParseMethod
 
-def doc_parse(pdf_path, output_path, page_start=None, page_end=None):
+from mine_u.batch_scheduler import inference_scheduler
+from mine_u.checkpoint import restore_images
+from mine_u.dataset import PageRangeDataset
+from mine_u.middle_json import merge_middle_json
+from mine_u.model_pool import model_registry
+from mine_u.page_classifier import classify_pages, group_runs, split_runs
+from mine_u.stage_timer import timed
+
+log = logging.getLogger(__name__)
+
+def doc_parse(pdf_path, output_path, page_start=None, page_end=None, progress=None,
+              checkpoint=None, checkpoint_pages=20):
+    """
+    使用 MinerU 解析 PDF（可只解析指定页码范围），并输出 middle json
+    逐页判断是否需要 OCR：扫描页走 OCR 模式，其余页走文本模式，结果按页码顺序合并
+    :param pdf_path: PDF 文件路径
+    :param output_path: 输出目录，图片写入其下的 images 目录
+    :param page_start: 起始页码（从 0 开始），为 None 时解析整个文档
+    :param page_end: 结束页码（包含，从 0 开始）
+    :param progress: 可选的进度回调，每完成一段调用 progress(本段页数)
+    :param checkpoint: 可选的 DocumentCheckpoint；给定时每段最多 checkpoint_pages 页，
+        每完成一段就保存检查点，重新解析同一文档时跳过已完成的段
+    :param checkpoint_pages: 启用检查点时每段的最大页数
+    :return: middle json 文件的路径
+    """
     filename = os.path.basename(pdf_path)
     # prepare env
     local_image_dir, local_md_dir = (output_path + "/images", output_path)
     os.makedirs(local_image_dir, exist_ok=True)
     image_writer, md_writer = FileBasedDataWriter(local_image_dir), FileBasedDataWriter(local_md_dir)
     name_without_suff = filename.split(".")[0]
-    reader = FileBasedDataReader()
     if page_start is not None and page_end is not None:
         name_without_suff = name_without_suff + f"_{page_start}-{page_end}"
-        pdf_bytes = split_pdf_by_range_fitz(pdf_path, page_start, page_end)
-        ds = PymuDocDataset(pdf_bytes)
+    middle_json_name = f"{name_without_suff}_middle.json"
+
+    with timed("classify"):
+        runs = plan_parse_runs(pdf_path, page_start, page_end,
+                               checkpoint_pages if checkpoint is not None else None)
+
+    # 已有检查点的段直接复用，只解析剩余的段
+    fragments = {}
+    if checkpoint is not None:
+        fragments = _restore_checkpoints(checkpoint, runs, local_image_dir, progress)
+        if fragments:
+            log.info("%s 从检查点恢复 %d/%d 段", name_without_suff, len(fragments), len(runs))
+
+    infer_start = time.perf_counter()
+    pending = [run for run in runs if run not in fragments]
+    # closing: 中途抛出异常时立即撤销尚未开始推理的请求
+    with closing(_infer_runs(pdf_path, pending)) as results:
+        for run, infer_result in results:
+            fragments[run] = _pipe_run(run, infer_result, image_writer, local_image_dir, checkpoint)
+            if progress is not None:
+                progress(run[1] - run[0] + 1)
+    if pending:
+        log.info("%s 推理 (含排队) 耗时 %.2fs, 累计统计: %s", name_without_suff,
+                 time.perf_counter() - infer_start, model_registry.stats())
+
+    if len(runs) == 1:
+        # 整段解析方式一致，直接输出
+        middle_json = fragments[runs[0]]
+    else:
+        # 混合文档或按检查点切分的文档：按页码顺序合并
+        base = page_start or 0
+        middle_json = merge_middle_json([(run[0] - base, fragments[run]) for run in runs])
+        log.info("%s 共 %d 段 (OCR %d 页)", name_without_suff, len(runs),
+                 sum(end - start + 1 for start, end, ocr in runs if ocr))
+    md_writer.write_string(middle_json_name, json.dumps(middle_json, ensure_ascii=False))
+    return os.path.join(local_md_dir, middle_json_name)
+
+
+def _restore_checkpoints(checkpoint, runs, local_image_dir, progress=None):
+    """
+    从检查点恢复已完成的段，图片复制到输出目录
+    :return: {run: middle_json}，只包含有检查点的段
+    """
+    fragments = {}
+    for run in runs:
+        middle_json = checkpoint.load(*run)
+        if middle_json is None:
+            continue
+        restore_images(checkpoint.image_dir(*run), local_image_dir)
+        fragments[run] = middle_json
+        if progress is not None:
+            progress(run[1] - run[0] + 1)
+    return fragments
+
+
+def _pipe_run(run, infer_result, image_writer, local_image_dir, checkpoint=None):
+    """
+    对一段的推理结果执行后处理流水线；给定 checkpoint 时同时提交该段的检查点
+    :return: 该段的 middle json
+    """
+    ocr = run[2]
+    if checkpoint is None:
+        return json.loads(_pipe(infer_result, ocr, image_writer).get_middle_json())
+    # 图片先写入检查点的临时目录，放到输出目录后再提交检查点
+    staging = checkpoint.staging_dir(*run)
+    staging_image_dir = os.path.join(staging, "images")
+    pipe_result = _pipe(infer_result, ocr, FileBasedDataWriter(staging_image_dir))
+    middle_json = json.loads(pipe_result.get_middle_json())
+    restore_images(staging_image_dir, local_image_dir)
+    checkpoint.commit(staging, *run, middle_json)
+    return middle_json
+
+
+def plan_parse_runs(pdf_path, page_start=None, page_end=None, max_run_pages=None):
+    """
+    逐页分类并合并为连续的页码段
+    分类失败时回退到 magic-pdf 对整段的分类结果
+    :param max_run_pages: 每段的最大页数，为 None 时不切分；切分后的页码总是确定的值
+    :return: [(page_start, page_end, ocr), ...]，未切分的单段页码与参数一致（可能为 None）
+    """
+    try:
+        flags = classify_pages(pdf_path, page_start, page_end)
+    except Exception as e:
+        log.warning("逐页分类失败，回退到整段分类: %s", e)
+        flags = []
+    if flags and (len(set(flags)) > 1 or max_run_pages):
+        runs = group_runs(flags, page_start or 0)
+    elif flags:
+        runs = [(page_start, page_end, flags[0])]
     else:
-        pdf_bytes = reader.read(pdf_path)
-        ds = PymuDocDataset(pdf_bytes)
+        ocr = open_dataset(pdf_path, page_start, page_end).classify() == SupportedPdfParseMethod.OCR
+        runs = [(page_start, page_end, ocr)]
+    if not max_run_pages:
+        return runs
+    if runs[0][0] is None or runs[0][1] is None:
+        with fitz.open(pdf_path) as doc:
+            last_page = doc.page_count - 1
+        runs = [(page_start or 0, page_end if page_end is not None else last_page, runs[0][2])]
+    return split_runs(runs, max_run_pages)
+
+
+def _infer_runs(pdf_path, runs):
+    """
+    按页码顺序逐段产出推理结果，调用方处理完一段（提交检查点、上报进度）后才取下一段
+    启用合批时先提交所有段的推理请求再依次等待，各段（以及同进程内并发的其他任务）可以合为一批推理；
+    未启用时 submit 同步执行推理，因此逐段提交，避免整个范围推理完成后才写入第一个检查点
+    调用方中途退出（取消、超时）时撤销尚未开始推理的请求
+    :return: 生成器，产出 (run, InferenceResult)
+    """
+    def submit(run):
+        return inference_scheduler.submit(open_dataset(pdf_path, run[0], run[1]), run[2], "ch")
+
+    if not inference_scheduler.enabled:
+        for run in runs:
+            yield run, submit(run).result()
+        return
+    submitted = [(run, submit(run)) for run in runs]
+    try:
+        for run, future in submitted:
+            yield run, future.result()
+    finally:
+        for _, future in submitted:
+            future.cancel()
 
-    if ds.classify() == SupportedPdfParseMethod.OCR:
-        infer_result = ds.apply(doc_analyze, ocr=True, lang="ch")
-        ## pipeline
-        pipe_result = infer_result.pipe_ocr_mode(image_writer)
+
+def _pipe(infer_result, ocr, image_writer):
+    """
+    按解析方式执行 magic-pdf 的后处理流水线
+    :return: magic-pdf 的 PipeResult
+    """
+    with timed("pipeline"):
+        if ocr:
+            return infer_result.pipe_ocr_mode(image_writer)
+        return infer_result.pipe_txt_mode(image_writer)
+
+
+def open_dataset(pdf_path, page_start=None, page_end=None):
+    """
+    打开指定页码范围的数据集
+    优先使用直接读取源文件的 PageRangeDataset，失败时回退到先切分为 bytes 再构建 PymuDocDataset
+    """
+    try:
+        return PageRangeDataset(pdf_path, page_start, page_end)
+    except Exception as e:
+        log.warning("PageRangeDataset 不可用，回退到字节拷贝方式: %s", e)
+    if page_start is not None and page_end is not None:
+        pdf_bytes = split_pdf_by_range_fitz(pdf_path, page_start, page_end)
     else:
-        infer_result = ds.apply(doc_analyze, ocr=False, lang="ch")
-        ## pipeline
-        pipe_result = infer_result.pipe_txt_mode(image_writer)
-    pipe_result.get_middle_json()
-    pipe_result.dump_middle_json(md_writer, f"{name_without_suff}_middle.json")
+        pdf_bytes = FileBasedDataReader().read(pdf_path)
+    return PymuDocDataset(pdf_bytes)
 
 
 def split_pdf_by_range_fitz(input_path, start_page, end_page):
@@ -47,13 +206,11 @@ def split_pdf_by_range_fitz(input_path, start_page, end_page):
     new_doc = fitz.open()  # 创建空文档
     # 插入指定页码范围（PyMuPDF 的页码从 0 开始）
     new_doc.insert_pdf(doc, from_page=start_page, to_page=end_page)
-    # 将结果保存到内存中的字节流
-    buffer = BytesIO()
-    new_doc.save(buffer)  # 写入二进制流
-    buffer.seek(0)
+    # 直接序列化为 bytes，避免 BytesIO 写入后再 getvalue() 产生第二份拷贝
+    pdf_bytes = new_doc.tobytes()
     doc.close()
     new_doc.close()
-    return buffer.getvalue()  # 返回二进制数组
+    return pdf_bytes
 
 
 if __name__ == "__main__":
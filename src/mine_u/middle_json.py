@@ -0,0 +1,27 @@
+def merge_middle_json(fragments):
+    """
+    合并多段页码范围各自的 middle json
+
+    每段的 page_idx 都从 0 开始，合并时加上该段的起始页码，还原为原文档中的页码；
+    各段解析方式不同时 _parse_type 记为 "mixed"
+    :param fragments: [(page_start, middle_json), ...]，顺序不限
+    :return: 合并后的 middle json
+    """
+    pdf_info = []
+    parse_types = set()
+    version_name = None
+
+    for page_start, fragment in sorted(fragments, key=lambda item: item[0]):
+        for page in fragment.get("pdf_info", []):
+            page = dict(page)
+            page["page_idx"] = page.get("page_idx", 0) + page_start
+            pdf_info.append(page)
+        if fragment.get("_parse_type"):
+            parse_types.add(fragment["_parse_type"])
+        version_name = version_name or fragment.get("_version_name")
+
+    return {
+        "pdf_info": pdf_info,
+        "_parse_type": parse_types.pop() if len(parse_types) == 1 else "mixed",
+        "_version_name": version_name,
+    }
@@ -0,0 +1,109 @@
+import logging
+
+import fitz
+
+log = logging.getLogger(__name__)
+
+# 页面至少包含这么多可见字符才认为文本层可用
+MIN_TEXT_CHARS = 20
+# 文本块面积占页面面积的最小比例
+MIN_TEXT_COVERAGE = 0.02
+# 图片面积占比达到该值且文本覆盖不足时，视为扫描页
+SCANNED_IMAGE_COVERAGE = 0.5
+# 无法映射到 Unicode 的字符 (U+FFFD) 比例超过该值时，文本层不可信
+MAX_GARBLED_RATIO = 0.1
+
+
+def _image_coverage(page, page_area):
+    """页面上图片覆盖的面积比例（按图片外接矩形与页面的交集计算）"""
+    area = 0.0
+    for info in page.get_image_info():
+        rect = fitz.Rect(info["bbox"]) & page.rect
+        if not rect.is_empty:
+            area += rect.width * rect.height
+    return min(area / page_area, 1.0)
+
+
+def page_features(page):
+    """
+    计算单页的分类特征
+    :param page: fitz.Page
+    :return: {"chars", "text_coverage", "image_coverage", "fonts", "garbled_ratio"}
+    """
+    page_area = max(page.rect.width * page.rect.height, 1.0)
+    text_area = 0.0
+    text = []
+    for x0, y0, x1, y1, block_text, _, block_type in page.get_text("blocks"):
+        if block_type != 0:
+            continue
+        text_area += (x1 - x0) * (y1 - y0)
+        text.append(block_text)
+    text = "".join(text)
+    chars = sum(1 for ch in text if not ch.isspace())
+    garbled = text.count("�")
+    return {
+        "chars": chars,
+        "text_coverage": min(text_area / page_area, 1.0),
+        "image_coverage": _image_coverage(page, page_area),
+        "fonts": len(page.get_fonts()),
+        "garbled_ratio": garbled / chars if chars else 0.0,
+    }
+
+
+def needs_ocr(features):
+    """
+    根据页面特征判断是否需要 OCR
+    - 没有嵌入字体或可见字符过少：没有可用的文本层
+    - 文本层大多是无法映射的字符：文本层不可信
+    - 大图覆盖页面且文本覆盖很小：扫描页（可能带有少量页眉页脚文字）
+    """
+    if features["fonts"] == 0 or features["chars"] < MIN_TEXT_CHARS:
+        return True
+    if features["garbled_ratio"] > MAX_GARBLED_RATIO:
+        return True
+    return (features["image_coverage"] >= SCANNED_IMAGE_COVERAGE
+            and features["text_coverage"] < MIN_TEXT_COVERAGE)
+
+
+def classify_pages(pdf_path, page_start=None, page_end=None):
+    """
+    逐页判断解析方式，只读取文本层和图片信息，不渲染页面
+    :param pdf_path: PDF 文件路径
+    :param page_start: 起始页码（从 0 开始），为 None 时处理整个文档
+    :param page_end: 结束页码（包含，从 0 开始）
+    :return: 与页码范围等长的列表，True 表示该页需要 OCR
+    """
+    with fitz.open(pdf_path) as doc:
+        start = page_start or 0
+        end = page_end if page_end is not None else doc.page_count - 1
+        return [needs_ocr(page_features(doc[index])) for index in range(start, end + 1)]
+
+
+def group_runs(flags, offset=0):
+    """
+    把逐页的分类结果合并为连续的页码段
+    :param flags: classify_pages 的结果
+    :param offset: flags[0] 对应的页码
+    :return: [(page_start, page_end, ocr), ...]，page_end 包含在内
+    """
+    runs = []
+    for index, ocr in enumerate(flags):
+        page = offset + index
+        if runs and runs[-1][2] == ocr:
+            runs[-1] = (runs[-1][0], page, ocr)
+        else:
+            runs.append((page, page, ocr))
+    return runs
+
+
+def split_runs(runs, max_pages):
+    """
+    把过长的页码段按 max_pages 切分，解析方式不变
+    :param runs: group_runs 的结果，页码必须是确定的值
+    :return: [(page_start, page_end, ocr), ...]
+    """
+    result = []
+    for start, end, ocr in runs:
+        for chunk_start in range(start, end + 1, max_pages):
+            result.append((chunk_start, min(chunk_start + max_pages - 1, end), ocr))
+    return result
@@ -0,0 +1,29 @@
+import time
+from contextlib import contextmanager
+
+# 阶段耗时的观察者，调用方式为 observer(stage, seconds)
+# mine_u 不依赖上层服务，指标由调用方注册观察者后自行记录
+_observers = []
+
+
+def add_observer(observer):
+    if observer not in _observers:
+        _observers.append(observer)
+
+
+def record(stage, seconds):
+    for observer in _observers:
+        observer(stage, seconds)
+
+
+@contextmanager
+def timed(stage):
+    """
+    记录代码块的耗时并通知观察者
+    :param stage: 阶段名称，例如 classify / inference / pipeline
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start)
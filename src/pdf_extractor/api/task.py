@@ -1,21 +1,76 @@
 # src/pdf_extractor/api/task.py (修正后)
-import tempfile
-import uuid
+import asyncio
+import hashlib
+import json
 import os
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, File, UploadFile, HTTPException, Depends
-from sqlalchemy.orm import Session
+from celery import group
+from fastapi import APIRouter, File, UploadFile, HTTPException, Depends, Query, Request
+from fastapi.responses import Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..core.config import settings
+from ..core.exceptions import BlobNotFoundError, UploadTooLargeError
 from ..core.logger import logger
-from ..db.session import get_db, get_db_with_commit, SessionLocal
+from ..core.metrics import STAGE_ENQUEUE, UPLOADS_TOTAL, stage_timer
+from ..db.session import AsyncSessionLocal, get_async_db
 from ..schemas import task as task_schema # 使用别名以区分
 from ..crud import task as crud_task     # 导入 CRUD 操作
+from ..crud import batch as crud_batch
+from ..crud import task_result as crud_task_result
+from ..crud import task_artifact as crud_task_artifact
 from ..db import models                   # 导入 SQLAlchemy models
+from ..services import result_store
+from ..services.routing import Route, choose_route, default_route
+from ..services.status_broker import status_broker
+from ..services.result_cache import build_cache_key, result_cache_service
+from ..services.blob_store import blob_store
+from ..services.upload_service import StoredUpload, publish_upload, save_upload_file
+from ..celery_app import revoke_pdf_task
 from ..worker.tasks import process_pdf_file
 
 router = APIRouter()
 
 
+@router.get("/", response_model=task_schema.TaskPage, summary="分页查询任务列表")
+async def list_tasks(
+        limit: int = Query(50, ge=1, le=500, description="每页条数"),
+        cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+        status: Optional[str] = Query(None, description="按任务状态筛选"),
+        filename: Optional[str] = Query(None, description="按文件名前缀筛选 (不区分大小写)"),
+        created_from: Optional[datetime] = Query(None, description="创建时间下限 (包含)"),
+        created_to: Optional[datetime] = Query(None, description="创建时间上限 (不包含)"),
+        db: AsyncSession = Depends(get_async_db)):
+    """
+    按创建时间倒序列出任务，使用 (created_at, id) 游标分页。
+    例如查询最近的失败任务: GET /api/tasks/?status=FAILURE&limit=20
+    """
+    try:
+        decoded_cursor = crud_task.decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+
+    # 多取一条用于判断是否还有下一页
+    tasks = await crud_task.async_task.list_page(
+        db,
+        limit=limit + 1,
+        cursor=decoded_cursor,
+        status=status,
+        filename_prefix=filename,
+        created_from=created_from,
+        created_to=created_to,
+    )
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = crud_task.encode_cursor(tasks[-1].created_at, tasks[-1].id)
+    return {"items": tasks, "next_cursor": next_cursor}
+
+
 @router.post(
     "/",
     response_model=task_schema.TaskCreateResponse,
@@ -24,48 +79,104 @@ router = APIRouter()
 )
 async def create_upload_task(  # <-- 1. 重命名函数
         file: UploadFile = File(..., description="要处理的PDF文件。"),
-        db: Session = Depends(get_db)):
+        profile: bool = Query(False, description="记录该任务的性能分析数据"),
+        titles_only: bool = Query(False, description="只提取标题 (优先使用不依赖模型的快速路径)"),
+        db: AsyncSession = Depends(get_async_db)):
     """
     此端点的执行流程:
     1. 验证上传的文件。
-    2. 将文件安全地保存到临时位置。
-    3. 使用 CRUD 层在数据库中创建任务记录。
-    4. 将任务分派给 Celery。
-    5. 立即返回任务ID。
+    2. 将文件分块流式保存到临时位置（内存占用与文件大小无关）。
+    3. 按内容摘要查询结果缓存，命中则直接返回已有任务。
+    4. 把文件写入共享存储 (按内容摘要寻址)，使用 CRUD 层在数据库中创建任务记录。
+    5. 将任务分派给 Celery，消息中只携带存储键。
+    6. 立即返回任务ID。
     """
     if file.content_type != "application/pdf":
         logger.warning(f"拒绝了一个非PDF文件上传: {file.filename}")
+        UPLOADS_TOTAL.labels(outcome="rejected").inc()
         raise HTTPException(status_code=400, detail="只能上传PDF文件。")
 
-    # --- 2. 使用 tempfile 安全创建临时文件 ---
+    # --- 2. 分块流式落盘，同时计算 SHA-256 并探测页数 ---
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as temp_file:
-            contents = await file.read()
-            temp_file.write(contents)
-            temp_file_path = temp_file.name
-        logger.info(f"文件 '{file.filename}' 已临时保存到: {temp_file_path}")
+        stored = await save_upload_file(file)
+        temp_file_path = stored.path
+        logger.info(
+            f"文件 '{file.filename}' 已临时保存到: {temp_file_path} "
+            f"(大小: {stored.size} 字节, SHA-256: {stored.sha256}, 页数: {stored.page_count})"
+        )
+    except UploadTooLargeError as e:
+        logger.warning(f"拒绝了一个超大文件上传: {file.filename}")
+        UPLOADS_TOTAL.labels(outcome="too_large").inc()
+        raise HTTPException(status_code=413, detail=str(e)) from e
     except Exception as e:
         logger.error(f"保存临时文件失败: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="无法保存上传的文件。")
+        UPLOADS_TOTAL.labels(outcome="error").inc()
+        raise HTTPException(status_code=500, detail="无法保存上传的文件。") from e
 
-    # --- 3. 使用 CRUD 层创建数据库任务 ---
+    # --- 3. 查询内容寻址缓存 ---
+    parse_options = _parse_options(titles_only)
+    cache_key = build_cache_key(stored.sha256, parse_options)
+    cached_task_id = await result_cache_service.lookup(db, cache_key)
+    if cached_task_id is not None:
+        os.unlink(temp_file_path)  # 内容已处理过，临时文件不再需要
+        logger.info(f"文件 '{file.filename}' 命中结果缓存，复用任务 {cached_task_id}。")
+        UPLOADS_TOTAL.labels(outcome="cached").inc()
+        return {
+            "task_id": str(cached_task_id),
+            "filename": file.filename,
+            "message": "相同内容的文件已处理或正在处理中，已复用已有任务。",
+            "cached": True,
+        }
+
+    # --- 4. 写入共享存储，Worker 通过存储键取回文件 ---
+    try:
+        file_key = await publish_upload(stored)
+    except Exception as e:
+        logger.error(f"写入共享存储失败: {e}", exc_info=True)
+        UPLOADS_TOTAL.labels(outcome="error").inc()
+        raise HTTPException(status_code=500, detail="无法保存上传的文件。") from e
+
+    # --- 使用 CRUD 层创建数据库任务 ---
     task_to_create = task_schema.TaskCreate(filename=file.filename)
-    db_task = crud_task.task.create(db=db, obj_in=task_to_create)
+    db_task = await crud_task.async_task.create(db=db, obj_in=task_to_create, file_key=file_key)
+    await result_cache_service.register(
+        db,
+        cache_key=cache_key,
+        file_digest=stored.sha256,
+        options=parse_options,
+        task_id=db_task.id,
+    )
 
-    # 手动提交事务 (因为 get_db 不会自动提交)
-    db.commit()
-    db.refresh(db_task)
+    # 手动提交事务 (因为 get_async_db 不会自动提交)
+    await db.commit()
 
     task_id = db_task.id
     logger.info(f"数据库记录已创建，任务ID: {task_id}")
 
-    # --- 4. 分派 Celery 任务 ---
-    process_pdf_file.delay(
-        task_id=str(task_id),
-        file_path=temp_file_path,
-        original_filename=file.filename
-    )
-    logger.info(f"任务 {task_id} 已成功分派给Celery Worker。")
+    # --- 5. 按预检结果选择队列并分派 Celery 任务 ---
+    route = _route_for(stored)
+    with stage_timer(STAGE_ENQUEUE):
+        process_pdf_file.apply_async(
+            kwargs={
+                "task_id": str(task_id),
+                "file_path": None,
+                "file_key": file_key,
+                "original_filename": file.filename,
+                "page_count": stored.page_count,
+                "text_ratio": stored.text_ratio,
+                "profile": profile,
+                "file_digest": stored.sha256,
+                "titles_only": titles_only,
+            },
+            # Celery 任务ID与业务任务ID相同，取消时可以直接 revoke
+            task_id=str(task_id),
+            queue=route.queue,
+            priority=route.priority,
+            soft_time_limit=route.soft_time_limit,
+            time_limit=route.time_limit,
+        )
+    UPLOADS_TOTAL.labels(outcome="accepted").inc()
+    logger.info(f"任务 {task_id} 已成功分派给Celery Worker (队列: {route.queue}, 优先级: {route.priority})。")
 
     return {
         "task_id": str(task_id), # 确保返回的是字符串
@@ -74,27 +185,457 @@ async def create_upload_task(  # <-- 1. 重命名函数
     }
 
 
-@router.get("/{task_id}/status", response_model=task_schema.Task)
-def get_task_status(task_id: uuid.UUID, db: Session = Depends(get_db)):
+def _parse_options(titles_only: bool) -> Dict[str, Any]:
+    """影响解析结果的选项，参与缓存键计算；默认值不写入，保持与已有缓存条目兼容。"""
+    return {"titles_only": True} if titles_only else {}
+
+
+def _route_for(stored: StoredUpload, batch: bool = False) -> Route:
+    """根据上传预检结果选择队列；关闭路由时全部进入默认通道。"""
+    if not settings.routing.enabled:
+        return default_route()
+    return choose_route(stored.page_count, stored.size, stored.is_scanned, batch=batch)
+
+
+def _remove_files(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+@router.post(
+    "/batch",
+    response_model=task_schema.BatchCreateResponse,
+    status_code=202,
+    summary="批量上传PDF并创建处理任务"
+)
+async def create_batch_upload_task(
+        files: List[UploadFile] = File(..., description="要处理的PDF文件列表。"),
+        titles_only: bool = Query(False, description="只提取标题 (优先使用不依赖模型的快速路径)"),
+        db: AsyncSession = Depends(get_async_db)):
+    """
+    批量上传端点，与逐个调用上传接口相比：
+    1. 所有文件的缓存查询合并为一次数据库查询。
+    2. 所有任务通过一条 INSERT ... RETURNING 创建，并在同一个事务中提交。
+    3. 所有 Celery 消息作为一个 group 通过同一个 Broker 连接发布。
+    4. 返回批次ID，可用于查询批次的聚合进度。
+    """
+    if len(files) > settings.upload.max_batch_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"单次最多上传 {settings.upload.max_batch_files} 个文件。",
+        )
+    for file in files:
+        if file.content_type != "application/pdf":
+            logger.warning(f"批量上传中包含非PDF文件: {file.filename}")
+            raise HTTPException(status_code=400, detail=f"只能上传PDF文件: {file.filename}")
+
+    # --- 1. 逐个流式落盘 ---
+    stored_files = await _save_batch_files(files)
+
+    # --- 2. 一次查询完成所有文件的缓存查找 ---
+    parse_options = _parse_options(titles_only)
+    cache_keys = [build_cache_key(stored.sha256, parse_options) for stored in stored_files]
+    cached = await result_cache_service.lookup_many(db, cache_keys)
+    new_positions = _new_task_positions(cache_keys, cached)
+    await _publish_new_files(stored_files, new_positions)
+
+    # --- 3. 单个事务中批量创建任务、缓存条目和批次记录 ---
+    new_task_ids = await crud_task.async_task.create_many(
+        db,
+        filenames=[files[position].filename for position in new_positions.values()],
+        file_keys=[stored_files[position].key for position in new_positions.values()],
+    )
+    key_to_task = dict(cached)
+    key_to_task.update(zip(new_positions.keys(), new_task_ids, strict=True))
+
+    await result_cache_service.register_many(
+        db,
+        entries=[
+            (cache_key, stored_files[position].sha256, key_to_task[cache_key])
+            for cache_key, position in new_positions.items()
+        ],
+        options=parse_options,
+    )
+    db_batch = await crud_batch.async_batch.create_with_items(
+        db, items=[(key_to_task[cache_key], file.filename) for cache_key, file in zip(cache_keys, files, strict=True)]
+    )
+    await db.commit()
+    logger.info(
+        f"批次 {db_batch.id} 已创建: 共 {len(files)} 个文件，新建任务 {len(new_task_ids)} 个，"
+        f"复用已有任务 {len(files) - len(new_task_ids)} 个。"
+    )
+
+    # --- 4. 通过一个 group 分派所有新任务 ---
+    if new_positions:
+        _dispatch_batch(files, stored_files, new_positions, key_to_task, titles_only)
+    UPLOADS_TOTAL.labels(outcome="accepted").inc(len(new_positions))
+    UPLOADS_TOTAL.labels(outcome="cached").inc(len(files) - len(new_positions))
+
+    return {
+        "batch_id": str(db_batch.id),
+        "tasks": [
+            {
+                "task_id": str(key_to_task[cache_key]),
+                "filename": file.filename,
+                "cached": new_positions.get(cache_key) != position,
+            }
+            for position, (cache_key, file) in enumerate(zip(cache_keys, files, strict=True))
+        ],
+        "message": "批量任务已创建并正在后台处理中。",
+    }
+
+
+async def _save_batch_files(files: List[UploadFile]) -> List[StoredUpload]:
+    """逐个流式落盘；任一文件失败时删除已保存的临时文件。"""
+    stored_files: List[StoredUpload] = []
+    try:
+        for file in files:
+            stored_files.append(await save_upload_file(file))
+    except UploadTooLargeError as e:
+        _remove_files([stored.path for stored in stored_files])
+        raise HTTPException(status_code=413, detail=str(e)) from e
+    except Exception as e:
+        _remove_files([stored.path for stored in stored_files])
+        logger.error(f"批量上传保存临时文件失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="无法保存上传的文件。") from e
+    return stored_files
+
+
+def _new_task_positions(cache_keys: List[str], cached: Dict[str, uuid.UUID]) -> Dict[str, int]:
+    """
+    需要新建任务的文件：{cache_key: 在批次中的位置}。
+    未命中缓存的文件才需要新建任务，批次内内容相同的文件只创建一个任务。
+    """
+    new_positions: Dict[str, int] = {}
+    for position, cache_key in enumerate(cache_keys):
+        if cache_key not in cached and cache_key not in new_positions:
+            new_positions[cache_key] = position
+    return new_positions
+
+
+async def _publish_new_files(stored_files: List[StoredUpload], new_positions: Dict[str, int]) -> None:
+    """新任务的文件写入共享存储，复用已有任务的文件不再需要临时文件。"""
+    new_paths = {stored_files[position].path for position in new_positions.values()}
+    _remove_files([stored.path for stored in stored_files if stored.path not in new_paths])
+    try:
+        for position in new_positions.values():
+            await publish_upload(stored_files[position])
+    except Exception as e:
+        _remove_files(list(new_paths))
+        logger.error(f"批量上传写入共享存储失败: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="无法保存上传的文件。") from e
+
+
+def _dispatch_batch(files: List[UploadFile], stored_files: List[StoredUpload], new_positions: Dict[str, int],
+                    key_to_task: Dict[str, uuid.UUID], titles_only: bool) -> None:
+    """通过一个 group 在同一个 Broker 连接上发布所有新任务的消息。"""
+    signatures = []
+    for cache_key, position in new_positions.items():
+        route = _route_for(stored_files[position], batch=True)
+        signatures.append(
+            process_pdf_file.s(
+                task_id=str(key_to_task[cache_key]),
+                file_path=None,
+                file_key=stored_files[position].key,
+                original_filename=files[position].filename,
+                page_count=stored_files[position].page_count,
+                text_ratio=stored_files[position].text_ratio,
+                file_digest=stored_files[position].sha256,
+                titles_only=titles_only,
+            ).set(
+                task_id=str(key_to_task[cache_key]), queue=route.queue, priority=route.priority,
+                soft_time_limit=route.soft_time_limit, time_limit=route.time_limit,
+            )
+        )
+    with stage_timer(STAGE_ENQUEUE):
+        group(signatures).apply_async()
+
+
+@router.get("/batch/{batch_id}", response_model=task_schema.BatchProgress)
+async def get_batch_progress(batch_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    """
+    查询批次的聚合进度，一次 GROUP BY 查询完成。
+    """
+    db_batch = await crud_batch.async_batch.get(db=db, id=batch_id)
+    if not db_batch:
+        raise HTTPException(status_code=404, detail="批次未找到")
+
+    status_counts = await crud_batch.async_batch.get_status_counts(db, batch_id=batch_id)
+    finished = sum(
+        count for status, count in status_counts.items() if status in task_schema.TERMINAL_STATUSES
+    )
+    total = db_batch.file_count
+    return {
+        "batch_id": batch_id,
+        "total": total,
+        "status_counts": status_counts,
+        "finished": finished,
+        "progress": finished / total if total else 1.0,
+    }
+
+
+@router.get("/{task_id}/status", response_model=task_schema.TaskStatusRead)
+async def get_task_status(task_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
     """
     状态查询接口，通过ID从数据库获取任务信息。
+    只返回状态和结果的引用，结果本身通过 result_url 获取。
     """
     # --- 5. 使用 CRUD 层查询 ---
-    db_task = crud_task.task.get(db=db, id=task_id)
-    if not db_task:
+    found = await crud_task.async_task.get_with_result_meta(db=db, id=task_id)
+    if not found:
         raise HTTPException(status_code=404, detail="任务未找到")
-    return db_task
+    db_task, result_size, result_etag = found
+    return {
+        "id": db_task.id,
+        "filename": db_task.filename,
+        "status": db_task.status,
+        "progress": db_task.progress,
+        "error_message": db_task.error_message,
+        "created_at": db_task.created_at,
+        "updated_at": db_task.updated_at,
+        "result_url": f"/api/tasks/{task_id}/result" if result_etag else None,
+        "result_size": result_size,
+        "result_etag": result_etag,
+    }
+
+
+def _accepts(request: Request, encoding: str) -> bool:
+    accept = request.headers.get("accept-encoding", "")
+    return any(part.split(";")[0].strip() == encoding for part in accept.split(","))
+
+
+def _render_result(data: bytes, codec: str, fields: Optional[List[str]],
+                   pages: Optional[result_store.PageRanges], gzip_ok: bool, zstd_ok: bool):
+    """
+    在线程池中执行：按需解压、投影并重新压缩结果。
+    无投影且客户端支持存储格式时，直接返回存储的字节，不做任何解压。
+
+    Returns:
+        (body, content_encoding)
+    """
+    if not fields and pages is None:
+        if (codec == result_store.CODEC_GZIP and gzip_ok) or (codec == result_store.CODEC_ZSTD and zstd_ok):
+            return data, codec
+        raw = result_store.decompress(data, codec)
+    else:
+        result = result_store.project_result(result_store.decode_result(data, codec), fields, pages)
+        raw = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if gzip_ok:
+        return result_store.compress(raw, result_store.CODEC_GZIP), result_store.CODEC_GZIP
+    return raw, None
+
+
+@router.get("/{task_id}/result", summary="获取任务结果")
+async def get_task_result(
+        task_id: uuid.UUID,
+        request: Request,
+        fields: Optional[str] = Query(None, description="需要返回的结果字段 (result 内部)，逗号分隔"),
+        pages: Optional[str] = Query(None, description="需要返回的页码 (从 0 开始)，例如 0-9,12"),
+        db: AsyncSession = Depends(get_async_db)):
+    """
+    结果获取接口：
+    - 支持 ETag / If-None-Match，结果未变化时返回 304。
+    - 支持 gzip (以及 zstd) 内容编码，存储格式与客户端匹配时直接返回存储的字节。
+    - 支持按字段和页码投影，只返回需要的部分。
+    """
+    try:
+        page_set = result_store.parse_page_spec(pages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"无效的页码参数: {e}") from e
+    field_list = [field.strip() for field in fields.split(",")] if fields else None
+
+    db_result = await crud_task_result.async_task_result.get(db=db, id=task_id)
+    if not db_result:
+        raise HTTPException(status_code=404, detail="任务结果未找到")
+
+    etag = f'"{db_result.etag}"'
+    if field_list or page_set is not None:
+        # 投影结果使用弱 ETag，区分不同的投影参数
+        projection = hashlib.sha256(f"{fields}|{pages}".encode("utf-8")).hexdigest()[:16]
+        etag = f'W/"{db_result.etag}-{projection}"'
+    headers = {"ETag": etag, "Vary": "Accept-Encoding", "Cache-Control": "private, max-age=0"}
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    body, encoding = await run_in_threadpool(
+        _render_result, db_result.data, db_result.codec, field_list, page_set,
+        _accepts(request, "gzip"), _accepts(request, "zstd"),
+    )
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.get("/{task_id}/artifacts", response_model=List[task_schema.TaskArtifactRead],
+            summary="列出任务产物")
+async def list_task_artifacts(task_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    """
+    列出任务的产物 (例如上传时指定 profile=true 生成的性能分析报告)，不包含内容本身。
+    """
+    artifacts = await crud_task_artifact.async_task_artifact.list_for_task(db, task_id=task_id)
+    return [
+        {
+            "name": artifact.name,
+            "content_type": artifact.content_type,
+            "size": artifact.size,
+            "created_at": artifact.created_at,
+            "download_url": f"/api/tasks/{task_id}/artifacts/{artifact.name}",
+        }
+        for artifact in artifacts
+    ]
+
+
+@router.get("/{task_id}/artifacts/{name}", summary="下载任务产物")
+async def download_task_artifact(task_id: uuid.UUID, name: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    下载单个任务产物。profile.pstats 可直接用 pstats / snakeviz 加载。
+    """
+    artifact = await crud_task_artifact.async_task_artifact.get_by_name(db, task_id=task_id, name=name)
+    if not artifact:
+        raise HTTPException(status_code=404, detail="任务产物未找到")
+    return Response(
+        content=artifact.data,
+        media_type=artifact.content_type,
+        headers={"Content-Disposition": f'attachment; filename="{task_id}-{artifact.name}"'},
+    )
 
-def get_db_session():
+
+def _parse_range(header: str, size: int) -> Tuple[int, int]:
+    """
+    解析单段 Range 请求头 (bytes=start-end、bytes=start-、bytes=-suffix)。
+
+    Returns:
+        (start, end)，end 包含在内。
+
+    Raises:
+        ValueError: 格式错误、多段范围或范围不可满足。
     """
-    一个 FastAPI 依赖项，它能创建并产出一个数据库会话，
-    并在请求处理结束后关闭它。
+    unit, _, spec = header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        raise ValueError(header)
+    first, _, last = spec.strip().partition("-")
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(size - int(last), 0), size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+@router.get("/{task_id}/file", summary="下载任务的原始文件")
+async def download_task_file(task_id: uuid.UUID, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
-    db = SessionLocal()
+    从共享存储读取任务的原始 PDF (键记录在任务的 file_key 中)。
+    支持单段 Range 请求，PDF 阅读器 (例如 PDF.js) 可以只读取需要显示的页面所在的字节范围。
+    """
+    db_task = await crud_task.async_task.get(db=db, id=task_id)
+    if not db_task:
+        raise HTTPException(status_code=404, detail="任务未找到")
+    key = db_task.file_key
+    size = await run_in_threadpool(blob_store.size, key) if key else None
+    if size is None:
+        raise HTTPException(status_code=404, detail="原始文件未找到 (可能已被清理)")
+
+    headers = {"Accept-Ranges": "bytes", "Content-Disposition": f'inline; filename="{task_id}.pdf"'}
+    range_header = request.headers.get("range")
     try:
-        yield db
-    finally:
-        db.close()
+        if range_header:
+            try:
+                start, end = _parse_range(range_header, size)
+            except ValueError as e:
+                raise HTTPException(status_code=416, detail="无效的 Range 请求",
+                                    headers={"Content-Range": f"bytes */{size}"}) from e
+            data = await run_in_threadpool(blob_store.read_range, key, start, end)
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+            return Response(content=data, status_code=206, media_type="application/pdf", headers=headers)
+        # 同步迭代器由 StreamingResponse 放到线程池中逐块读取
+        chunks = await run_in_threadpool(blob_store.iter_chunks, key)
+    except BlobNotFoundError as e:
+        raise HTTPException(status_code=404, detail="原始文件未找到 (可能已被清理)") from e
+    headers["Content-Length"] = str(size)
+    return StreamingResponse(chunks, media_type="application/pdf", headers=headers)
+
+
+@router.delete("/{task_id}", response_model=task_schema.TaskEvent, status_code=202, summary="取消任务")
+async def cancel_task(task_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    """
+    取消一个尚未结束的任务。
+
+    1. 通过带条件的 UPDATE 把任务标记为 CANCELLED 并发布状态通知，与 Worker 写入终态不存在竞争。
+    2. 撤销仍在队列中的消息，并广播给所有 Worker，立即终止正在执行的主任务和分片，释放 Worker。
+    已处于终态的任务返回 409。
+    """
+    cancelled = await crud_task.async_task.cancel(db, id=task_id)
+    if cancelled is None:
+        db_task = await crud_task.async_task.get(db=db, id=task_id)
+        if not db_task:
+            raise HTTPException(status_code=404, detail="任务未找到")
+        raise HTTPException(status_code=409, detail=f"任务已处于终态: {db_task.status}")
+    status, progress = cancelled
+    await crud_task.publish_task_event_async(db, task_id=str(task_id), status=status, progress=progress)
+    await db.commit()
+
+    # 发布控制消息是阻塞调用，放到线程池中执行
+    await run_in_threadpool(revoke_pdf_task, str(task_id))
+    logger.info(f"任务 {task_id} 已取消。")
+    return {"task_id": str(task_id), "status": status, "progress": progress}
+
+
+def _sse_event(event: Dict[str, Any]) -> str:
+    return f"event: status\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+
+@router.get("/{task_id}/events", summary="以 SSE 推送任务状态变更")
+async def stream_task_events(task_id: uuid.UUID, request: Request):
+    """
+    Server-Sent Events 端点，替代轮询状态接口。
+
+    1. 先订阅状态通知，再读取一次当前状态，避免两者之间的变更被遗漏。
+    2. 之后的每次状态/进度变化都由 Worker 通过 PostgreSQL NOTIFY 推送，
+       不再产生任何数据库查询。
+    3. 任务进入终态后关闭连接。
+    """
+    key = str(task_id)
+    queue = status_broker.subscribe(key)
+
+    # 只在读取初始状态时短暂占用数据库连接，不在整个流式响应期间持有
+    async with AsyncSessionLocal() as db:
+        db_task = await crud_task.async_task.get(db=db, id=task_id)
+    if not db_task:
+        status_broker.unsubscribe(key, queue)
+        raise HTTPException(status_code=404, detail="任务未找到")
+
+    initial = task_schema.TaskEvent(task_id=key, status=db_task.status, progress=db_task.progress).model_dump()
+
+    async def event_stream():
+        try:
+            yield _sse_event(initial)
+            if initial["status"] in task_schema.TERMINAL_STATUSES:
+                return
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.events.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield _sse_event(event)
+                if event.get("status") in task_schema.TERMINAL_STATUSES:
+                    return
+        finally:
+            status_broker.unsubscribe(key, queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 
 @router.get(
     "/create_test_task",  # <-- 1. 修改路径和函数名
@@ -102,7 +643,7 @@ def get_db_session():
     status_code=202,
     summary="创建一个用于测试的虚拟任务"
 )
-async def create_test_task(db: Session = Depends(get_db_session)):
+async def create_test_task(db: AsyncSession = Depends(get_async_db)):
     """
     创建一个虚拟任务用于测试，不涉及文件上传。
     """
@@ -112,17 +653,19 @@ async def create_test_task(db: Session = Depends(get_db_session)):
 
     # --- 3. 使用 CRUD 层创建数据库任务 ---
     task_to_create = task_schema.TaskBase(filename=test_filename)
-    db_task = crud_task.task.create(db=db, obj_in=task_to_create)
-    db.commit()  # <--- 4. 在这里提交事务
-    db.refresh(db_task)
+    db_task = await crud_task.async_task.create(db=db, obj_in=task_to_create)
+    await db.commit()  # <--- 4. 在这里提交事务
     task_id = db_task.id
     logger.info(f"数据库测试任务已创建，ID: {task_id}")
 
     # --- 4. 分派 Celery 任务 ---
-    process_pdf_file.delay(
+    process_pdf_file.apply_async(
+        kwargs={
+            "task_id": str(task_id),
+            "file_path": test_filepath,
+            "original_filename": test_filename,
+        },
         task_id=str(task_id),
-        file_path=test_filepath,
-        original_filename=test_filename
     )
     logger.info(f"测试任务 {task_id} 已成功分派给Celery Worker。")
 
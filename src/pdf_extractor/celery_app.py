@@ -1,44 +1,295 @@
 import logging
+import os
+import time
+
 from celery import Celery
-from celery.signals import after_setup_logger
+from celery.signals import (
+    after_setup_logger,
+    after_setup_task_logger,
+    before_task_publish,
+    celeryd_init,
+    task_postrun,
+    task_prerun,
+    worker_init,
+    worker_process_init,
+    worker_process_shutdown,
+)
+from celery.worker import state as worker_state
+from celery.worker.control import control_command
+from kombu import Exchange, Queue
 
 from .core.config import settings
-from .core.logger import JsonFormatter
+from .core.logger import bind_log_context, clear_log_context, install_queue_handler
+from .core import metrics
 from .db.session import DBTask
+from .services.routing import LANES, LANE_SHARD, LANE_STANDARD, queue_name
 
 # --- 1. 创建 Celery 实例 ---
 print(settings.rabbitmq.url)
 celery_app = Celery(
     "pdf_extractor",
     broker=settings.rabbitmq.url,
-    backend='rpc://',
+    # 分片解析使用 chord 汇总结果，rpc:// 后端不支持 chord，
+    # 因此使用 PostgreSQL 作为结果后端；其余任务默认不发布结果 (见 celery.ignore_results)
+    backend=f"db+{settings.postgres.url}",
     # 更新这里：指向新的任务模块路径
     include=["src.pdf_extractor.worker.tasks"],
     task_cls=DBTask,
 )
 
 # --- 2. Celery 配置 ---
+# 每个通道一个支持优先级的队列，通过同一个 direct 交换机按队列名路由
+task_exchange = Exchange(settings.rabbitmq.exchange_name, type="direct")
+task_queues = [
+    Queue(
+        queue_name(lane),
+        task_exchange,
+        routing_key=queue_name(lane),
+        queue_arguments={"x-max-priority": settings.routing.max_priority},
+    )
+    for lane in LANES
+]
+
 celery_app.conf.update(
-    task_track_started=True,
+    task_queues=task_queues,
+    task_default_queue=queue_name(LANE_STANDARD),
+    task_default_exchange=settings.rabbitmq.exchange_name,
+    task_default_routing_key=queue_name(LANE_STANDARD),
+    # 分片相关任务固定进入 shard 通道，大文档的扇出不会挤占交互通道
+    task_routes={
+        "parse_pdf_shard_task": {"queue": queue_name(LANE_SHARD)},
+        "merge_pdf_shards_task": {"queue": queue_name(LANE_SHARD)},
+        "fail_sharded_task": {"queue": queue_name(LANE_SHARD)},
+    },
+    # 使用 -Q 只消费一个通道时，由 configure_lane_worker 覆盖
+    worker_prefetch_multiplier=1,
+    # 任务状态由 Worker 直接写入 task 表，不再通过结果后端发布 STARTED 和返回值
+    task_ignore_result=settings.celery.ignore_results,
+    task_track_started=not settings.celery.ignore_results,
+    task_store_errors_even_if_ignored=False,
+    result_expires=settings.celery.result_expires_seconds,
+    # 执行完成后才确认；Worker 进程被杀死时拒绝消息，使其重新投递给其他 Worker
+    task_acks_late=settings.celery.acks_late,
+    task_reject_on_worker_lost=settings.celery.acks_late,
+    broker_heartbeat=settings.celery.broker_heartbeat_seconds,
     task_serializer="json",
     result_serializer="json",
     accept_content=["json"],
     timezone="UTC",
     enable_utc=True,
+    # 周期任务 (需要启动 celery beat)
+    beat_schedule={
+        "evict-result-cache": {
+            "task": "evict_result_cache_task",
+            "schedule": float(settings.cache.eviction_interval_seconds),
+        },
+        "purge-checkpoints": {
+            "task": "purge_checkpoints_task",
+            "schedule": float(settings.mineru.checkpoint_purge_interval_seconds),
+        },
+        "gc-storage": {
+            "task": "gc_storage_task",
+            "schedule": float(settings.storage.gc_interval_seconds),
+        },
+        "expire-stale-tasks": {
+            "task": "expire_stale_tasks_task",
+            "schedule": float(settings.deadlines.stale_check_interval_seconds),
+        },
+    },
 )
 
 
 # --- 3. 集成结构化日志 ---
 @after_setup_logger.connect
+@after_setup_task_logger.connect
 def setup_celery_logging(logger, **kwargs):
     """
-    在Celery设置好logger后，为其添加使用我们自定义JsonFormatter的处理器。
+    在Celery设置好logger后，改为使用与 API 相同的队列处理器 (JSON 格式、后台线程写出)。
+    """
+    install_queue_handler(logger)
+    logger.setLevel(settings.log_level.upper())
+
+
+@task_prerun.connect
+def bind_task_log_context(task_id=None, task=None, **kwargs):
+    """任务执行期间的日志都带上 task_id；业务层的任务ID在 kwargs 中。"""
+    task_kwargs = kwargs.get("kwargs") or {}
+    bind_log_context(celery_task_id=task_id, task_name=task.name, task_id=task_kwargs.get("task_id"))
+
+
+@task_postrun.connect
+def clear_task_log_context(**kwargs):
+    clear_log_context()
+
+
+# --- 4. 按通道调整 Worker 参数 ---
+@celeryd_init.connect
+def configure_lane_worker(conf=None, options=None, **kwargs):
+    """
+    Worker 通过 -Q 只消费一个通道时，使用该通道的预取数和并发数。
+    例如: celery -A src.pdf_extractor.celery_app:celery_app worker -Q pdf_parsing_queue.large
+    命令行显式指定的 --concurrency / --prefetch-multiplier 优先。
+    """
+    queues = (options or {}).get("queues") or []
+    if isinstance(queues, str):
+        queues = queues.split(",")
+    if len(queues) != 1:
+        return
+
+    lane_by_queue = {queue_name(lane): lane for lane in LANES}
+    lane = lane_by_queue.get(queues[0])
+    lane_settings = settings.routing.lanes.get(lane) if lane else None
+    if lane_settings is None:
+        return
+
+    if not options.get("prefetch_multiplier"):
+        conf.worker_prefetch_multiplier = lane_settings.prefetch_multiplier
+    if not options.get("concurrency"):
+        conf.worker_concurrency = lane_settings.concurrency
+    logging.getLogger(__name__).info(
+        f"Worker 使用通道 {lane} 的参数: prefetch={conf.worker_prefetch_multiplier}, "
+        f"concurrency={conf.worker_concurrency}"
+    )
+
+
+# --- 5. 预加载 MinerU 模型 ---
+@worker_process_init.connect
+def preload_mineru_models(**kwargs):
+    """
+    每个 Worker 子进程启动时加载一次模型并常驻，后续任务直接复用。
+    启用进程隔离时模型由解析子进程加载 (见 mineru_service.init_parse_process)，这里跳过。
+    """
+    if not (settings.mineru.enabled and settings.mineru.preload_models) or settings.isolation.enabled:
+        return
+
+    from mine_u.model_pool import model_registry
+
+    logger = logging.getLogger(__name__)
+    try:
+        model_registry.preload(
+            modes=settings.mineru.preload_modes,
+            lang=settings.mineru.preload_lang,
+            config_file=settings.mineru.model_config_file,
+        )
+        logger.info(f"MinerU 模型预加载完成: {model_registry.stats()}")
+    except Exception as e:
+        # 预加载失败不影响 Worker 启动，模型会在第一次解析时按需加载
+        logger.error(f"MinerU 模型预加载失败: {e}", exc_info=True)
+
+
+# --- 6. 批量推理调度器 ---
+@worker_init.connect
+@worker_process_init.connect
+def configure_inference_scheduler(**kwargs):
+    """
+    按配置启用进程内的批量推理调度器。
+    threads/solo 池只触发 worker_init，prefork 池的子进程触发 worker_process_init，
+    两者都注册；configure 是幂等的，调度线程在第一次提交时才在当前进程中启动。
+    """
+    if not (settings.mineru.enabled and settings.mineru.batch_inference_enabled):
+        return
+
+    from mine_u.batch_scheduler import inference_scheduler
+
+    inference_scheduler.configure(
+        enabled=True,
+        max_batch_pages=settings.mineru.batch_max_pages,
+        max_wait_seconds=settings.mineru.batch_max_wait_seconds,
+    )
+    logging.getLogger(__name__).info(
+        f"MinerU 批量推理已启用: max_batch_pages={settings.mineru.batch_max_pages}, "
+        f"max_wait={settings.mineru.batch_max_wait_seconds}s"
+    )
+
+
+# --- 7. 指标 ---
+# 发布消息时写入的消息头，用于计算排队等待时间
+ENQUEUED_AT_HEADER = "enqueued_at"
+
+
+@before_task_publish.connect
+def stamp_enqueue_time(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(ENQUEUED_AT_HEADER, time.time())
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    enqueued_at = getattr(task.request, ENQUEUED_AT_HEADER, None)
+    if enqueued_at:
+        metrics.observe_stage(metrics.STAGE_QUEUE_WAIT, max(time.time() - enqueued_at, 0.0))
+    metrics.TASKS_IN_FLIGHT.labels(task=task.name).inc()
+
+
+@task_postrun.connect
+def record_task_end(task_id=None, task=None, state=None, **kwargs):
+    metrics.TASKS_IN_FLIGHT.labels(task=task.name).dec()
+    metrics.TASKS_TOTAL.labels(task=task.name, outcome=(state or "UNKNOWN").lower()).inc()
+
+
+@worker_init.connect
+def start_metrics_exporter(**kwargs):
+    """
+    Worker 主进程在独立端口上暴露指标。
+    prefork 池需要配置 metrics.multiproc_dir，才能汇总各子进程的数据。
     """
-    for handler in logger.handlers:
-        logger.removeHandler(handler)
+    try:
+        metrics.start_exporter(settings.metrics.worker_port)
+    except OSError as e:
+        # 同一主机上运行多个 Worker 时端口可能已被占用，不影响任务执行
+        logging.getLogger(__name__).warning(f"指标导出端口 {settings.metrics.worker_port} 不可用: {e}")
+
 
-    handler = logging.StreamHandler()
-    handler.setFormatter(JsonFormatter())
-    logger.addHandler(handler)
+@worker_process_shutdown.connect
+def cleanup_process_metrics(pid=None, **kwargs):
+    metrics.mark_process_dead(pid or os.getpid())
 
-    logger.setLevel(settings.log_level.upper())
\ No newline at end of file
+
+@worker_process_shutdown.connect
+def stop_parse_process(**kwargs):
+    """Worker 子进程退出时一并退出其解析子进程。"""
+    if not (settings.mineru.enabled and settings.isolation.enabled):
+        return
+
+    from mine_u.isolation import parse_executor
+
+    parse_executor.shutdown()
+
+
+# --- 8. 取消任务 ---
+@control_command(args=[("task_id", str)], signature="<task_id>")
+def terminate_pdf_task(state, task_id):
+    """
+    远程控制命令：终止本 Worker 上属于该业务任务的所有执行 (主任务和各分片)。
+
+    业务任务ID保存在任务的 kwargs 中，分片的 Celery 任务ID与其无关，
+    因此按 kwargs 匹配，而不是按 Celery 任务ID revoke。
+    已预取但尚未开始执行的请求加入 revoked 集合，轮到时直接跳过。
+    """
+    logger = logging.getLogger(__name__)
+    terminated = []
+    for request in list(worker_state.reserved_requests):
+        if (request.kwargs or {}).get("task_id") != task_id:
+            continue
+        if request in worker_state.active_requests:
+            try:
+                request.terminate(state.consumer.pool, signal="SIGTERM")
+            except NotImplementedError:
+                # threads / solo 池不支持终止，依靠进度回调中的取消检查在当前段结束后停止
+                logger.warning(f"当前执行池无法终止任务 {request.id}，等待其在下一次进度上报时停止。")
+                continue
+        else:
+            worker_state.revoked.add(request.id)
+        terminated.append(request.id)
+    if terminated:
+        logger.info(f"已终止任务 {task_id} 的 {len(terminated)} 个执行: {terminated}")
+    return {"ok": terminated}
+
+
+def revoke_pdf_task(task_id: str) -> None:
+    """
+    取消一个业务任务：撤销仍在队列中的主任务消息 (Celery 任务ID与业务任务ID相同)，
+    并广播 terminate_pdf_task，让各 Worker 立即终止正在执行的主任务和分片。
+    """
+    celery_app.control.revoke(task_id)
+    celery_app.control.broadcast("terminate_pdf_task", arguments={"task_id": task_id})
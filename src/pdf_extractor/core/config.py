@@ -1,6 +1,6 @@
 from pydantic import BaseModel, PostgresDsn, AmqpDsn, Field, computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 # --- 嵌套配置模型 ---
@@ -12,6 +12,14 @@ class PostgresSettings(BaseModel):
     port: int = 5432
     db: str = "pdf_parser_db"
 
+    # 同步连接池 (Celery Worker 使用)
+    # Worker 只在写入状态/进度的短事务期间借用连接，连接数与任务并发数无关
+    pool_size: int = 5
+    max_overflow: int = 10
+    # 异步连接池 (FastAPI 使用)，单个事件循环即可复用少量连接处理大量并发请求
+    async_pool_size: int = 10
+    async_max_overflow: int = 10
+
     # 使用 @computed_field 派生出最终的 DSN
     # 它会被 Pydantic 验证和缓存，行为更像一个真正的字段
     @computed_field
@@ -20,6 +28,12 @@ class PostgresSettings(BaseModel):
         """生成并验证数据库连接 DSN"""
         return f"postgresql+psycopg://{self.user}:{self.password}@{self.server}:{self.port}/{self.db}"
 
+    @computed_field
+    @property
+    def libpq_url(self) -> str:
+        """直接使用 psycopg 连接时的 DSN (不带 SQLAlchemy 方言前缀)"""
+        return f"postgresql://{self.user}:{self.password}@{self.server}:{self.port}/{self.db}"
+
 
 class RabbitMQSettings(BaseModel):
     """RabbitMQ 配置"""
@@ -38,6 +52,280 @@ class RabbitMQSettings(BaseModel):
         return f"amqp://{self.user}:{self.password}@{self.host}:{self.port}{self.vhost}"
 
 
+class UploadSettings(BaseModel):
+    """文件上传配置"""
+    # 单个 PDF 允许的最大字节数，超过后立即中断接收
+    max_size_bytes: int = 512 * 1024 * 1024
+    # 落盘时每次读取/写入的块大小，决定了单个上传的内存峰值
+    chunk_size_bytes: int = 1024 * 1024
+    # multipart 报文头、边界等额外开销的余量
+    multipart_overhead_bytes: int = 64 * 1024
+    # 批量上传单次请求允许的最大文件数和总字节数
+    max_batch_files: int = 500
+    max_batch_size_bytes: int = 8 * 1024 * 1024 * 1024
+    # 临时文件目录，为空时使用系统默认临时目录
+    tmp_dir: Optional[str] = None
+
+
+class StorageSettings(BaseModel):
+    """
+    上传文件的共享存储配置。
+
+    API 收到的文件按内容摘要写入共享存储，Worker 解析前再取回本地，
+    API 与 Worker 不需要共享文件系统。local 后端的 local_root 需要是所有节点都能访问的目录
+    (单机部署或挂载的共享卷)；多机部署使用 s3 后端 (AWS S3、MinIO 等兼容服务，需要安装 boto3)。
+    """
+    backend: str = "local"
+    local_root: str = "/tmp/pdf_extractor/blobs"
+    s3_bucket: str = "pdf-extractor"
+    # 对象键前缀，多个环境共用一个桶时区分
+    s3_prefix: str = ""
+    # 兼容服务的地址，例如本地 MinIO: http://localhost:9000；为空时使用 AWS
+    s3_endpoint_url: Optional[str] = None
+    s3_region: Optional[str] = None
+    # 为空时使用 boto3 的默认凭据链 (环境变量、实例角色等)
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    # 流式上传时每个分段的大小，S3 要求除最后一段外不小于 5MB
+    s3_part_size_bytes: int = 8 * 1024 * 1024
+    # Worker 从 s3 取回文件时的本地临时目录，为空时使用系统默认临时目录
+    worker_tmp_dir: Optional[str] = None
+    # 超过该时间、且不被执行中或结束不满该时长的任务引用的上传文件由周期任务删除
+    upload_ttl_seconds: int = 2 * 24 * 3600
+    # MinerU 输出 (共享存储 outputs/ 下的中间 json 和图片) 的保留时间
+    output_ttl_seconds: int = 2 * 24 * 3600
+    gc_interval_seconds: int = 3600
+
+
+class CacheSettings(BaseModel):
+    """内容寻址结果缓存配置"""
+    enabled: bool = True
+    # 解析器版本，升级解析逻辑后修改此值即可使旧缓存失效
+    parser_version: str = "1.0.0"
+    # 缓存条目的有效期
+    ttl_seconds: int = 7 * 24 * 3600
+    # 数据库中保留的最大条目数，超出部分按创建时间淘汰
+    max_entries: int = 100_000
+    # 进程内 LRU 的容量
+    lru_size: int = 1024
+    # 周期性淘汰任务的执行间隔
+    eviction_interval_seconds: int = 3600
+
+
+class MinerUSettings(BaseModel):
+    """MinerU 解析配置"""
+    # 为 True 时 Worker 使用 MinerU 流水线解析文档
+    # 需要 Worker 环境中安装 magic-pdf，并且 src 目录位于 PYTHONPATH 中
+    enabled: bool = False
+    # 解析时的本地输出目录，每个任务写入其下以任务ID命名的子目录；
+    # 解析完成后输出上传到共享存储 (outputs/<任务ID>/)，本地目录随即删除
+    output_dir: str = "/tmp/pdf_extractor/mineru"
+    # 页数达到该值时才启用分片并行解析
+    shard_min_pages: int = 40
+    # 期望的分片数量，通常与 Worker 池的总并发数一致
+    shard_target_count: int = 16
+    # 单个分片的页数上下限
+    shard_min_size: int = 10
+    shard_max_size: int = 50
+    # Worker 子进程启动时预加载模型，避免第一个任务承担冷启动耗时
+    preload_models: bool = False
+    preload_modes: List[str] = ["ocr", "txt"]
+    preload_lang: str = "ch"
+    # magic-pdf.json 的路径，为空时使用 download_models_hf.py 写入的 ~/magic-pdf.json
+    model_config_file: Optional[str] = None
+    # 批量推理：把同一进程内并发提交的页面合为一批送入模型
+    # 跨任务合批需要 Worker 以 --pool threads 运行，使多个任务共享同一进程内的模型
+    batch_inference_enabled: bool = False
+    batch_max_pages: int = 64
+    # 合批的最长等待时间，即批量推理给单个文档带来的最大额外延迟
+    batch_max_wait_seconds: float = 0.2
+    # 检查点：每解析完一段页面就保存该段的 middle json 和图片，
+    # Worker 重启或消息重新投递后跳过已完成的段。检查点按文档摘要和任务ID区分，目录需要在 Worker 重启后仍然保留，
+    # 多台机器处理同一文档的分片时应使用共享存储
+    checkpoint_enabled: bool = True
+    checkpoint_dir: str = "/tmp/pdf_extractor/checkpoints"
+    # 每段的最大页数，越小重启时损失越少，但推理批次也越小
+    checkpoint_pages: int = 20
+    # 超过该时间未更新的检查点 (通常来自最终失败的任务) 由周期任务删除
+    checkpoint_ttl_seconds: int = 3 * 24 * 3600
+    checkpoint_purge_interval_seconds: int = 3600
+
+
+class TableSettings(BaseModel):
+    """基于文本层的原生表格提取配置"""
+    # 为 True 时，有可用文本层的文档直接使用原生引擎提取表格，不经过 MinerU
+    native_enabled: bool = True
+    # 抽样页面中带有文本层的比例达到该值时，认为文本层可用
+    min_text_ratio: float = 0.8
+    # 坐标吸附容差 (pt)
+    snap_tolerance: float = 3.0
+    # 表格至少需要的行列数
+    min_rows: int = 2
+    min_cols: int = 2
+    # 无框线表格至少需要的连续行数
+    text_min_rows: int = 3
+    # 单页线段数超过该值 (例如矢量图、地图) 时跳过框线表格检测
+    max_segments_per_page: int = 5000
+
+
+class HeadingSettings(BaseModel):
+    """基于字体统计的标题检测配置 (不依赖模型)"""
+    # 只提取标题的任务中，置信度达到该值时直接返回检测结果，否则按文本层交给原生引擎或 MinerU 完整解析
+    min_confidence: float = 0.6
+    # 字号不小于 正文字号 × 该值 的行视为标题候选
+    size_ratio: float = 1.15
+    # 字号聚类的容差 (pt)
+    size_tolerance: float = 0.5
+    max_levels: int = 4
+    max_title_chars: int = 120
+    # 出现在超过该比例页面上的相同文字视为页眉页脚
+    repeat_page_ratio: float = 0.3
+
+
+class EventsSettings(BaseModel):
+    """任务状态推送配置"""
+    # PostgreSQL LISTEN/NOTIFY 使用的频道
+    channel: str = "task_status"
+    # SSE 保活注释的发送间隔
+    keepalive_seconds: int = 15
+    # 监听连接断开后的重连间隔
+    reconnect_delay_seconds: float = 2.0
+    # 同一任务两次进度写入的最小间隔，期间的进度增量在 Worker 内存中合并
+    progress_min_interval_seconds: float = 1.0
+
+
+class ResultStoreSettings(BaseModel):
+    """任务结果存储配置"""
+    # 优先使用的压缩格式；未安装 zstandard 时自动回退到 gzip
+    codec: str = "zstd"
+    zstd_level: int = 3
+    gzip_level: int = 6
+
+
+class LaneSettings(BaseModel):
+    """单个队列通道的 Worker 参数"""
+    # 每个 Worker 进程预取的消息数，长任务通道应为 1
+    prefetch_multiplier: int = 1
+    # 只消费该通道的 Worker 默认并发数
+    concurrency: int = 2
+
+
+class RoutingSettings(BaseModel):
+    """按文档大小路由到不同队列的配置"""
+    enabled: bool = True
+    # 扫描件需要 OCR，每页的代价按该倍数折算
+    scanned_page_weight: int = 4
+    # 折算页数不超过该值且文件不超过 interactive_max_bytes 时进入交互通道
+    interactive_max_cost: int = 20
+    interactive_max_bytes: int = 20 * 1024 * 1024
+    # 折算页数达到该值时进入大文档通道
+    large_min_cost: int = 400
+    # RabbitMQ 优先级上限 (x-max-priority)，同一通道内小文档优先
+    max_priority: int = 9
+    # 每多少折算页优先级降低一级
+    priority_step_cost: int = 50
+    # 各通道的 Worker 参数，键为通道后缀
+    lanes: Dict[str, LaneSettings] = {
+        "interactive": LaneSettings(prefetch_multiplier=4, concurrency=4),
+        "standard": LaneSettings(prefetch_multiplier=1, concurrency=4),
+        "large": LaneSettings(prefetch_multiplier=1, concurrency=2),
+        "batch": LaneSettings(prefetch_multiplier=1, concurrency=4),
+        "shard": LaneSettings(prefetch_multiplier=1, concurrency=4),
+    }
+
+
+class CelerySettings(BaseModel):
+    """Celery 任务投递与结果配置"""
+    # 为 True 时关闭任务结果发布，任务状态和结果只以 PostgreSQL 中的 task/task_result 为准
+    # (分片子任务例外：chord 需要结果后端汇总分片结果)
+    ignore_results: bool = True
+    # 任务执行完成后才确认消息，Worker 崩溃时消息会被重新投递
+    acks_late: bool = True
+    # 消息在任务执行期间一直处于未确认状态。RabbitMQ 的 consumer_timeout (默认 30 分钟) 到期时会关闭通道
+    # 并重新投递消息，因此服务端需要把它设置为大于最长的硬时限 (max_pdf_parse_time_seconds + hard_grace_seconds)，
+    # 并为预取后排队等待的消息留出余量，见 docker-compose.yml 中 rabbitmq 服务的 RABBITMQ_CONSUMER_TIMEOUT_MS
+    # 结果后端中残留记录 (分片结果) 的保留时间
+    result_expires_seconds: int = 24 * 3600
+    broker_heartbeat_seconds: int = 60
+
+
+class DeadlineSettings(BaseModel):
+    """
+    解析时限配置。
+
+    每个任务的软时限 = base_seconds + per_page_seconds × 折算页数 (扫描页按 scanned_page_weight 计)，
+    上限为 max_pdf_parse_time_seconds；硬时限在软时限之后再留 hard_grace_seconds。
+    软时限到达时任务保存已完成部分的结果并以 TIMEOUT 结束，硬时限到达时 Worker 子进程被强制终止。
+    时限只对 prefork 池生效，threads / solo 池会忽略。
+    """
+    enabled: bool = True
+    base_seconds: int = 60
+    per_page_seconds: float = 3.0
+    hard_grace_seconds: int = 30
+    # 超过该时间没有任何状态/进度更新的 STARTED 任务 (例如被硬时限终止) 由周期任务标记为失败
+    stale_after_seconds: int = 2 * 3600
+    # 已拆分为分片的任务 (PROCESSING) 的停滞判定时间；分片排队期间父任务不会有更新，需要比上面更长
+    sharded_stale_after_seconds: int = 12 * 3600
+    stale_check_interval_seconds: int = 300
+
+
+class IsolationSettings(BaseModel):
+    """
+    解析进程隔离配置。
+
+    启用后 MinerU 解析 (包括各分片) 在 Worker 进程之外的常驻子进程中执行，
+    原生库的内存碎片和泄漏只累积在子进程中，超出上限时只终止该子进程，
+    当前文档缩小页码范围重试，Worker 进程和它预取的其他任务不受影响。
+    模型在子进程中加载，prefork 池下每个池进程各有一个解析子进程。
+    """
+    enabled: bool = False
+    # 子进程 RSS 上限 (MB)，由 Worker 进程定期检查，超过时立即终止子进程；0 表示不限制
+    max_rss_mb: int = 8192
+    # 可写的 cgroup v2 目录，设置后为每个子进程创建子 cgroup 并把 memory.max 设为 max_rss_mb，由内核强制执行
+    cgroup_parent: Optional[str] = None
+    # 子进程地址空间上限 (RLIMIT_AS，MB)；torch/CUDA 会预留大量虚拟内存，默认不启用
+    address_space_mb: int = 0
+    # 子进程 RSS 比第一次解析后的基线增长超过该值 (MB) 时回收子进程；0 表示不回收
+    recycle_growth_mb: int = 1024
+    poll_interval_seconds: float = 0.5
+    # 超出内存上限后把页码范围对半拆分重试，范围不超过该页数时不再拆分，文档直接失败
+    min_split_pages: int = 5
+    # 子进程启动方式，模型库 (CUDA) 不支持 fork 后使用，默认 spawn
+    start_method: str = "spawn"
+
+
+class LogSettings(BaseModel):
+    """日志输出配置"""
+    # 日志队列的最大长度，队列满时丢弃新日志而不是阻塞调用方；0 表示不限制
+    queue_size: int = 10000
+    # 按 logger 名称前缀限流 (每秒最多条数)，只作用于 WARNING 以下的日志
+    # 例如 {"pdf_extractor.services.status_broker": 5}
+    rate_limits: Dict[str, float] = {}
+    # 按 logger 名称前缀抽样 (保留比例)，只作用于 WARNING 以下的日志
+    sample_rates: Dict[str, float] = {}
+
+
+class ProfilingSettings(BaseModel):
+    """按任务开启的性能分析配置"""
+    # 未显式开启的任务按该比例抽样分析，0 表示只分析显式开启的任务
+    sample_rate: float = 0.0
+    # 报告中保留的函数数和内存分配热点数
+    top_n: int = 50
+    # tracemalloc 为每次分配保留的调用栈深度
+    tracemalloc_frames: int = 10
+
+
+class MetricsSettings(BaseModel):
+    """Prometheus 指标配置 (需要安装 prometheus_client，未安装时指标为空操作)"""
+    enabled: bool = True
+    namespace: str = "pdf_extractor"
+    # Celery Worker 在该端口上暴露 /metrics
+    worker_port: int = 9808
+    # 多进程模式的数据目录；uvicorn 多 worker 或 Celery prefork 池时必须设置，
+    # 且每次部署启动前需要清空
+    multiproc_dir: Optional[str] = None
+
+
 # --- 主配置 ---
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -56,6 +344,21 @@ class Settings(BaseSettings):
     # 嵌套配置
     postgres: PostgresSettings = PostgresSettings()
     rabbitmq: RabbitMQSettings = RabbitMQSettings()
+    upload: UploadSettings = UploadSettings()
+    storage: StorageSettings = StorageSettings()
+    cache: CacheSettings = CacheSettings()
+    mineru: MinerUSettings = MinerUSettings()
+    tables: TableSettings = TableSettings()
+    headings: HeadingSettings = HeadingSettings()
+    events: EventsSettings = EventsSettings()
+    result_store: ResultStoreSettings = ResultStoreSettings()
+    routing: RoutingSettings = RoutingSettings()
+    celery: CelerySettings = CelerySettings()
+    metrics: MetricsSettings = MetricsSettings()
+    profiling: ProfilingSettings = ProfilingSettings()
+    log: LogSettings = LogSettings()
+    deadlines: DeadlineSettings = DeadlineSettings()
+    isolation: IsolationSettings = IsolationSettings()
 
     # Alembic 特殊处理
     alembic_database_url: Optional[PostgresDsn] = None
@@ -1 +1,45 @@
- 
\ No newline at end of file
+class PDFExtractorError(Exception):
+    """
+    服务内部自定义异常的基类。
+    """
+
+
+class UploadTooLargeError(PDFExtractorError):
+    """
+    上传的文件超过了配置允许的最大字节数。
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"上传的文件超过了允许的最大大小 ({max_size} 字节)。")
+
+
+class TaskCancelledError(PDFExtractorError):
+    """
+    任务已被取消 (或已被其他进程写入终态)，Worker 应尽快停止解析。
+    """
+
+    def __init__(self, task_id: str):
+        self.task_id = task_id
+        super().__init__(f"任务 {task_id} 已被取消。")
+
+
+class ParseMemoryError(PDFExtractorError):
+    """
+    解析超出内存上限，且页码范围已无法继续拆分重试。
+    """
+
+    def __init__(self, page_start: int, page_end: int, detail: str):
+        self.page_start = page_start
+        self.page_end = page_end
+        super().__init__(f"解析第 {page_start + 1}-{page_end + 1} 页时超出内存上限: {detail}")
+
+
+class BlobNotFoundError(PDFExtractorError):
+    """
+    共享存储中不存在指定的对象 (可能已被生命周期清理删除)。
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"存储对象不存在: {key}")
@@ -1,16 +1,74 @@
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import random
 import sys
 import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from typing import Union
+from typing import Any, Dict, Iterator, Optional, Union
 
 from ..core.config import settings
 
+try:
+    import orjson
+except ImportError:  # orjson 为可选依赖，未安装时使用标准库 json
+    orjson = None
+
+
+# --- 0. 日志上下文 ---
+# 通过 contextvars 传递，在 asyncio 任务和线程之间互不干扰。
+# 默认值为 None 而不是 {}：可变的默认值会被所有上下文共享
+_log_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("log_context", default=None)
+
+# LogRecord 自带的属性，其余属性 (extra=... 和上下文字段) 都会输出到 JSON 中
+_RESERVED_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+def _current_context() -> Dict[str, Any]:
+    return _log_context.get() or {}
+
+
+@contextmanager
+def log_context(**fields: Any) -> Iterator[None]:
+    """
+    在代码块内为所有日志附加上下文字段，例如:
+        with log_context(task_id=task_id, stage="inference"):
+            logger.info("开始推理")
+    """
+    token = _log_context.set({**_current_context(), **fields})
+    try:
+        yield
+    finally:
+        _log_context.reset(token)
+
+
+def bind_log_context(**fields: Any) -> None:
+    """在当前上下文中持续附加字段，直到 clear_log_context。适用于 Celery 任务的 prerun/postrun。"""
+    _log_context.set({**_current_context(), **fields})
+
+
+def clear_log_context() -> None:
+    _log_context.set(None)
+
+
+def _dumps(obj: Dict[str, Any]) -> str:
+    if orjson is not None:
+        # orjson 无法序列化的对象回退为 str
+        return orjson.dumps(obj, default=str).decode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, default=str)
+
 
 # --- 1. 自定义 JSON 日志格式化器 ---
 class JsonFormatter(logging.Formatter):
     """
     自定义日志格式化器，将日志记录输出为JSON格式。
+    上下文字段 (task_id、stage 等) 和 extra 传入的字段 (例如 duration) 一并输出。
     """
 
     def format(self, record: logging.LogRecord) -> str:
@@ -21,30 +79,141 @@ class JsonFormatter(logging.Formatter):
             "name": record.name,
             "message": record.getMessage(),
         }
-        # 如果有异常信息，则添加它
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                log_record[key] = value
+        # 如果有异常信息，则添加它 (经过队列时异常已在调用线程中格式化为 exc_text)
         if record.exc_info:
             log_record['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_record['exc_info'] = record.exc_text
 
         # 将字典序列化为JSON字符串
-        return json.dumps(log_record, ensure_ascii=False)
+        return _dumps(log_record)
 
 
-# --- 2. 日志配置函数 ---
-def setup_logging():
+# --- 2. 过滤器：上下文字段、限流与抽样 ---
+class ContextFilter(logging.Filter):
+    """在调用线程中把当前上下文字段写入日志记录 (进入队列之后就无法再读取 contextvars)。"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _current_context().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
     """
-    配置并返回一个日志记录器实例。
-    - 在开发环境中，使用易于阅读的控制台输出。
-    - 在生产环境中，使用JSON格式输出，便于日志聚合系统处理。
+    按 logger 名称限流和抽样，只作用于 WARNING 以下的日志，警告和错误始终保留。
+
+    - rate_limits: {logger 名称前缀: 每秒最多条数}，令牌桶实现，允许 1 秒的突发
+    - sample_rates: {logger 名称前缀: 保留比例}
+    被丢弃的条数会以 dropped 字段附加在该 logger 下一条输出的日志上。
     """
-    # 获取根日志记录器
-    logger = logging.getLogger()
-    logger.setLevel(settings.log_level.upper())
 
-    # --- 移除所有已存在的处理器，避免重复记录 ---
-    if logger.hasHandlers():
-        logger.handlers.clear()
+    def __init__(self, rate_limits: Dict[str, float], sample_rates: Dict[str, float]):
+        super().__init__()
+        self.rate_limits = rate_limits
+        self.sample_rates = sample_rates
+        self._buckets: Dict[str, list] = {}
+        self._dropped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _match(name: str, table: Dict[str, float]) -> Optional[str]:
+        # 最长前缀优先
+        matches = [prefix for prefix in table if name == prefix or name.startswith(prefix + ".")]
+        return max(matches, key=len) if matches else None
+
+    def _allow(self, name: str) -> bool:
+        prefix = self._match(name, self.sample_rates)
+        if prefix is not None and random.random() >= self.sample_rates[prefix]:
+            return False
+        prefix = self._match(name, self.rate_limits)
+        if prefix is None:
+            return True
+        rate = self.rate_limits[prefix]
+        now = time.monotonic()
+        with self._lock:
+            tokens, last = self._buckets.get(prefix, (rate, now))
+            tokens = min(rate, tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            self._buckets[prefix] = [tokens - 1 if allowed else tokens, now]
+        return allowed
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if not self._allow(record.name):
+            with self._lock:
+                self._dropped[record.name] = self._dropped.get(record.name, 0) + 1
+            return False
+        with self._lock:
+            dropped = self._dropped.pop(record.name, 0)
+        if dropped:
+            record.dropped = dropped
+        return True
+
 
-    # --- 创建并配置控制台处理器 ---
+# --- 3. 非阻塞的队列处理器 ---
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    调用线程只把日志记录放入队列，格式化和写 stdout 由后台 QueueListener 线程完成，
+    stdout/管道消费慢时不会阻塞请求处理或任务执行。
+
+    - 队列满时丢弃并计数，而不是阻塞调用方。
+    - fork 之后 (Celery prefork / uvicorn 多 worker) 后台线程不会被继承，
+      子进程第一次写日志时重新创建队列和监听线程。
+    """
+
+    def __init__(self, target: logging.Handler, maxsize: int):
+        self._target = target
+        self._maxsize = maxsize
+        self._pid: Optional[int] = None
+        self._listener: Optional[logging.handlers.QueueListener] = None
+        self.overflowed = 0
+        super().__init__(queue.Queue(maxsize))
+        self._start_listener()
+
+    def _start_listener(self) -> None:
+        self.queue = queue.Queue(self._maxsize)
+        self._listener = logging.handlers.QueueListener(self.queue, self._target, respect_handler_level=True)
+        self._listener.start()
+        self._pid = os.getpid()
+
+    def stop(self) -> None:
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener = None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        在调用线程中固定消息内容：合并 msg 和 args、把异常格式化为文本，
+        保留其余属性 (上下文字段、extra) 交给目标处理器的格式化器。
+        """
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if self._pid != os.getpid():
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.overflowed += 1
+
+
+# --- 4. 日志配置函数 ---
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def _build_queue_handler() -> NonBlockingQueueHandler:
     # 在非生产环境，使用更易读的格式
     if settings.log_level.upper() == "DEBUG":
         console_formatter = logging.Formatter(
@@ -55,12 +224,48 @@ def setup_logging():
 
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+
+    handler = NonBlockingQueueHandler(console_handler, settings.log.queue_size)
+    handler.addFilter(ContextFilter())
+    if settings.log.rate_limits or settings.log.sample_rates:
+        handler.addFilter(RateLimitFilter(settings.log.rate_limits, settings.log.sample_rates))
+    atexit.register(handler.stop)
+    return handler
+
+
+def get_queue_handler() -> NonBlockingQueueHandler:
+    """进程内共享的队列处理器，API 和 Celery 的日志都经过它输出。"""
+    global _queue_handler
+    if _queue_handler is None:
+        _queue_handler = _build_queue_handler()
+    return _queue_handler
+
+
+def install_queue_handler(target: logging.Logger) -> None:
+    """移除 target 上已有的处理器，改为使用共享的队列处理器。"""
+    for handler in list(target.handlers):
+        target.removeHandler(handler)
+    target.addHandler(get_queue_handler())
+
+
+def setup_logging():
+    """
+    配置并返回一个日志记录器实例。
+    - 在开发环境中，使用易于阅读的控制台输出。
+    - 在生产环境中，使用JSON格式输出，便于日志聚合系统处理。
+    - 所有输出都经过队列，由后台线程写入 stdout。
+    """
+    # 获取根日志记录器
+    logger = logging.getLogger()
+    logger.setLevel(settings.log_level.upper())
+
+    # --- 移除所有已存在的处理器，避免重复记录 ---
+    install_queue_handler(logger)
 
     return logger
 
 
-# --- 3. 初始化并导出日志记录器 ---
+# --- 5. 初始化并导出日志记录器 ---
 # 在模块加载时，立即配置好日志系统
 logger = setup_logging()
 
@@ -73,4 +278,8 @@ logger = setup_logging()
 # try:
 #     1 / 0
 # except ZeroDivisionError:
-#     logger.error("计算出错", exc_info=True)
\ No newline at end of file
+#     logger.error("计算出错", exc_info=True)
+#
+# 附加上下文字段:
+# with log_context(task_id=task_id, stage="inference"):
+#     logger.info("开始推理", extra={"duration": 1.25})
@@ -0,0 +1,156 @@
+# src/pdf_extractor/core/metrics.py
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Tuple
+
+from .config import settings
+from .logger import log_context, logger
+
+# 多进程模式 (uvicorn 多 worker / Celery prefork) 需要在导入 prometheus_client 之前设置目录
+if settings.metrics.multiproc_dir:
+    os.makedirs(settings.metrics.multiproc_dir, exist_ok=True)
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", settings.metrics.multiproc_dir)
+
+try:
+    import prometheus_client
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram
+except ImportError:  # prometheus_client 为可选依赖，未安装时所有指标都是空操作
+    prometheus_client = None
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _NoopMetric:
+    """未安装 prometheus_client 或关闭指标时使用的占位对象。"""
+
+    def labels(self, *args: Any, **kwargs: Any) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+_ENABLED = prometheus_client is not None and settings.metrics.enabled
+_NAMESPACE = settings.metrics.namespace
+
+# 覆盖从毫秒级的数据库写入到小时级的大文档解析
+_STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+_PAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+
+def _histogram(name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=_STAGE_BUCKETS):
+    if not _ENABLED:
+        return _NoopMetric()
+    return Histogram(name, documentation, labelnames, namespace=_NAMESPACE, buckets=buckets)
+
+
+def _counter(name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+    if not _ENABLED:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames, namespace=_NAMESPACE)
+
+
+def _gauge(name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+    if not _ENABLED:
+        return _NoopMetric()
+    # 多进程模式下对存活进程的值求和
+    return Gauge(name, documentation, labelnames, namespace=_NAMESPACE, multiprocess_mode="livesum")
+
+
+# --- 指标定义 ---
+# 流水线各阶段耗时，stage 取值见 STAGE_* 常量
+STAGE_SECONDS = _histogram("stage_seconds", "流水线各阶段耗时 (秒)", ("stage",))
+# 每页解析耗时，engine 为 native / mineru
+PARSE_SECONDS_PER_PAGE = _histogram(
+    "parse_seconds_per_page", "每页解析耗时 (秒)", ("engine",), buckets=_PAGE_BUCKETS
+)
+TASKS_TOTAL = _counter("tasks_total", "Celery 任务执行次数", ("task", "outcome"))
+TASKS_IN_FLIGHT = _gauge("tasks_in_flight", "正在执行的 Celery 任务数", ("task",))
+UPLOADS_TOTAL = _counter("uploads_total", "上传请求数", ("outcome",))
+UPLOAD_BYTES_TOTAL = _counter("upload_bytes_total", "已接收的上传字节数")
+DB_POOL_CHECKED_OUT = _gauge("db_pool_checked_out", "已借出的数据库连接数", ("engine",))
+
+STAGE_UPLOAD_WRITE = "upload_write"
+STAGE_ENQUEUE = "enqueue"
+STAGE_QUEUE_WAIT = "queue_wait"
+STAGE_CLASSIFY = "classify"
+STAGE_INFERENCE = "inference"
+STAGE_PIPELINE = "pipeline"
+STAGE_NATIVE_PARSE = "native_parse"
+STAGE_TITLES = "titles"
+STAGE_MERGE = "merge"
+STAGE_DB_WRITE = "db_write"
+
+
+def observe_stage(stage: str, seconds: float) -> None:
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """记录代码块的耗时 (异常时也会记录)，代码块内的日志带有 stage 字段。"""
+    start = time.perf_counter()
+    try:
+        with log_context(stage=stage):
+            yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def instrument_pool(engine: Any, name: str) -> None:
+    """
+    通过连接池事件维护已借出连接数。
+    不使用回调式 Gauge，是因为多进程模式下只能汇总各进程写入的值。
+    """
+    if not _ENABLED:
+        return
+    from sqlalchemy import event
+
+    gauge = DB_POOL_CHECKED_OUT.labels(engine=name)
+    event.listen(engine, "checkout", lambda *args: gauge.inc())
+    event.listen(engine, "checkin", lambda *args: gauge.dec())
+
+
+def _registry() -> Optional[Any]:
+    """多进程模式下每次抓取时汇总所有进程的数据，否则使用默认注册表。"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return prometheus_client.REGISTRY
+
+
+def render_latest() -> bytes:
+    """以 Prometheus 文本格式输出当前指标。"""
+    if not _ENABLED:
+        return b""
+    return prometheus_client.generate_latest(_registry())
+
+
+def start_exporter(port: int) -> None:
+    """在独立的 HTTP 端口上暴露指标，供 Celery Worker 使用。"""
+    if not _ENABLED:
+        logger.info("未安装 prometheus_client 或已关闭指标，跳过指标导出。")
+        return
+    prometheus_client.start_http_server(port, registry=_registry())
+    logger.info(f"指标已在端口 {port} 上导出。")
+
+
+def mark_process_dead(pid: int) -> None:
+    """多进程模式下子进程退出时清理其 livesum 类型的数据。"""
+    if _ENABLED and "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,65 @@
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class MaxBodySizeMiddleware:
+    """
+    限制请求体大小的 ASGI 中间件。
+
+    在 multipart 解析器把文件写入临时文件之前就生效：
+    1. 如果 Content-Length 已经超限，直接返回 413，不读取请求体。
+    2. 否则在接收过程中累计字节数，一旦超限立即中断接收。
+    """
+
+    def __init__(self, app: ASGIApp, max_body_size: int, path_limits: Optional[Dict[str, int]] = None):
+        self.app = app
+        self.max_body_size = max_body_size
+        # 针对特定路径的限制，优先于默认值
+        self.path_limits = path_limits or {}
+
+    def _limit_for(self, path: str) -> int:
+        return self.path_limits.get(path, self.max_body_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") not in ("POST", "PUT", "PATCH"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self._limit_for(scope.get("path", ""))
+
+        content_length = None
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    content_length = int(value)
+                except ValueError:
+                    pass
+                break
+
+        if content_length is not None and content_length > limit:
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": f"请求体超过了允许的最大大小 ({limit} 字节)。"},
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI 会原样抛出 HTTPException，而不是包装成 400
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"请求体超过了允许的最大大小 ({limit} 字节)。",
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -2,6 +2,8 @@ from typing import Any, Dict, Generic, List, Optional, Type, TypeVar, Union
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from pdf_extractor.db.models import Base
@@ -31,10 +33,17 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         return db.query(self.model).filter(self.model.id == id).first()
 
     def get_multi(
-            self, db: Session, *, skip: int = 0, limit: int = 100
+            self, db: Session, *, after: Optional[Any] = None, limit: int = 100
     ) -> List[ModelType]:
-        """获取多个对象，支持分页。"""
-        return db.query(self.model).order_by(self.model.id).offset(skip).limit(limit).all()
+        """
+        获取多个对象，使用基于主键的游标分页。
+
+        与 OFFSET 不同，翻页代价不随页数增长：传入上一页最后一个对象的 id 作为 after 即可。
+        """
+        query = db.query(self.model)
+        if after is not None:
+            query = query.filter(self.model.id > after)
+        return query.order_by(self.model.id).limit(limit).all()
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         """
@@ -82,4 +91,76 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         if obj:
             db.delete(obj)
             db.flush()  # 将删除操作加入事务
-        return obj
\ No newline at end of file
+        return obj
+
+
+class AsyncCRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    """
+    CRUDBase 的异步版本，配合 AsyncSession 在 FastAPI 端点中使用。
+
+    与同步版本一样，所有方法均不主动提交事务。
+
+    参数:
+      - `model`: 一个 SQLAlchemy 模型类
+    """
+
+    def __init__(self, model: Type[ModelType]):
+        self.model = model
+
+    async def get(self, db: AsyncSession, id: Any) -> Optional[ModelType]:
+        """通过 ID 获取单个对象。"""
+        return await db.get(self.model, id)
+
+    async def get_multi(
+            self, db: AsyncSession, *, after: Optional[Any] = None, limit: int = 100
+    ) -> List[ModelType]:
+        """获取多个对象，使用基于主键的游标分页。"""
+        stmt = select(self.model)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        result = await db.scalars(stmt.order_by(self.model.id).limit(limit))
+        return list(result.all())
+
+    async def create(self, db: AsyncSession, *, obj_in: CreateSchemaType) -> ModelType:
+        """
+        创建一个新对象，并将其添加到数据库会话中。
+        """
+        obj_in_data = jsonable_encoder(obj_in)
+        db_obj = self.model(**obj_in_data)
+        db.add(db_obj)
+        await db.flush()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def update(
+            self,
+            db: AsyncSession,
+            *,
+            db_obj: ModelType,
+            obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+    ) -> ModelType:
+        """
+        更新一个已存在的对象。
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.model_dump(exclude_unset=True)
+
+        for field, value in update_data.items():
+            setattr(db_obj, field, value)
+
+        db.add(db_obj)
+        await db.flush()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def remove(self, db: AsyncSession, *, id: Any) -> Optional[ModelType]:
+        """
+        删除一个对象。
+        """
+        obj = await db.get(self.model, id)
+        if obj:
+            await db.delete(obj)
+            await db.flush()
+        return obj
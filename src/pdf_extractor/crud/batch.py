@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import Select, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import models
+from .base import AsyncCRUDBase, CRUDBase
+
+
+def _item_rows(batch_id: UUID, items: List[Tuple[UUID, str]]) -> List[Dict[str, Any]]:
+    return [
+        {"batch_id": batch_id, "position": position, "task_id": task_id, "filename": filename}
+        for position, (task_id, filename) in enumerate(items)
+    ]
+
+
+def _status_counts_stmt(batch_id: UUID) -> Select:
+    return (
+        select(models.Task.status, func.count())
+        .select_from(models.TaskBatchItem)
+        .join(models.Task, models.Task.id == models.TaskBatchItem.task_id)
+        .where(models.TaskBatchItem.batch_id == batch_id)
+        .group_by(models.Task.status)
+    )
+
+
+class CRUDBatch(CRUDBase[models.TaskBatch, BaseModel, BaseModel]):
+    """
+    针对批量上传批次的 CRUD 操作。所有方法都不提交事务。
+    """
+
+    def create_with_items(
+            self, db: Session, *, items: List[Tuple[UUID, str]]
+    ) -> models.TaskBatch:
+        """
+        创建批次，并通过一条批量 INSERT 写入所有文件与任务的对应关系。
+
+        Args:
+            items: [(task_id, filename), ...]，顺序即文件在批次中的序号。
+        """
+        db_obj = models.TaskBatch(file_count=len(items))
+        db.add(db_obj)
+        db.flush()
+        if items:
+            db.execute(insert(models.TaskBatchItem), _item_rows(db_obj.id, items))
+        return db_obj
+
+    def get_status_counts(self, db: Session, *, batch_id: UUID) -> Dict[str, int]:
+        """
+        按任务状态聚合批次进度，一次 GROUP BY 查询完成。
+        """
+        return dict(db.execute(_status_counts_stmt(batch_id)).tuples().all())
+
+
+class AsyncCRUDBatch(AsyncCRUDBase[models.TaskBatch, BaseModel, BaseModel]):
+    """
+    CRUDBatch 的异步版本。
+    """
+
+    async def create_with_items(
+            self, db: AsyncSession, *, items: List[Tuple[UUID, str]]
+    ) -> models.TaskBatch:
+        db_obj = models.TaskBatch(file_count=len(items))
+        db.add(db_obj)
+        await db.flush()
+        if items:
+            await db.execute(insert(models.TaskBatchItem), _item_rows(db_obj.id, items))
+        return db_obj
+
+    async def get_status_counts(self, db: AsyncSession, *, batch_id: UUID) -> Dict[str, int]:
+        result = await db.execute(_status_counts_stmt(batch_id))
+        return dict(result.tuples().all())
+
+
+batch = CRUDBatch(models.TaskBatch)
+async_batch = AsyncCRUDBatch(models.TaskBatch)
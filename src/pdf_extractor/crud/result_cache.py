@@ -0,0 +1,114 @@
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy import Select, delete, func, select
+from sqlalchemy.dialects.postgresql import Insert, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..db import models
+from .base import AsyncCRUDBase, CRUDBase
+
+
+def _valid_entries_stmt(cache_keys: List[str], ttl_seconds: int) -> Select:
+    """
+    通过一次 JOIN 同时取出未过期的缓存条目和它指向的任务。
+    时间统一以数据库时钟为准，与 created_at 的 server_default 一致。
+    """
+    cutoff = func.now() - timedelta(seconds=ttl_seconds)
+    return (
+        select(models.ResultCacheEntry, models.Task)
+        .join(models.Task, models.Task.id == models.ResultCacheEntry.task_id)
+        .where(
+            models.ResultCacheEntry.cache_key.in_(cache_keys),
+            models.ResultCacheEntry.created_at > cutoff,
+        )
+    )
+
+
+def _upsert_stmt(entries: List[Dict[str, Any]]) -> Insert:
+    """登记缓存条目；键已存在时（例如旧任务失败或已过期）指向新任务。"""
+    stmt = insert(models.ResultCacheEntry).values(entries)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.ResultCacheEntry.cache_key],
+        set_={"task_id": stmt.excluded.task_id, "created_at": func.now()},
+    )
+
+
+class CRUDResultCache(CRUDBase[models.ResultCacheEntry, BaseModel, BaseModel]):
+    """
+    针对结果缓存索引表的 CRUD 操作。
+    与其他 CRUD 类一样，所有方法都不提交事务。
+    """
+
+    def get_with_task(
+            self, db: Session, *, cache_key: str, ttl_seconds: int
+    ) -> Optional[Tuple[models.ResultCacheEntry, models.Task]]:
+        rows = self.get_many_with_task(db, cache_keys=[cache_key], ttl_seconds=ttl_seconds)
+        return rows[0] if rows else None
+
+    def get_many_with_task(
+            self, db: Session, *, cache_keys: List[str], ttl_seconds: int
+    ) -> List[Tuple[models.ResultCacheEntry, models.Task]]:
+        """
+        一次查询取回所有命中且未过期的条目。
+        """
+        if not cache_keys:
+            return []
+        return [(row[0], row[1]) for row in db.execute(_valid_entries_stmt(cache_keys, ttl_seconds)).all()]
+
+    def upsert_many(self, db: Session, *, entries: List[Dict[str, Any]]) -> None:
+        """
+        通过一条 INSERT ... ON CONFLICT 批量登记缓存条目。
+        """
+        if entries:
+            db.execute(_upsert_stmt(entries))
+
+    def remove_by_key(self, db: Session, *, cache_key: str) -> None:
+        db.execute(delete(models.ResultCacheEntry).where(models.ResultCacheEntry.cache_key == cache_key))
+
+    def evict(self, db: Session, *, ttl_seconds: int, max_entries: int) -> int:
+        """
+        淘汰过期条目，并在条目数超过 max_entries 时删除最旧的部分。
+
+        Returns:
+            被删除的条目数量。
+        """
+        cutoff = func.now() - timedelta(seconds=ttl_seconds)
+        expired = db.execute(
+            delete(models.ResultCacheEntry).where(models.ResultCacheEntry.created_at <= cutoff)
+        ).rowcount
+
+        # 保留最新的 max_entries 条，其余按创建时间淘汰
+        keep = (
+            select(models.ResultCacheEntry.cache_key)
+            .order_by(models.ResultCacheEntry.created_at.desc())
+            .limit(max_entries)
+        )
+        overflow = db.execute(
+            delete(models.ResultCacheEntry).where(models.ResultCacheEntry.cache_key.not_in(keep))
+        ).rowcount
+        return (expired or 0) + (overflow or 0)
+
+
+class AsyncCRUDResultCache(AsyncCRUDBase[models.ResultCacheEntry, BaseModel, BaseModel]):
+    """
+    CRUDResultCache 的异步版本，供 FastAPI 端点使用。
+    """
+
+    async def get_many_with_task(
+            self, db: AsyncSession, *, cache_keys: List[str], ttl_seconds: int
+    ) -> List[Tuple[models.ResultCacheEntry, models.Task]]:
+        if not cache_keys:
+            return []
+        result = await db.execute(_valid_entries_stmt(cache_keys, ttl_seconds))
+        return [(row[0], row[1]) for row in result.all()]
+
+    async def upsert_many(self, db: AsyncSession, *, entries: List[Dict[str, Any]]) -> None:
+        if entries:
+            await db.execute(_upsert_stmt(entries))
+
+
+result_cache = CRUDResultCache(models.ResultCacheEntry)
+async_result_cache = AsyncCRUDResultCache(models.ResultCacheEntry)
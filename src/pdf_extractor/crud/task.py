@@ -1,13 +1,19 @@
-from typing import Any, Dict, List, Optional, Union
+import base64
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
 from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
+from sqlalchemy import and_, func, insert, or_, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
+from ..core.config import settings
 from ..db import models
 from ..schemas import task as task_schema
-from .base import CRUDBase  # 假设 CRUDBase 在 base.py 中
+from .base import AsyncCRUDBase, CRUDBase  # 假设 CRUDBase 在 base.py 中
 
 
 class CRUDTask(CRUDBase[models.Task, task_schema.TaskCreateResponse, task_schema.TaskUpdate]):
@@ -16,25 +22,44 @@ class CRUDTask(CRUDBase[models.Task, task_schema.TaskCreateResponse, task_schema
     所有方法都不再包含 db.commit()。
     """
 
-    def create(self, db: Session, *, obj_in: task_schema.TaskCreate) -> models.Task:
+    def create(self, db: Session, *, obj_in: task_schema.TaskCreate,
+               file_key: Optional[str] = None) -> models.Task:
         """
         创建一个新任务，但不提交事务。
 
         Args:
             db: SQLAlchemy Session.
             obj_in: 用于创建任务的数据模型.
+            file_key: 原始文件在共享存储中的键.
 
         Returns:
             新创建的 Task 对象 (尚未持久化提交).
         """
         db_obj = models.Task(
             filename=obj_in.filename,
+            file_key=file_key,
         )
         db.add(db_obj)
         db.flush()  # 将更改发送到数据库事务中，以便获取 ID 等默认值
         db.refresh(db_obj)
         return db_obj
 
+    def create_many(self, db: Session, *, filenames: List[str],
+                    file_keys: Optional[List[Optional[str]]] = None) -> List[UUID]:
+        """
+        通过一条 INSERT ... RETURNING 批量创建任务，但不提交事务。
+
+        Args:
+            file_keys: 与 filenames 一一对应的共享存储键。
+
+        Returns:
+            与 filenames 顺序一致的任务ID列表。
+        """
+        if not filenames:
+            return []
+        rows = _task_rows(filenames, file_keys)
+        return list(db.scalars(insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True), rows))
+
     def update(
             self,
             db: Session,
@@ -60,6 +85,261 @@ class CRUDTask(CRUDBase[models.Task, task_schema.TaskCreateResponse, task_schema
         db.refresh(db_obj)
         return db_obj
 
+    def advance_progress(self, db: Session, *, id: Union[UUID, str], delta: float) -> Optional[Tuple[float, str]]:
+        """
+        原子地增加任务进度 (多个分片可能同时完成)，上限为 1.0，但不提交事务。
+        已进入终态的任务不再更新，避免迟到的进度覆盖最终状态。
+
+        Returns:
+            更新后的 (progress, status)；任务不存在或已处于终态时返回 None。
+        """
+        row = db.execute(
+            update(models.Task)
+            .where(models.Task.id == id, models.Task.status.not_in(task_schema.TERMINAL_STATUSES))
+            .values(progress=func.least(func.coalesce(models.Task.progress, 0.0) + delta, 1.0))
+            .returning(models.Task.progress, models.Task.status)
+        ).first()
+        return (row.progress, row.status) if row is not None else None
+
+    def update_status(self, db: Session, *, id: Union[UUID, str], values: Dict[str, Any]) -> bool:
+        """
+        更新任务的状态等字段，但不提交事务。
+        已进入终态的任务 (例如已被用户取消) 不会被覆盖。
+
+        Returns:
+            是否更新了任务。
+        """
+        result = db.execute(
+            update(models.Task)
+            .where(models.Task.id == id, models.Task.status.not_in(task_schema.TERMINAL_STATUSES))
+            .values(**values)
+        )
+        return result.rowcount > 0
+
+    def touch(self, db: Session, *, id: Union[UUID, str]) -> bool:
+        """
+        刷新执行中任务的 updated_at (心跳)，但不提交事务。
+        分片任务开始执行时调用，避免等待分片的父任务被 expire_stale 误判为停滞。
+
+        Returns:
+            任务是否仍在执行；任务不存在或已处于终态时返回 False。
+        """
+        result = db.execute(
+            update(models.Task)
+            .where(models.Task.id == id, models.Task.status.not_in(task_schema.TERMINAL_STATUSES))
+            .values(updated_at=func.now())
+        )
+        return result.rowcount > 0
+
+    def referenced_file_keys(self, db: Session, *, retention_seconds: int) -> Set[str]:
+        """
+        仍需保留的上传文件键：尚未进入终态的任务，以及结束不满 retention_seconds 的任务
+        (保留期内仍可以下载原始文件) 引用的键。
+        """
+        rows = db.execute(
+            select(models.Task.file_key)
+            .where(
+                models.Task.file_key.is_not(None),
+                or_(
+                    models.Task.status.not_in(task_schema.TERMINAL_STATUSES),
+                    models.Task.updated_at >= func.now() - timedelta(seconds=retention_seconds),
+                ),
+            )
+            .distinct()
+        ).scalars()
+        return set(rows)
+
+    def expire_stale(self, db: Session, *, stale_after_seconds: int, sharded_stale_after_seconds: int,
+                     error_message: str) -> List[UUID]:
+        """
+        把长时间没有任何更新的执行中任务标记为 FAILURE，但不提交事务。
+        用于回收被硬时限终止、来不及写入终态的任务。
+
+        已拆分为分片的任务 (PROCESSING) 在分片排队期间不会有任何更新，
+        分片开始执行和上报进度时才刷新 updated_at，因此使用更长的 sharded_stale_after_seconds。
+
+        Returns:
+            被标记的任务ID列表。
+        """
+        status = task_schema.TaskStatus
+        return list(db.scalars(
+            update(models.Task)
+            .where(or_(
+                and_(
+                    models.Task.status == status.STARTED.value,
+                    models.Task.updated_at < func.now() - timedelta(seconds=stale_after_seconds),
+                ),
+                and_(
+                    models.Task.status == status.PROCESSING.value,
+                    models.Task.updated_at < func.now() - timedelta(seconds=sharded_stale_after_seconds),
+                ),
+            ))
+            .values(status=status.FAILURE.value, error_message=error_message)
+            .returning(models.Task.id)
+        ))
+
+
+def _task_rows(filenames: List[str], file_keys: Optional[List[Optional[str]]]) -> List[Dict[str, Any]]:
+    """批量创建任务时每一行的取值。"""
+    file_keys = file_keys if file_keys is not None else [None] * len(filenames)
+    return [
+        {"filename": filename, "status": "PENDING", "file_key": file_key}
+        for filename, file_key in zip(filenames, file_keys, strict=True)
+    ]
+
+
+def encode_cursor(created_at: datetime, task_id: UUID) -> str:
+    """把 (created_at, id) 编码为不透明的分页游标。"""
+    raw = json.dumps([created_at.isoformat(), str(task_id)]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    解析分页游标。
+
+    Raises:
+        ValueError: 游标格式不正确。
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), UUID(task_id)
+    except Exception as e:
+        raise ValueError(f"无效的分页游标: {cursor}") from e
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class AsyncCRUDTask(AsyncCRUDBase[models.Task, task_schema.TaskCreateResponse, task_schema.TaskUpdate]):
+    """
+    CRUDTask 的异步版本，供 FastAPI 端点使用。
+    同步版本保留给 Celery Worker (DBTask)。
+    """
+
+    async def create(self, db: AsyncSession, *, obj_in: task_schema.TaskCreate,
+                     file_key: Optional[str] = None) -> models.Task:
+        """
+        创建一个新任务，但不提交事务。
+        """
+        db_obj = models.Task(
+            filename=obj_in.filename,
+            file_key=file_key,
+        )
+        db.add(db_obj)
+        await db.flush()
+        await db.refresh(db_obj)
+        return db_obj
+
+    async def get_with_result_meta(
+            self, db: AsyncSession, *, id: UUID
+    ) -> Optional[Tuple[models.Task, Optional[int], Optional[str]]]:
+        """
+        通过一次外连接查询获取任务及其结果的元数据 (大小、ETag)，不读取结果本身。
+
+        Returns:
+            (task, result_size, result_etag)；任务不存在时返回 None。
+        """
+        stmt = (
+            select(models.Task, models.TaskResult.raw_size, models.TaskResult.etag)
+            .outerjoin(models.TaskResult, models.TaskResult.task_id == models.Task.id)
+            .where(models.Task.id == id)
+        )
+        row = (await db.execute(stmt)).first()
+        return (row[0], row[1], row[2]) if row else None
+
+    async def list_page(
+            self,
+            db: AsyncSession,
+            *,
+            limit: int = 50,
+            cursor: Optional[Tuple[datetime, UUID]] = None,
+            status: Optional[str] = None,
+            filename_prefix: Optional[str] = None,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+    ) -> List[models.Task]:
+        """
+        按 (created_at, id) 倒序的游标分页查询任务列表。
+
+        游标条件使用行值比较 (created_at, id) < (:created_at, :id)，
+        可以直接利用 ix_task_created_at_id / ix_task_status_created_at_id 索引逆序扫描，
+        翻页代价与页数无关。
+        """
+        stmt = select(models.Task)
+        if status:
+            stmt = stmt.where(models.Task.status == status)
+        if filename_prefix:
+            stmt = stmt.where(
+                func.lower(models.Task.filename).like(_escape_like(filename_prefix.lower()) + "%", escape="\\")
+            )
+        if created_from:
+            stmt = stmt.where(models.Task.created_at >= created_from)
+        if created_to:
+            stmt = stmt.where(models.Task.created_at < created_to)
+        if cursor:
+            stmt = stmt.where(tuple_(models.Task.created_at, models.Task.id) < tuple_(*cursor))
+        stmt = stmt.order_by(models.Task.created_at.desc(), models.Task.id.desc()).limit(limit)
+        result = await db.scalars(stmt)
+        return list(result.all())
+
+    async def create_many(self, db: AsyncSession, *, filenames: List[str],
+                          file_keys: Optional[List[Optional[str]]] = None) -> List[UUID]:
+        """
+        通过一条 INSERT ... RETURNING 批量创建任务，但不提交事务。
+        """
+        if not filenames:
+            return []
+        rows = _task_rows(filenames, file_keys)
+        result = await db.scalars(
+            insert(models.Task).returning(models.Task.id, sort_by_parameter_order=True), rows
+        )
+        return list(result.all())
+
+    async def cancel(self, db: AsyncSession, *, id: UUID) -> Optional[Tuple[str, float]]:
+        """
+        把未进入终态的任务标记为 CANCELLED，但不提交事务。
+        使用带条件的 UPDATE，与 Worker 写入终态之间不存在竞争。
+
+        Returns:
+            (status, progress)；任务不存在或已处于终态时返回 None。
+        """
+        row = (await db.execute(
+            update(models.Task)
+            .where(models.Task.id == id, models.Task.status.not_in(task_schema.TERMINAL_STATUSES))
+            .values(status=task_schema.TaskStatus.CANCELLED.value, error_message="任务已被用户取消。")
+            .returning(models.Task.status, models.Task.progress)
+        )).first()
+        return (row.status, row.progress) if row is not None else None
+
+
+def _notify_params(task_id: str, status: str, progress: Optional[float]) -> Dict[str, str]:
+    payload = json.dumps({"task_id": str(task_id), "status": status, "progress": progress})
+    return {"channel": settings.events.channel, "payload": payload}
+
+
+_NOTIFY_SQL = text("SELECT pg_notify(:channel, :payload)")
+
+
+def publish_task_event(db: Session, *, task_id: str, status: str, progress: Optional[float] = None) -> None:
+    """
+    通过 PostgreSQL NOTIFY 发布任务状态变更。
+
+    NOTIFY 是事务性的：只有在事务提交后监听方才会收到，
+    因此客户端看到的状态一定已经持久化。负载只包含状态和进度，
+    以满足 NOTIFY 8000 字节的上限。
+    """
+    db.execute(_NOTIFY_SQL, _notify_params(task_id, status, progress))
+
+
+async def publish_task_event_async(db: AsyncSession, *, task_id: str, status: str,
+                                   progress: Optional[float] = None) -> None:
+    """publish_task_event 的异步版本，供 API 写入状态 (例如取消任务) 时使用。"""
+    await db.execute(_NOTIFY_SQL, _notify_params(task_id, status, progress))
+
 
 # 创建一个 CRUDTask 的单例
 task = CRUDTask(models.Task)
+async_task = AsyncCRUDTask(models.Task)
@@ -0,0 +1,60 @@
+from typing import List, Optional
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, defer
+
+from ..db import models
+from .base import AsyncCRUDBase, CRUDBase
+
+
+class CRUDTaskArtifact(CRUDBase[models.TaskArtifact, BaseModel, BaseModel]):
+    """
+    针对任务产物表的 CRUD 操作。所有方法都不提交事务。
+    """
+
+    def save(self, db: Session, *, task_id: UUID, name: str, content_type: str, data: bytes) -> None:
+        """
+        写入（或覆盖）一个任务产物。
+        """
+        values = {
+            "task_id": task_id,
+            "name": name,
+            "content_type": content_type,
+            "data": data,
+            "size": len(data),
+        }
+        stmt = insert(models.TaskArtifact).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.TaskArtifact.task_id, models.TaskArtifact.name],
+            set_={"content_type": content_type, "data": data, "size": len(data), "created_at": func.now()},
+        )
+        db.execute(stmt)
+
+
+class AsyncCRUDTaskArtifact(AsyncCRUDBase[models.TaskArtifact, BaseModel, BaseModel]):
+    """
+    CRUDTaskArtifact 的异步版本。
+    """
+
+    async def list_for_task(self, db: AsyncSession, *, task_id: UUID) -> List[models.TaskArtifact]:
+        """
+        列出任务的所有产物，只读取元数据，不读取内容。
+        """
+        stmt = (
+            select(models.TaskArtifact)
+            .where(models.TaskArtifact.task_id == task_id)
+            .order_by(models.TaskArtifact.name)
+        )
+        result = await db.scalars(stmt.options(defer(models.TaskArtifact.data)))
+        return list(result.all())
+
+    async def get_by_name(self, db: AsyncSession, *, task_id: UUID, name: str) -> Optional[models.TaskArtifact]:
+        return await db.get(models.TaskArtifact, (task_id, name))
+
+
+task_artifact = CRUDTaskArtifact(models.TaskArtifact)
+async_task_artifact = AsyncCRUDTaskArtifact(models.TaskArtifact)
@@ -0,0 +1,44 @@
+from uuid import UUID
+
+from pydantic import BaseModel
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from ..db import models
+from ..services.result_store import EncodedResult
+from .base import AsyncCRUDBase, CRUDBase
+
+
+class CRUDTaskResult(CRUDBase[models.TaskResult, BaseModel, BaseModel]):
+    """
+    针对任务结果表的 CRUD 操作。所有方法都不提交事务。
+    """
+
+    def save(self, db: Session, *, task_id: UUID, encoded: EncodedResult) -> None:
+        """
+        写入（或覆盖）任务结果。
+        """
+        values = {
+            "task_id": task_id,
+            "codec": encoded.codec,
+            "data": encoded.data,
+            "raw_size": encoded.raw_size,
+            "stored_size": len(encoded.data),
+            "etag": encoded.etag,
+        }
+        stmt = insert(models.TaskResult).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[models.TaskResult.task_id],
+            set_={key: value for key, value in values.items() if key != "task_id"},
+        )
+        db.execute(stmt)
+
+
+class AsyncCRUDTaskResult(AsyncCRUDBase[models.TaskResult, BaseModel, BaseModel]):
+    """
+    CRUDTaskResult 的异步版本。主键即 task_id，直接使用基类的 get。
+    """
+
+
+task_result = CRUDTaskResult(models.TaskResult)
+async_task_result = AsyncCRUDTaskResult(models.TaskResult)
@@ -1,7 +1,7 @@
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
-from sqlalchemy import String, Text, DateTime, func
+from sqlalchemy import Float, Index, Integer, LargeBinary, String, Text, DateTime, ForeignKey, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.types import JSON
@@ -16,6 +16,18 @@ class Task(Base):
     数据库任务模型 (Task Model)
     """
     __tablename__ = "task"
+    __table_args__ = (
+        # 任务列表的游标分页按 (created_at, id) 排序
+        Index("ix_task_created_at_id", "created_at", "id"),
+        # 按状态筛选时的游标分页，同时替代了原来的单列 status 索引
+        Index("ix_task_status_created_at_id", "status", "created_at", "id"),
+        # 文件名前缀匹配 (不区分大小写)
+        Index(
+            "ix_task_filename_lower_pattern",
+            func.lower(text("filename")).label("filename_lower"),
+            postgresql_ops={"filename_lower": "text_pattern_ops"},
+        ),
+    )
 
     # 2. 使用 SQLAlchemy 2.0 的 Mapped 和 mapped_column 语法
     # 这提供了完整的类型提示支持，更具现代感。
@@ -32,16 +44,26 @@ class Task(Base):
         String(51),  # 定义一个合理的长度，例如 50
         nullable=False,
         default="PENDING", # 默认值现在是一个纯字符串
-        index=True,
         comment="任务状态"
     )
 
+    progress: Mapped[float] = mapped_column(
+        Float, nullable=False, default=0.0, server_default="0", comment="处理进度 (0~1)"
+    )
+
     # 对于 PostgreSQL, JSONB 是一个很好的选择。这里使用通用的 JSON 以保持兼容性。
     # Mapped[Dict[str, Any]] 提供了更精确的类型提示。
+    # 已弃用：结果压缩后保存在 task_result 表 (见 TaskResult)，迁移 5e0b8c7a2f13 已把旧结果移过去。
+    # 该列仅为兼容旧版本 (降级迁移会把结果写回这里) 保留，应用不再读写。
     result: Mapped[Dict[str, Any]] = mapped_column(
         JSON, nullable=True, comment="任务处理结果"
     )
 
+    # 上传文件按内容寻址，多个任务可以引用同一个键；清理共享存储和下载原始文件都以此为准
+    file_key: Mapped[Optional[str]] = mapped_column(
+        String(255), nullable=True, comment="原始文件在共享存储中的键"
+    )
+
     # 4. 将 error_message 的类型改为 Text，以容纳更长的错误信息
     error_message: Mapped[str] = mapped_column(
         Text, nullable=True, comment="任务失败的错误信息"
@@ -57,3 +79,180 @@ class Task(Base):
 
     def __repr__(self):
         return f"<Task(id={self.id}, filename='{self.filename}', status='{self.status.value}')>"
+
+
+class ResultCacheEntry(Base):
+    """
+    内容寻址的解析结果缓存索引 (Result Cache Model)
+
+    缓存键由文件摘要、解析器版本和解析参数共同决定，
+    指向第一次处理该内容的任务。
+    """
+    __tablename__ = "result_cache"
+
+    cache_key: Mapped[str] = mapped_column(
+        String(64), primary_key=True, comment="缓存键 (SHA-256)"
+    )
+
+    file_digest: Mapped[str] = mapped_column(
+        String(64), nullable=False, index=True, comment="文件内容的 SHA-256"
+    )
+
+    parser_version: Mapped[str] = mapped_column(
+        String(32), nullable=False, comment="生成结果的解析器版本"
+    )
+
+    options: Mapped[Dict[str, Any]] = mapped_column(
+        JSON, nullable=True, comment="解析参数"
+    )
+
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("task.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="持有结果的任务ID"
+    )
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), index=True, comment="创建时间"
+    )
+
+    def __repr__(self):
+        return f"<ResultCacheEntry(cache_key={self.cache_key}, task_id={self.task_id})>"
+
+
+class TaskBatch(Base):
+    """
+    批量上传批次 (Task Batch Model)
+    """
+    __tablename__ = "task_batch"
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+
+    file_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="批次中的文件数量"
+    )
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), comment="创建时间"
+    )
+
+    def __repr__(self):
+        return f"<TaskBatch(id={self.id}, file_count={self.file_count})>"
+
+
+class TaskBatchItem(Base):
+    """
+    批次中的单个文件与任务的对应关系。
+    命中缓存或批次内重复的文件会指向已有任务，因此使用独立的关联表，
+    而不是在 task 表上记录批次ID。
+    """
+    __tablename__ = "task_batch_item"
+
+    batch_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("task_batch.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    position: Mapped[int] = mapped_column(
+        Integer, primary_key=True, comment="文件在批次中的序号"
+    )
+
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("task.id", ondelete="CASCADE"),
+        nullable=False,
+        comment="处理该文件的任务ID"
+    )
+
+    filename: Mapped[str] = mapped_column(
+        String(255), nullable=False, comment="上传的文件名"
+    )
+
+    def __repr__(self):
+        return f"<TaskBatchItem(batch_id={self.batch_id}, position={self.position}, task_id={self.task_id})>"
+
+
+class TaskResult(Base):
+    """
+    任务结果 (Task Result Model)
+
+    结果以压缩后的 JSON 字节单独存放，不再内联在 task 表中：
+    状态轮询不会读取结果，更新任务状态也不会重写大对象。
+    """
+    __tablename__ = "task_result"
+
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("task.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    codec: Mapped[str] = mapped_column(
+        String(16), nullable=False, comment="压缩格式 (zstd/gzip/identity)"
+    )
+
+    data: Mapped[bytes] = mapped_column(
+        LargeBinary, nullable=False, comment="压缩后的 JSON 结果"
+    )
+
+    raw_size: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="未压缩的 JSON 字节数"
+    )
+
+    stored_size: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="压缩后的字节数"
+    )
+
+    etag: Mapped[str] = mapped_column(
+        String(64), nullable=False, comment="未压缩 JSON 的 SHA-256"
+    )
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), comment="创建时间"
+    )
+
+    def __repr__(self):
+        return f"<TaskResult(task_id={self.task_id}, codec='{self.codec}', raw_size={self.raw_size})>"
+
+
+class TaskArtifact(Base):
+    """
+    任务附属产物 (Task Artifact Model)
+
+    例如开启性能分析时生成的 cProfile 统计和内存分配报告，
+    按 (task_id, name) 存放，可通过接口下载。
+    """
+    __tablename__ = "task_artifact"
+
+    task_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("task.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    name: Mapped[str] = mapped_column(
+        String(128), primary_key=True, comment="产物名称，例如 profile.pstats"
+    )
+
+    content_type: Mapped[str] = mapped_column(
+        String(64), nullable=False, comment="下载时使用的 Content-Type"
+    )
+
+    data: Mapped[bytes] = mapped_column(
+        LargeBinary, nullable=False, comment="产物内容"
+    )
+
+    size: Mapped[int] = mapped_column(
+        Integer, nullable=False, comment="字节数"
+    )
+
+    created_at: Mapped[DateTime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now(), comment="创建时间"
+    )
+
+    def __repr__(self):
+        return f"<TaskArtifact(task_id={self.task_id}, name='{self.name}', size={self.size})>"
@@ -1,11 +1,13 @@
 import celery
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Iterator
+from typing import AsyncIterator, Iterator
 from contextlib import contextmanager
 import logging
 
 from ..core.config import settings
+from ..core.metrics import instrument_pool
 
 # 设置一个日志记录器
 log = logging.getLogger(__name__)
@@ -15,9 +17,10 @@ log = logging.getLogger(__name__)
 print(settings.effective_alembic_database_url)
 engine = create_engine(
     settings.postgres.url,
-    pool_size=15,
-    max_overflow=30,
-    pool_timeout=300,
+    pool_size=settings.postgres.pool_size,
+    max_overflow=settings.postgres.max_overflow,
+    # Worker 只在写入状态/进度时短暂借用连接，等待过久说明数据库本身出了问题
+    pool_timeout=30,
     pool_recycle=1800,
     pool_pre_ping=True,
 )
@@ -36,6 +39,28 @@ SessionLocal = sessionmaker(
 )
 
 
+# 创建异步数据库引擎，供 FastAPI 端点使用
+# psycopg 3 同时支持同步和异步，因此与同步引擎共用同一个 DSN
+async_engine = create_async_engine(
+    settings.postgres.url,
+    pool_size=settings.postgres.async_pool_size,
+    max_overflow=settings.postgres.async_max_overflow,
+    pool_timeout=30,
+    pool_recycle=1800,
+    pool_pre_ping=True,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# 连接池使用情况指标
+instrument_pool(engine, "sync")
+instrument_pool(async_engine.sync_engine, "async")
+
+
 # --- 模式一：手动事务控制 (适用于 GET 或复杂逻辑) ---
 @contextmanager
 def get_db() -> Iterator[Session]:
@@ -75,37 +100,51 @@ def get_db_with_commit() -> Iterator[Session]:
         db.close()
 
 
-class DBTask(celery.Task):
+# --- 异步模式：FastAPI 依赖项 ---
+async def get_async_db() -> AsyncIterator[AsyncSession]:
     """
-    一个抽象的Celery Task基类，它能自动完成以下工作:
-    1. 注入一个数据库会话 (Session)。
-    2. 如果任务成功，自动提交事务 (commit)。
-    3. 如果任务失败，自动回滚事务 (rollback)。
-    4. 无论成功与否，都确保会话被关闭 (close)。
+    获取异步数据库会话，需手动管理事务。
+
+    查询不会阻塞事件循环，适用于 FastAPI 的 async 端点。
     """
-    abstract = True
+    async with AsyncSessionLocal() as db:
+        yield db
 
-    def __call__(self, *args, **kwargs):
-        """
-        在任务执行时，这个方法会被调用。
-        我们在这里封装了完整的数据库事务管理逻辑。
-        """
-        print("<<<<< DBTask is being called! Creating database session... >>>>>")
 
-        db = SessionLocal()
+async def get_async_db_with_commit() -> AsyncIterator[AsyncSession]:
+    """
+    获取异步数据库会话，并自动管理事务（请求-事务模式）。
+    """
+    async with AsyncSessionLocal() as db:
         try:
-            # 将数据库会话作为第一个位置参数注入
-            kwargs['db'] = db
-            result = super().__call__(*args, **kwargs)
-            # 如果任务函数成功执行（没有抛出异常），则提交事务
-            db.commit()
-            return result
+            yield db
+            await db.commit()
         except Exception as e:
             log.error("数据库事务回滚，错误: %s", e)
-            # 如果任务执行过程中发生任何异常，则回滚事务
-            db.rollback()
-            # 重新抛出异常，以便Celery知道任务失败了，并进行相应的处理（如重试）
+            await db.rollback()
             raise
+
+
+class DBTask(celery.Task):
+    """
+    Celery Task 基类。
+
+    任务执行期间不持有数据库会话：每次状态/进度写入都通过 get_db_with_commit()
+    打开一个短事务并立即提交，只在写入时占用连接池中的连接。
+    这样 STARTED 等中间状态在写入后即对轮询方和 SSE 客户端可见，
+    Worker 并发数也不再受 pool_size + max_overflow 的限制。
+
+    任务结束时 (无论成功与否) 写入该任务在进程内尚未写入的进度增量。
+    """
+    abstract = True
+
+    def __call__(self, *args, **kwargs):
+        try:
+            return super().__call__(*args, **kwargs)
         finally:
-            # 最后，无论如何都要关闭会话，释放连接
-            db.close()
+            task_id = kwargs.get("task_id")
+            if task_id is not None:
+                # 延迟导入：progress 服务依赖本模块
+                from ..services.progress import progress_reporter
+
+                progress_reporter.close(task_id)
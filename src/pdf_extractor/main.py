@@ -1,8 +1,13 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import Response
 from contextlib import asynccontextmanager
 
 from .core.config import settings
 from .core.logger import logger
+from .core.metrics import CONTENT_TYPE_LATEST, render_latest
+from .core.middleware import MaxBodySizeMiddleware
+from .db.session import async_engine
+from .services.status_broker import status_broker
 from .api import api_router  # 1. 只需导入 api_router
 
 
@@ -15,8 +20,11 @@ async def lifespan(fastapi_app: FastAPI):
     logger.info(f"PDF Extractor API - 启动中...")
     logger.info(f"日志级别: {settings.log_level.upper()}")
     logger.info(f"Celery Broker: {settings.rabbitmq.url}")
+    await status_broker.start()
     yield
     # --- 应用关闭时执行 ---
+    await status_broker.stop()
+    await async_engine.dispose()
     logger.info("PDF Extractor API - 已关闭")
 
 
@@ -28,6 +36,13 @@ app = FastAPI(
     lifespan=lifespan  # 使用新的生命周期管理器
 )
 
+# 在 multipart 解析之前限制请求体大小，超大文件不会被完整接收
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    max_body_size=settings.upload.max_size_bytes + settings.upload.multipart_overhead_bytes,
+    path_limits={"/api/tasks/batch": settings.upload.max_batch_size_bytes},
+)
+
 # --- 3. 包含 API 路由 ---
 # 包含来自 `api` 模块的路由，并为其添加统一的前缀 `/api`
 app.include_router(api_router, prefix="/api")
@@ -41,3 +56,12 @@ async def read_root():
     """
     logger.info("接收到健康检查请求")
     return {"status": "ok", "message": f"Welcome to {settings.project_name}!"}
+
+
+# --- 5. Prometheus 指标 ---
+@app.get("/metrics", tags=["Health Check"], include_in_schema=False)
+async def metrics():
+    """
+    以 Prometheus 文本格式输出 API 进程的指标。
+    """
+    return Response(content=render_latest(), media_type=CONTENT_TYPE_LATEST)
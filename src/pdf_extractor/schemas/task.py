@@ -2,16 +2,29 @@ import uuid
 from enum import Enum
 
 from pydantic import BaseModel, Field
-from typing import Optional, Any
+from typing import Dict, List, Optional, Any
 from datetime import datetime
 from uuid import UUID
 
 
 class TaskStatus(str, Enum):
     PENDING = "PENDING"
+    STARTED = "STARTED"
     PROCESSING = "PROCESSING"
     COMPLETED = "COMPLETED"
     FAILED = "FAILED"
+    FAILURE = "FAILURE"
+    # 用户通过 DELETE /api/tasks/{task_id} 取消
+    CANCELLED = "CANCELLED"
+    # 超过解析时限，结果中只包含时限内完成的部分
+    TIMEOUT = "TIMEOUT"
+
+
+# 进入这些状态后任务不会再变化
+TERMINAL_STATUSES = {
+    TaskStatus.COMPLETED.value, TaskStatus.FAILED.value, TaskStatus.FAILURE.value,
+    TaskStatus.CANCELLED.value, TaskStatus.TIMEOUT.value,
+}
 
 
 # --- Pydantic Schemas for Task ---
@@ -34,6 +47,8 @@ class TaskCreateResponse(TaskBase):
     task_id: Optional[str] = None
     filename: Optional[str] = None
     message: Optional[str] = None
+    # 为 True 表示内容相同的文件已处理过（或正在处理），直接复用了已有任务
+    cached: bool = False
 
 
 class TaskUpdate(BaseModel):
@@ -56,6 +71,7 @@ class TaskInDBBase(TaskBase):
 
     # 3. 将所有可能为 None 的字段用 Optional[] 包装
     status: Optional[str] = None
+    progress: Optional[float] = None
     result: Optional[Any] = None
     error_message: Optional[str] = None
     created_at: Optional[datetime] = None
@@ -74,8 +90,90 @@ class Task(TaskInDBBase):
     pass
 
 
+class TaskStatusRead(TaskBase):
+    """
+    状态查询接口返回的精简 Schema。
+    不包含结果本身，只给出结果的引用和元数据，结果通过 result_url 单独获取。
+    """
+    id: UUID
+    status: Optional[str] = None
+    progress: Optional[float] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    result_url: Optional[str] = None
+    result_size: Optional[int] = None
+    result_etag: Optional[str] = None
+
+
+class TaskListItem(TaskBase):
+    """
+    任务列表中的单个条目，不包含结果。
+    """
+    id: UUID
+    status: Optional[str] = None
+    progress: Optional[float] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class TaskPage(BaseModel):
+    """
+    游标分页的任务列表。next_cursor 为空表示没有更多数据。
+    """
+    items: List[TaskListItem]
+    next_cursor: Optional[str] = None
+
+
 class TaskInDB(TaskInDBBase):
     """
     代表数据库中完整记录的 Schema。
     """
     pass
+
+
+# --- Pydantic Schemas for Batch ---
+
+class BatchCreateResponse(BaseModel):
+    """
+    批量上传的返回结果。
+    tasks 与上传的文件一一对应，顺序一致。
+    """
+    batch_id: str
+    tasks: List[TaskCreateResponse]
+    message: Optional[str] = None
+
+
+class BatchProgress(BaseModel):
+    """
+    批次的聚合进度。
+    """
+    batch_id: UUID
+    total: int
+    status_counts: Dict[str, int]
+    finished: int
+    progress: float
+
+
+class TaskEvent(BaseModel):
+    """
+    通过 SSE 推送给客户端的任务状态变更事件。
+    """
+    task_id: str
+    status: str
+    progress: Optional[float] = None
+
+
+class TaskArtifactRead(BaseModel):
+    """
+    任务产物的元数据 (例如性能分析报告)，内容通过 download_url 下载。
+    """
+    name: str
+    content_type: str
+    size: int
+    created_at: Optional[datetime] = None
+    download_url: str
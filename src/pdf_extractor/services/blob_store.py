@@ -0,0 +1,387 @@
+# src/pdf_extractor/services/blob_store.py
+
+import os
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Set
+
+from ..core.config import settings
+from ..core.exceptions import BlobNotFoundError
+from ..core.logger import logger
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # S3 后端为可选依赖
+    boto3 = None
+    ClientError = None
+
+BACKEND_LOCAL = "local"
+BACKEND_S3 = "s3"
+
+UPLOAD_PREFIX = "uploads/"
+OUTPUT_PREFIX = "outputs/"
+
+
+def upload_key(digest: str) -> str:
+    """
+    上传文件的内容寻址键。相同内容只保存一份，重复上传直接复用。
+    按摘要前两位分目录，避免单个目录下文件过多。
+    """
+    return f"{UPLOAD_PREFIX}{digest[:2]}/{digest}.pdf"
+
+
+def output_key(task_id: str, name: str) -> str:
+    """
+    任务输出 (中间 json、图片) 的键，按任务分目录。
+    分片结果也放在这里，合并步骤可能运行在另一台机器上，不能依赖 worker 本地目录。
+    """
+    return f"{OUTPUT_PREFIX}{task_id}/{name}"
+
+
+@dataclass
+class BlobInfo:
+    """
+    列举对象时返回的元数据。
+    """
+    key: str
+    size: int
+    # 最后修改时间 (Unix 时间戳)
+    modified: float
+
+
+def _iter_file(path: str, chunk_size: int) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+class BlobStore:
+    """
+    共享存储接口。键以 / 分隔，与具体后端无关；写入是原子的，读取方不会看到写了一半的对象。
+    所有方法都是阻塞调用，在事件循环中使用时需放入线程池。
+    """
+
+    chunk_size = settings.upload.chunk_size_bytes
+
+    def put_stream(self, key: str, chunks: Iterable[bytes]) -> int:
+        """
+        流式写入对象，内存中最多保留一个块 (S3 为一个分段)。
+
+        Returns:
+            写入的字节数。
+        """
+        raise NotImplementedError
+
+    def put_file(self, key: str, path: str) -> int:
+        return self.put_stream(key, _iter_file(path, self.chunk_size))
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        """
+        流式读取对象。
+
+        Raises:
+            BlobNotFoundError: 对象不存在。
+        """
+        raise NotImplementedError
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        """
+        读取 [start, end] 字节 (包含 end)，与 HTTP Range 的约定一致。
+
+        Raises:
+            BlobNotFoundError: 对象不存在。
+        """
+        raise NotImplementedError
+
+    def size(self, key: str) -> Optional[int]:
+        """对象的字节数，不存在时返回 None。"""
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.size(key) is not None
+
+    def delete(self, key: str) -> None:
+        """删除对象，对象不存在时不报错。"""
+        raise NotImplementedError
+
+    def list(self, prefix: str = "") -> Iterator[BlobInfo]:
+        raise NotImplementedError
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        """
+        把对象取回到本地临时文件供 PyMuPDF / MinerU 打开，退出时删除。
+        每次调用使用独立的文件，同一节点上并发执行的多个分片互不影响。
+        """
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1], dir=settings.storage.worker_tmp_dir)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in self.iter_chunks(key):
+                    out.write(chunk)
+            yield path
+        finally:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+
+class LocalBlobStore(BlobStore):
+    """
+    本地磁盘 (或挂载的共享卷) 后端。
+    写入先落到同目录的临时文件，完成后 rename，保证原子性。
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, *key.split("/")))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"非法的存储键: {key}")
+        return path
+
+    def put_stream(self, key: str, chunks: Iterable[bytes]) -> int:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        staging = f"{path}.tmp-{uuid.uuid4().hex[:8]}"
+        size = 0
+        try:
+            with open(staging, "wb") as out:
+                for chunk in chunks:
+                    size += len(chunk)
+                    out.write(chunk)
+            os.replace(staging, path)
+        except BaseException:
+            try:
+                os.unlink(staging)
+            except OSError:
+                pass
+            raise
+        return size
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise BlobNotFoundError(key)
+        return _iter_file(path, self.chunk_size)
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        try:
+            with open(self._path(key), "rb") as f:
+                f.seek(start)
+                return f.read(end - start + 1)
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return os.path.getsize(self._path(key))
+        except OSError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def list(self, prefix: str = "") -> Iterator[BlobInfo]:
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if ".tmp-" in name:
+                    continue
+                path = os.path.join(directory, name)
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield BlobInfo(key=key, size=stat.st_size, modified=stat.st_mtime)
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        # 文件本身就在本地，直接使用；对象只会被原子替换为相同内容，不会被改写
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise BlobNotFoundError(key)
+        yield path
+
+
+class S3BlobStore(BlobStore):
+    """
+    S3 兼容后端 (AWS S3、MinIO 等)。
+    大对象使用分段上传流式写入，完成前对读取方不可见；读取按块流式返回，并支持 Range 读取。
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: Optional[str] = None,
+                 region: Optional[str] = None, access_key_id: Optional[str] = None,
+                 secret_access_key: Optional[str] = None, part_size: int = 8 * 1024 * 1024):
+        if boto3 is None:
+            raise RuntimeError("S3 存储后端需要安装 boto3: pip install -e \".[s3]\"")
+        self.bucket = bucket
+        self.prefix = prefix
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self._client_kwargs = {
+            "endpoint_url": endpoint_url,
+            "region_name": region,
+            "aws_access_key_id": access_key_id,
+            "aws_secret_access_key": secret_access_key,
+        }
+        self._client = None
+        self._client_pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        # boto3 客户端可以在线程间共享，但不能跨 fork 使用；prefork 子进程各自创建
+        with self._lock:
+            if self._client is None or self._client_pid != os.getpid():
+                self._client = boto3.client("s3", **self._client_kwargs)
+                self._client_pid = os.getpid()
+            return self._client
+
+    def _object_key(self, key: str) -> str:
+        return self.prefix + key
+
+    @staticmethod
+    def _is_not_found(error: Exception) -> bool:
+        code = error.response.get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def put_stream(self, key: str, chunks: Iterable[bytes]) -> int:
+        object_key = self._object_key(key)
+        buffer = bytearray()
+        size = 0
+        upload_id = None
+        parts = []
+        try:
+            for chunk in chunks:
+                size += len(chunk)
+                buffer += chunk
+                if len(buffer) < self.part_size:
+                    continue
+                if upload_id is None:
+                    upload_id = self.client.create_multipart_upload(
+                        Bucket=self.bucket, Key=object_key)["UploadId"]
+                parts.append(self._upload_part(object_key, upload_id, len(parts) + 1, bytes(buffer)))
+                buffer.clear()
+            if upload_id is None:
+                # 小于一个分段的对象直接上传
+                self.client.put_object(Bucket=self.bucket, Key=object_key, Body=bytes(buffer))
+                return size
+            if buffer:
+                parts.append(self._upload_part(object_key, upload_id, len(parts) + 1, bytes(buffer)))
+            self.client.complete_multipart_upload(
+                Bucket=self.bucket, Key=object_key, UploadId=upload_id, MultipartUpload={"Parts": parts},
+            )
+        except BaseException:
+            if upload_id is not None:
+                try:
+                    self.client.abort_multipart_upload(Bucket=self.bucket, Key=object_key, UploadId=upload_id)
+                except Exception as e:
+                    logger.warning(f"取消分段上传 {object_key} 失败: {e}")
+            raise
+        return size
+
+    def _upload_part(self, object_key: str, upload_id: str, number: int, data: bytes) -> dict:
+        response = self.client.upload_part(
+            Bucket=self.bucket, Key=object_key, UploadId=upload_id, PartNumber=number, Body=data,
+        )
+        return {"ETag": response["ETag"], "PartNumber": number}
+
+    def _get_object(self, key: str, **kwargs) -> dict:
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key), **kwargs)
+        except ClientError as e:
+            if self._is_not_found(e):
+                raise BlobNotFoundError(key)
+            raise
+
+    def iter_chunks(self, key: str) -> Iterator[bytes]:
+        body = self._get_object(key)["Body"]
+        return body.iter_chunks(self.chunk_size)
+
+    def read_range(self, key: str, start: int, end: int) -> bytes:
+        return self._get_object(key, Range=f"bytes={start}-{end}")["Body"].read()
+
+    def size(self, key: str) -> Optional[int]:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))["ContentLength"]
+        except ClientError as e:
+            if self._is_not_found(e):
+                return None
+            raise
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+    def list(self, prefix: str = "") -> Iterator[BlobInfo]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._object_key(prefix)):
+            for item in page.get("Contents", []):
+                yield BlobInfo(
+                    key=item["Key"][len(self.prefix):],
+                    size=item["Size"],
+                    modified=item["LastModified"].timestamp(),
+                )
+
+
+def create_blob_store() -> BlobStore:
+    cfg = settings.storage
+    if cfg.backend == BACKEND_LOCAL:
+        return LocalBlobStore(cfg.local_root)
+    if cfg.backend == BACKEND_S3:
+        return S3BlobStore(
+            bucket=cfg.s3_bucket,
+            prefix=cfg.s3_prefix,
+            endpoint_url=cfg.s3_endpoint_url,
+            region=cfg.s3_region,
+            access_key_id=cfg.s3_access_key_id,
+            secret_access_key=cfg.s3_secret_access_key,
+            part_size=cfg.s3_part_size_bytes,
+        )
+    raise ValueError(f"未知的存储后端: {cfg.backend}")
+
+
+def purge_uploads(store: BlobStore, max_age_seconds: int, keep_keys: Set[str]) -> int:
+    """
+    删除超过 max_age_seconds 的上传文件，keep_keys 中的文件 (仍被任务引用) 保留。
+    刚写入、任务记录尚未提交的文件因为未超过 max_age_seconds 也不会被删除。
+
+    Returns:
+        删除的对象数。
+    """
+    return _purge_prefix(store, UPLOAD_PREFIX, max_age_seconds, keep_keys)
+
+
+def purge_outputs(store: BlobStore, max_age_seconds: int) -> int:
+    """
+    删除超过 max_age_seconds 的任务输出对象。
+
+    Returns:
+        删除的对象数。
+    """
+    return _purge_prefix(store, OUTPUT_PREFIX, max_age_seconds, set())
+
+
+def _purge_prefix(store: BlobStore, prefix: str, max_age_seconds: int, keep_keys: Set[str]) -> int:
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for info in store.list(prefix):
+        if info.modified >= cutoff or info.key in keep_keys:
+            continue
+        store.delete(info.key)
+        removed += 1
+    return removed
+
+
+# 每个进程一个实例；S3 客户端在第一次使用时才创建
+blob_store = create_blob_store()
@@ -0,0 +1,222 @@
+# src/pdf_extractor/services/heading_detector.py
+
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+
+# 字体标志位中的粗体位 (见 PyMuPDF 文档 span["flags"])
+_FLAG_BOLD = 1 << 4
+# 只需要文本，不提取图片，速度更快
+_TEXT_FLAGS = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+# 以这些标点结尾的行通常是正文句子
+_SENTENCE_END = ("。", "，", ",", "；", ";")
+# 常见的章节编号，例如 "第三章"、"一、"、"2.1 "、"IV. "、"Chapter 3"
+_NUMBERING = re.compile(
+    r"^\s*(第[一二三四五六七八九十百零〇\d]+[章节部篇条]|[一二三四五六七八九十]+[、.．]"
+    r"|\d+(\.\d+)*[\s、.．]|[IVX]+\.\s|(chapter|section|part)\s)",
+    re.IGNORECASE,
+)
+_DIGITS = re.compile(r"\d+")
+# 同一标题折行时，相邻两行的行距不超过 字号 × 该值
+_WRAP_PITCH_RATIO = 1.8
+
+
+@dataclass
+class HeadingDetectorConfig:
+    # 字号不小于 正文字号 × 该值 的行视为标题候选
+    size_ratio: float = 1.15
+    # 字号聚类的容差 (pt)，相差不超过该值的字号视为同一级
+    size_tolerance: float = 0.5
+    # 最多推断的标题层级数，更小的字号并入最后一级
+    max_levels: int = 4
+    # 标题的最大字符数
+    max_title_chars: int = 120
+    # 与正文同字号的整行粗体文字作为最低一级标题时的最大字符数
+    bold_max_chars: int = 60
+    # 出现在超过该比例页面上的相同文字视为页眉页脚
+    repeat_page_ratio: float = 0.3
+    # 平均每页标题数超过该值时认为检测结果不可靠，降低置信度
+    max_headings_per_page: float = 6.0
+
+
+@dataclass
+class DetectedHeadings:
+    titles: List[Dict[str, Any]]
+    confidence: float
+    page_count: int
+    body_size: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": "font_stats",
+            "confidence": round(self.confidence, 3),
+            "body_size": self.body_size,
+            "titles": self.titles,
+        }
+
+
+class HeadingDetector:
+    """
+    基于字体统计的标题检测，不依赖模型：
+
+    1. 逐页读取文本层中每一行的字号、粗体和位置；
+    2. 按字符数加权统计最常见的字号作为正文字号；
+    3. 字号明显大于正文 (或与正文同字号但整行粗体) 的短行作为候选，
+       去掉页眉页脚 (在大量页面上重复出现的文字) 和以句末标点结尾的行；
+    4. 对候选字号做一维聚类 (排序后按间隔切分)，字号越大层级越高；
+    5. 合并同一标题被排成多行的情况，并修正层级跳跃，输出与 get_toc 相同格式的层级列表。
+
+    同时给出 0-1 的置信度：文本层覆盖率低、标题与正文字号差别小、标题过密时置信度较低，
+    调用方可以据此决定是否交给 MinerU 重新解析。
+    """
+
+    def __init__(self, config: Optional[HeadingDetectorConfig] = None):
+        self.config = config or HeadingDetectorConfig()
+
+    @staticmethod
+    def _collect_lines(doc: fitz.Document) -> Dict[str, Any]:
+        """
+        读取所有页面的文本行，返回按列存放的数组。
+        每行的字号取字符数最多的 span 的字号，粗体按字符数判断整行是否全部为粗体。
+        """
+        texts: List[str] = []
+        pages, sizes, chars, bold, y0 = [], [], [], [], []
+        text_pages = 0
+        for page in doc:
+            has_text = False
+            for block in page.get_text("dict", flags=_TEXT_FLAGS)["blocks"]:
+                for line in block.get("lines", ()):
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    text = "".join(span["text"] for span in spans).strip()
+                    counts = [len(span["text"].strip()) for span in spans]
+                    main = max(range(len(spans)), key=counts.__getitem__)
+                    bold_chars = sum(
+                        count for span, count in zip(spans, counts)
+                        if span["flags"] & _FLAG_BOLD or "bold" in span["font"].lower()
+                    )
+                    texts.append(text)
+                    pages.append(page.number)
+                    sizes.append(spans[main]["size"])
+                    chars.append(len(text))
+                    bold.append(bold_chars == sum(counts))
+                    y0.append(line["bbox"][1])
+                    has_text = True
+            text_pages += has_text
+        return {
+            "texts": texts,
+            "page": np.asarray(pages, dtype=np.int32),
+            "size": np.asarray(sizes, dtype=np.float32),
+            "chars": np.asarray(chars, dtype=np.int32),
+            "bold": np.asarray(bold, dtype=bool),
+            "y0": np.asarray(y0, dtype=np.float32),
+            "text_pages": text_pages,
+        }
+
+    def _repeated(self, texts: List[str], pages: np.ndarray, page_count: int) -> np.ndarray:
+        """在大量页面上重复出现的行 (页眉页脚、页码)，数字不参与比较。"""
+        keys = np.asarray([_DIGITS.sub("#", text) for text in texts])
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        # 每个 (文字, 页码) 组合只计一次
+        pairs = np.unique(inverse.astype(np.int64) * page_count + pages)
+        page_hits = np.bincount(pairs // page_count, minlength=len(unique_keys))
+        threshold = max(2, self.config.repeat_page_ratio * page_count)
+        return page_hits[inverse] > threshold
+
+    def _levels(self, sizes: np.ndarray, larger: np.ndarray) -> np.ndarray:
+        """
+        对候选标题的字号做一维聚类并映射为层级 (1 为最高)。
+        与正文同字号的粗体标题排在所有字号层级之后。
+        """
+        cfg = self.config
+        levels = np.zeros(len(sizes), dtype=np.int32)
+        n_clusters = 0
+        if larger.any():
+            unique_sizes, inverse = np.unique(sizes[larger], return_inverse=True)
+            # 升序排列后，相邻字号之差超过容差即开始新的一类
+            cluster = np.concatenate(([0], np.cumsum(np.diff(unique_sizes) > cfg.size_tolerance)))
+            n_clusters = int(cluster[-1]) + 1
+            levels[larger] = n_clusters - cluster[inverse]
+        levels[~larger] = n_clusters + 1
+        return np.minimum(levels, cfg.max_levels)
+
+    def detect(self, doc: fitz.Document) -> DetectedHeadings:
+        cfg = self.config
+        page_count = doc.page_count
+        lines = self._collect_lines(doc)
+        texts = lines["texts"]
+        if not texts:
+            return DetectedHeadings(titles=[], confidence=0.0, page_count=page_count)
+
+        sizes = np.round(lines["size"] / cfg.size_tolerance) * cfg.size_tolerance
+        chars = lines["chars"]
+        # 正文字号：按字符数加权的众数
+        unique_sizes, inverse = np.unique(sizes, return_inverse=True)
+        body_size = float(unique_sizes[np.argmax(np.bincount(inverse, weights=chars))])
+
+        larger = sizes >= body_size * cfg.size_ratio
+        bold_body = lines["bold"] & (sizes >= body_size) & ~larger & (chars <= cfg.bold_max_chars)
+        sentence = np.asarray([text.endswith(_SENTENCE_END) for text in texts])
+        has_letters = np.asarray([not text.replace(".", "").isdigit() for text in texts])
+        candidate = (
+            (larger | bold_body)
+            & (chars <= cfg.max_title_chars)
+            & ~sentence
+            & has_letters
+            & ~self._repeated(texts, lines["page"], page_count)
+        )
+        indices = np.flatnonzero(candidate)
+        if not len(indices):
+            return DetectedHeadings(titles=[], confidence=0.0, page_count=page_count, body_size=body_size)
+        levels = self._levels(sizes[indices], larger[indices])
+
+        titles: List[Dict[str, Any]] = []
+        previous = None
+        for index, level in zip(indices.tolist(), levels.tolist()):
+            page = int(lines["page"][index]) + 1
+            size = float(sizes[index])
+            text = texts[index]
+            # 紧接上一个标题行、同页同级且行距很小：同一标题被排成了多行。
+            # 行框高度通常大于字号 (含上下伸部)，常规行距下相邻两行的行框会重叠，因此按行距 (两行顶部之差) 判断
+            if (previous is not None and index == previous + 1 and titles[-1]["page"] == page
+                    and titles[-1]["level"] == level
+                    and 0 < lines["y0"][index] - lines["y0"][previous] < size * _WRAP_PITCH_RATIO):
+                # 西文之间补空格，中文直接拼接
+                joiner = " " if titles[-1]["title"][-1:].isascii() and text[:1].isascii() else ""
+                titles[-1]["title"] += joiner + text
+            else:
+                titles.append({"level": level, "title": text, "page": page, "size": size,
+                               "bold": bool(lines["bold"][index])})
+            previous = index
+
+        # 层级压缩为从 1 开始的连续值，且每一级最多比上一个标题深一级
+        rank = {level: position + 1 for position, level in enumerate(sorted({t["level"] for t in titles}))}
+        last_level = 0
+        for title in titles:
+            title["level"] = last_level = min(rank[title["level"]], last_level + 1)
+
+        confidence = self._confidence(titles, body_size, lines["text_pages"], page_count)
+        return DetectedHeadings(titles=titles, confidence=confidence, page_count=page_count,
+                                body_size=body_size)
+
+    def _confidence(self, titles: List[Dict[str, Any]], body_size: float, text_pages: int,
+                    page_count: int) -> float:
+        """
+        置信度 = 文本层覆盖率 × 密度因子 × (0.7 × 字号区分度 + 0.3 × 编号标题比例)
+        - 字号区分度：标题比正文大 30% 及以上记为 1，仅靠粗体区分的标题记为 0.5；
+        - 密度因子：平均每页标题数超过 max_headings_per_page 时按比例降低。
+        """
+        if not titles or not page_count:
+            return 0.0
+        heading_sizes = np.asarray([title["size"] for title in titles], dtype=np.float32)
+        contrast = np.clip((heading_sizes / body_size - 1.0) / 0.3, 0.0, 1.0)
+        contrast = np.where(heading_sizes >= body_size * self.config.size_ratio, contrast, 0.5)
+        numbered = np.mean([bool(_NUMBERING.match(title["title"])) for title in titles])
+        per_page = len(titles) / max(text_pages, 1)
+        density = min(1.0, self.config.max_headings_per_page / per_page)
+        coverage = text_pages / page_count
+        return float(coverage * density * (0.7 * contrast.mean() + 0.3 * numbered))
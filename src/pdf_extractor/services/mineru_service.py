@@ -0,0 +1,341 @@
+# src/pdf_extractor/services/mineru_service.py
+
+import json
+import math
+import os
+import shutil
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+from ..core.exceptions import ParseMemoryError
+from ..core.logger import logger
+from ..core.metrics import observe_stage
+from .blob_store import blob_store, output_key, purge_outputs as purge_output_blobs
+from .upload_service import probe_page_count
+
+
+def adaptive_shard_size(page_count: int) -> int:
+    """
+    根据页数计算分片大小。
+
+    目标是让分片数量接近 shard_target_count，使整个 Worker 池都能参与解析；
+    同时把分片大小限制在 [shard_min_size, shard_max_size] 之间，
+    避免小文档被切得过碎，也避免超大文档的单个分片过大。
+    """
+    cfg = settings.mineru
+    size = math.ceil(page_count / max(cfg.shard_target_count, 1))
+    return max(cfg.shard_min_size, min(cfg.shard_max_size, size))
+
+
+def plan_page_ranges(page_count: int, shard_size: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    把文档切分为连续的页码范围。
+
+    Returns:
+        [(page_start, page_end), ...]，页码从 0 开始，page_end 包含在内，
+        与 doc_parse 的参数约定一致。
+    """
+    if page_count <= 0:
+        return []
+    shard_size = shard_size or adaptive_shard_size(page_count)
+    return [
+        (start, min(start + shard_size, page_count) - 1)
+        for start in range(0, page_count, shard_size)
+    ]
+
+
+def task_output_dir(task_id: str) -> str:
+    """每个任务的 MinerU 输出目录。"""
+    return os.path.join(settings.mineru.output_dir, task_id)
+
+
+def _checkpoint_root() -> str:
+    # 解析器版本升级后旧检查点自动失效
+    return os.path.join(settings.mineru.checkpoint_dir, settings.cache.parser_version)
+
+
+def _checkpoint_key(file_digest: Optional[str], task_id: Optional[str]) -> Optional[str]:
+    """
+    检查点按文档摘要和任务ID区分：同一任务的重试、重复投递和各分片共用一组检查点，
+    同一文档的不同任务 (例如解析参数不同) 互不影响，一个任务结束时不会清除另一个任务的检查点。
+    """
+    if not file_digest or not task_id:
+        return None
+    return f"{file_digest}-{task_id}"
+
+
+def _checkpoint(checkpoint_key: Optional[str]):
+    from mine_u.checkpoint import DocumentCheckpoint
+
+    if not settings.mineru.checkpoint_enabled or not checkpoint_key:
+        return None
+    return DocumentCheckpoint(_checkpoint_root(), checkpoint_key)
+
+
+def run_doc_parse(pdf_path: str, output_dir: str,
+                  page_start: Optional[int] = None, page_end: Optional[int] = None,
+                  progress: Optional[Callable[[int], None]] = None,
+                  file_digest: Optional[str] = None, page_count: Optional[int] = None,
+                  task_id: Optional[str] = None) -> str:
+    """
+    调用 MinerU 解析文档或其中一段页码范围。
+    progress 为可选的进度回调，每解析完一段页面以该段页数调用一次。
+    给定 file_digest 和 task_id 且启用检查点时，按文档摘要、任务和页码段保存检查点，
+    重新解析同一任务 (重试、重复投递) 时跳过已完成的段。
+
+    启用进程隔离 (settings.isolation) 时在解析子进程中执行；子进程超出内存上限时
+    把页码范围对半拆分后逐段重试，拆到 min_split_pages 以下仍超限则抛出 ParseMemoryError。
+    解析整个文档时 page_count 用于拆分，未给出时按需读取。
+
+    magic-pdf 依赖较重，只在真正执行解析时才导入。
+
+    Returns:
+        middle json 文件路径。
+    """
+    from mine_u.model_pool import model_registry
+    from mine_u.stage_timer import add_observer
+
+    # classify / inference / pipeline 阶段的耗时记录到指标中；隔离模式下由执行器转发子进程的耗时
+    add_observer(observe_stage)
+    checkpoint_key = _checkpoint_key(file_digest, task_id)
+
+    if not settings.isolation.enabled:
+        middle_json_path = _doc_parse(pdf_path, output_dir, page_start, page_end, progress, checkpoint_key)
+        logger.info(f"MinerU 进程累计耗时统计: {model_registry.stats()}")
+        return middle_json_path
+
+    from mine_u.isolation import ParseMemoryError as ChildMemoryError
+
+    reported = [0]
+
+    def counted(pages: int) -> None:
+        reported[0] += pages
+        progress(pages)
+
+    try:
+        return _doc_parse_isolated(pdf_path, output_dir, page_start, page_end,
+                                   counted if progress is not None else None, checkpoint_key)
+    except ChildMemoryError as e:
+        if page_start is None or page_end is None:
+            page_count = page_count or probe_page_count(pdf_path)
+            if not page_count:
+                raise ParseMemoryError(0, 0, str(e)) from e
+            page_start, page_end = 0, page_count - 1
+        logger.warning(f"解析 {os.path.basename(pdf_path)} 第 {page_start}-{page_end} 页超出内存上限，拆分后重试: {e}")
+        fragments = _parse_split(pdf_path, output_dir, page_start, page_end,
+                                 _skip_progress(progress, reported[0]), checkpoint_key, e)
+
+    # 与 doc_parse 一致，按范围命名输出文件
+    name_without_suff = os.path.basename(pdf_path).split(".")[0]
+    path = os.path.join(output_dir, f"{name_without_suff}_{page_start}-{page_end}_middle.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(merge_middle_json([(start - page_start, middle_json) for start, middle_json in fragments]),
+                  f, ensure_ascii=False)
+    return path
+
+
+def _doc_parse(pdf_path: str, output_dir: str, page_start: Optional[int], page_end: Optional[int],
+               progress: Optional[Callable[[int], None]], checkpoint_key: Optional[str]) -> str:
+    from mine_u.main import doc_parse
+
+    return doc_parse(
+        pdf_path, output_dir, page_start, page_end, progress,
+        checkpoint=_checkpoint(checkpoint_key), checkpoint_pages=settings.mineru.checkpoint_pages,
+    )
+
+
+def _doc_parse_isolated(pdf_path: str, output_dir: str, page_start: Optional[int], page_end: Optional[int],
+                        progress: Optional[Callable[[int], None]], checkpoint_key: Optional[str]) -> str:
+    from mine_u.isolation import parse_executor
+    from mine_u.main import doc_parse
+
+    cfg = settings.isolation
+    parse_executor.configure(
+        max_rss_mb=cfg.max_rss_mb,
+        address_space_mb=cfg.address_space_mb,
+        cgroup_parent=cfg.cgroup_parent,
+        recycle_growth_mb=cfg.recycle_growth_mb,
+        poll_interval=cfg.poll_interval_seconds,
+        start_method=cfg.start_method,
+        initializer=init_parse_process,
+    )
+    return parse_executor.run(
+        doc_parse,
+        args=(pdf_path, output_dir, page_start, page_end),
+        kwargs={"checkpoint": _checkpoint(checkpoint_key), "checkpoint_pages": settings.mineru.checkpoint_pages},
+        progress=progress,
+    )
+
+
+def _parse_split(pdf_path: str, output_dir: str, page_start: int, page_end: int,
+                 progress: Optional[Callable[[int], None]], checkpoint_key: Optional[str],
+                 error: Exception) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    把超出内存上限的页码范围对半拆分后逐段解析，某一半仍然超限时继续拆分。
+    拆分点按检查点段长对齐，已完成的检查点段在重试时仍可复用。
+
+    Returns:
+        [(page_start, middle_json), ...]
+    """
+    from mine_u.isolation import ParseMemoryError as ChildMemoryError
+
+    pages = page_end - page_start + 1
+    if pages <= max(settings.isolation.min_split_pages, 1):
+        raise ParseMemoryError(page_start, page_end, str(error)) from error
+    step = max(settings.mineru.checkpoint_pages, 1)
+    middle = page_start + math.ceil(pages / 2 / step) * step - 1
+    if middle >= page_end:
+        middle = page_start + pages // 2 - 1
+
+    fragments = []
+    for start, end in ((page_start, middle), (middle + 1, page_end)):
+        try:
+            path = _doc_parse_isolated(pdf_path, output_dir, start, end, progress, checkpoint_key)
+        except ChildMemoryError as e:
+            logger.warning(f"解析第 {start}-{end} 页仍超出内存上限，继续拆分: {e}")
+            fragments.extend(_parse_split(pdf_path, output_dir, start, end, progress, checkpoint_key, e))
+            continue
+        fragments.append((start, load_middle_json(path)))
+    return fragments
+
+
+def _skip_progress(progress: Optional[Callable[[int], None]], pages: int) -> Optional[Callable[[int], None]]:
+    """
+    拆分重试时，首次尝试中已完成的段从检查点恢复并再次上报进度，
+    这里吞掉最先上报的 pages 页 (即首次尝试已上报的页数)，避免进度重复累加。
+    """
+    if progress is None or pages <= 0:
+        return progress
+    skipped = [0]
+
+    def report(count: int) -> None:
+        swallowed = min(count, pages - skipped[0])
+        skipped[0] += swallowed
+        if count > swallowed:
+            progress(count - swallowed)
+
+    return report
+
+
+def init_parse_process() -> None:
+    """
+    解析子进程的初始化：按配置启用批量推理并预加载模型 (隔离模式下模型只在子进程中加载)。
+    """
+    cfg = settings.mineru
+    if cfg.batch_inference_enabled:
+        from mine_u.batch_scheduler import inference_scheduler
+
+        inference_scheduler.configure(
+            enabled=True, max_batch_pages=cfg.batch_max_pages, max_wait_seconds=cfg.batch_max_wait_seconds,
+        )
+    if cfg.preload_models:
+        from mine_u.model_pool import model_registry
+
+        try:
+            model_registry.preload(modes=cfg.preload_modes, lang=cfg.preload_lang,
+                                   config_file=cfg.model_config_file)
+        except Exception as e:
+            logger.error(f"解析子进程预加载 MinerU 模型失败: {e}", exc_info=True)
+
+
+def load_partial_result(file_digest: str, task_id: str) -> Optional[Dict[str, Any]]:
+    """
+    从检查点拼出已完成页面的结果，用于解析超时后保存部分结果。
+    分片之间、段之间可能有空缺，completed_ranges 给出实际包含的页码范围。
+
+    Returns:
+        {"middle_json": ..., "completed_ranges": [[page_start, page_end], ...]}；没有任何已完成的段时返回 None。
+    """
+    from mine_u.checkpoint import DocumentCheckpoint
+    from mine_u.middle_json import merge_middle_json as merge
+
+    completed = DocumentCheckpoint(_checkpoint_root(), _checkpoint_key(file_digest, task_id)).completed()
+    if not completed:
+        return None
+    return {
+        "middle_json": merge([(page_start, middle_json) for page_start, _, _, middle_json in completed]),
+        "completed_ranges": [[page_start, page_end] for page_start, page_end, _, _ in completed],
+    }
+
+
+def clear_checkpoints(file_digest: str, task_id: str) -> None:
+    """任务的最终结果写入后删除该任务的检查点，同一文档其他任务的检查点不受影响。"""
+    from mine_u.checkpoint import DocumentCheckpoint
+
+    DocumentCheckpoint(_checkpoint_root(), _checkpoint_key(file_digest, task_id)).clear()
+
+
+def purge_checkpoints() -> int:
+    """删除过期的检查点，包括旧解析器版本留下的全部检查点。"""
+    from mine_u.checkpoint import purge_stale
+
+    removed = purge_stale(_checkpoint_root(), settings.mineru.checkpoint_ttl_seconds)
+    root = settings.mineru.checkpoint_dir
+    if os.path.isdir(root):
+        for version in os.listdir(root):
+            if version != settings.cache.parser_version:
+                removed += purge_stale(os.path.join(root, version), 0)
+    return removed
+
+
+def purge_outputs() -> int:
+    """
+    删除超过 storage.output_ttl_seconds 的任务输出：共享存储中的中间 json 和图片，
+    以及 worker 异常退出时残留的本地输出目录。
+    """
+    from mine_u.checkpoint import purge_stale
+
+    ttl = settings.storage.output_ttl_seconds
+    return purge_output_blobs(blob_store, ttl) + purge_stale(settings.mineru.output_dir, ttl)
+
+
+def load_middle_json(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def publish_output(task_id: str, output_dir: str, middle_json_path: str, name: str) -> str:
+    """
+    把 MinerU 输出目录中的中间 json 和图片上传到共享存储，随后删除本地目录。
+    图片名由内容摘要生成，同一任务的各分片共用 outputs/<task_id>/images/ 目录。
+
+    Returns:
+        中间 json 的存储键 (outputs/<task_id>/<name>)。
+    """
+    image_dir = os.path.join(output_dir, "images")
+    if os.path.isdir(image_dir):
+        for image in os.listdir(image_dir):
+            blob_store.put_file(output_key(task_id, f"images/{image}"), os.path.join(image_dir, image))
+    key = output_key(task_id, name)
+    blob_store.put_file(key, middle_json_path)
+    shutil.rmtree(output_dir, ignore_errors=True)
+    return key
+
+
+def load_output(key: str) -> Dict[str, Any]:
+    """从共享存储读取中间 json。"""
+    return json.loads(b"".join(blob_store.iter_chunks(key)))
+
+
+def merge_middle_json(fragments: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    合并各分片的 middle json。
+
+    每个分片的 page_idx 都从 0 开始，合并时加上分片的起始页码，
+    还原为原文档中的页码。与 doc_parse 内部合并混合解析结果共用同一实现。
+
+    Args:
+        fragments: [(page_start, middle_json), ...]，顺序不限。
+    """
+    from mine_u.middle_json import merge_middle_json as merge
+
+    return merge(fragments)
+
+
+def write_merged_middle_json(task_id: str, original_filename: str, merged: Dict[str, Any]) -> str:
+    """把合并后的结果写入共享存储，返回存储键。"""
+    name_without_suff = os.path.basename(original_filename).split(".")[0]
+    key = output_key(task_id, f"{name_without_suff}_middle.json")
+    blob_store.put_stream(key, [json.dumps(merged, ensure_ascii=False).encode("utf-8")])
+    logger.info(f"任务 {task_id} 的合并结果已写入: {key} (共 {len(merged['pdf_info'])} 页)")
+    return key
@@ -1,9 +1,12 @@
 # src/pdf_extractor/services/parser_service.py
 
 import fitz  # PyMuPDF
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence
 
+from ..core.config import settings
 from ..core.logger import logger
+from .heading_detector import HeadingDetector, HeadingDetectorConfig
+from .table_extractor import NativeTableExtractor, TableExtractorConfig
 
 
 class PDFParserService:
@@ -67,4 +70,95 @@ class PDFParserService:
             })
 
         logger.info(f"成功从 '{pdf_path}' 提取了 {len(formatted_toc)} 个目录条目。")
-        return formatted_toc
\ No newline at end of file
+        return formatted_toc
+
+    def extract_tables(self, pdf_path: str, pages: Optional[Sequence[int]] = None,
+                       results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        使用原生引擎从PDF的文本层和矢量层中提取表格，不依赖 OCR 或版面模型，
+        适用于带有可用文本层的电子版文档。
+
+        Args:
+            pdf_path (str): PDF文件的绝对路径。
+            pages: 需要处理的页码 (从 0 开始)；为空时处理全部页面。
+            results: 给定时表格逐页追加到该列表 (见 NativeTableExtractor.extract)。
+
+        Returns:
+            一个字典列表，每个字典代表一个表格。
+            示例:
+            [
+                {"page": 3, "bbox": [72.0, 100.5, 520.0, 300.0], "n_rows": 5, "n_cols": 3,
+                 "method": "lines", "rows": [["名称", "数量", "单价"], ...]},
+                ...
+            ]
+
+        Raises:
+            ValueError: 如果文件路径无法作为有效的PDF打开。
+        """
+        logger.info(f"尝试从 '{pdf_path}' 提取表格...")
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            logger.error(f"无法打开或读取PDF文件 '{pdf_path}': {e}", exc_info=True)
+            raise ValueError(f"无法打开PDF文件: {pdf_path}") from e
+
+        cfg = settings.tables
+        extractor = NativeTableExtractor(TableExtractorConfig(
+            snap_tolerance=cfg.snap_tolerance,
+            min_rows=cfg.min_rows,
+            min_cols=cfg.min_cols,
+            text_min_rows=cfg.text_min_rows,
+            max_segments_per_page=cfg.max_segments_per_page,
+        ))
+        try:
+            tables = extractor.extract(doc, pages, results)
+        finally:
+            doc.close()
+
+        logger.info(f"成功从 '{pdf_path}' 提取了 {len(tables)} 个表格。")
+        return tables
+
+    def detect_titles(self, pdf_path: str) -> Dict[str, Any]:
+        """
+        提取文档的层级标题。有内嵌目录时直接使用目录 (置信度 1.0)，
+        否则根据文本层的字号、粗体统计推断标题及其层级，不依赖模型。
+
+        Args:
+            pdf_path (str): PDF文件的绝对路径。
+
+        Returns:
+            {"source": "outline" | "font_stats", "confidence": 0.0-1.0, "titles": [...]}，
+            titles 的格式与 get_toc 相同，font_stats 的条目额外带有 size 和 bold。
+            扫描件等没有文本层的文档置信度为 0。
+
+        Raises:
+            ValueError: 如果文件路径无法作为有效的PDF打开。
+        """
+        toc = self.get_toc(pdf_path)
+        if toc:
+            return {"source": "outline", "confidence": 1.0, "titles": toc}
+
+        try:
+            doc = fitz.open(pdf_path)
+        except Exception as e:
+            logger.error(f"无法打开或读取PDF文件 '{pdf_path}': {e}", exc_info=True)
+            raise ValueError(f"无法打开PDF文件: {pdf_path}") from e
+
+        cfg = settings.headings
+        detector = HeadingDetector(HeadingDetectorConfig(
+            size_ratio=cfg.size_ratio,
+            size_tolerance=cfg.size_tolerance,
+            max_levels=cfg.max_levels,
+            max_title_chars=cfg.max_title_chars,
+            repeat_page_ratio=cfg.repeat_page_ratio,
+        ))
+        try:
+            detected = detector.detect(doc)
+        finally:
+            doc.close()
+
+        logger.info(
+            f"从 '{pdf_path}' 的字体统计中检测到 {len(detected.titles)} 个标题 "
+            f"(置信度 {detected.confidence:.2f})。"
+        )
+        return detected.to_dict()
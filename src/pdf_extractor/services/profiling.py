@@ -0,0 +1,110 @@
+# src/pdf_extractor/services/profiling.py
+
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Optional
+
+from ..core.config import settings
+
+
+@dataclass
+class ProfileArtifact:
+    """
+    性能分析产生的一个文件。
+    """
+    name: str
+    content_type: str
+    data: bytes
+
+
+def should_profile(requested: bool = False) -> bool:
+    """请求显式开启，或按 profiling.sample_rate 抽样。"""
+    if requested:
+        return True
+    rate = settings.profiling.sample_rate
+    return rate > 0 and random.random() < rate
+
+
+class TaskProfiler:
+    """
+    任务级性能分析器：cProfile 记录函数调用耗时，tracemalloc 记录内存分配峰值和分配热点。
+
+    用法:
+        profiler = TaskProfiler(prefix="shard-0-9.")
+        with profiler:
+            ...
+        artifacts = profiler.artifacts()
+
+    cProfile 只统计当前线程；tracemalloc 统计整个进程的 Python 分配，
+    两者都有明显开销，因此只在显式开启或抽样命中的任务上使用。
+    """
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._profile = cProfile.Profile()
+        self._owns_tracemalloc = False
+        self._snapshot: Optional[tracemalloc.Snapshot] = None
+        self._peak_bytes = 0
+        self._wall_seconds = 0.0
+        self._start = 0.0
+
+    def __enter__(self) -> "TaskProfiler":
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(settings.profiling.tracemalloc_frames)
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._start = time.perf_counter()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._profile.disable()
+        self._wall_seconds = time.perf_counter() - self._start
+        _, self._peak_bytes = tracemalloc.get_traced_memory()
+        self._snapshot = tracemalloc.take_snapshot()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+
+    def _stats_text(self) -> str:
+        out = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.strip_dirs().sort_stats(pstats.SortKey.CUMULATIVE).print_stats(settings.profiling.top_n)
+        return out.getvalue()
+
+    def _memory_report(self) -> dict:
+        top = []
+        if self._snapshot is not None:
+            for stat in self._snapshot.statistics("traceback")[:settings.profiling.top_n]:
+                top.append({
+                    "size_bytes": stat.size,
+                    "count": stat.count,
+                    "traceback": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+                })
+        return {
+            "wall_seconds": self._wall_seconds,
+            "peak_traced_bytes": self._peak_bytes,
+            "top_allocations": top,
+        }
+
+    def artifacts(self) -> List[ProfileArtifact]:
+        """
+        - profile.pstats: 原始统计，可用 pstats / snakeviz 等工具加载
+        - profile.txt: 按累计耗时排序的前 top_n 个函数
+        - memory.json: 内存分配峰值和分配热点
+        """
+        self._profile.create_stats()
+        return [
+            ProfileArtifact(f"{self.prefix}profile.pstats", "application/octet-stream",
+                            marshal.dumps(self._profile.stats)),
+            ProfileArtifact(f"{self.prefix}profile.txt", "text/plain; charset=utf-8",
+                            self._stats_text().encode("utf-8")),
+            ProfileArtifact(f"{self.prefix}memory.json", "application/json",
+                            json.dumps(self._memory_report(), ensure_ascii=False).encode("utf-8")),
+        ]
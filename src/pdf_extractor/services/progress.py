@@ -0,0 +1,97 @@
+# src/pdf_extractor/services/progress.py
+
+import threading
+import time
+from typing import Callable, Dict
+
+from ..core.config import settings
+from ..core.exceptions import TaskCancelledError
+from ..core.logger import logger
+from ..crud.task import publish_task_event
+from ..crud.task import task as crud_task
+from ..db.session import get_db_with_commit
+
+
+class ProgressReporter:
+    """
+    合并写入任务进度。
+
+    解析过程中每完成一段页面就会上报一次进度增量，如果每次都写库，
+    大文档会产生大量小事务和 NOTIFY。这里把同一任务的增量累积在内存中，
+    距离上次写入超过 min_interval_seconds 时才在一个独立的短事务中写入并提交，
+    写入时才从连接池借用连接，提交后立即归还。
+
+    增量以原子的 progress = least(progress + delta, 1.0) 写入，
+    同一任务的多个分片在不同进程中上报也不会互相覆盖。
+    写入时发现任务已进入终态 (被取消、超时或其他分片已失败) 即可得知应停止解析。
+    """
+
+    def __init__(self, min_interval_seconds: float = 1.0):
+        self.min_interval_seconds = min_interval_seconds
+        self._pending: Dict[str, float] = {}
+        self._last_write: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def advance(self, task_id: str, delta: float) -> bool:
+        """
+        累积进度增量，距离上次写入足够久时立即写入。
+
+        Returns:
+            任务是否仍在执行；写入时发现任务已处于终态则返回 False。
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._pending[task_id] = self._pending.get(task_id, 0.0) + delta
+            due = now - self._last_write.get(task_id, 0.0) >= self.min_interval_seconds
+        return self.flush(task_id) if due else True
+
+    def callback(self, task_id: str, scale: float) -> Callable[[int], None]:
+        """
+        返回按页数上报的进度回调，供 mineru_service.run_doc_parse 使用。
+        scale 为每页对应的进度增量，例如 0.95 / page_count。
+        任务已处于终态时回调抛出 TaskCancelledError，解析在当前段结束后停止。
+        """
+        def report(pages: int) -> None:
+            if not self.advance(task_id, pages * scale):
+                raise TaskCancelledError(task_id)
+
+        return report
+
+    def flush(self, task_id: str) -> bool:
+        """
+        立即写入该任务累积的进度增量。写入失败只记录日志，不影响解析。
+
+        Returns:
+            任务是否仍在执行。
+        """
+        with self._lock:
+            delta = self._pending.pop(task_id, 0.0)
+            self._last_write[task_id] = time.monotonic()
+        if delta <= 0:
+            return True
+        try:
+            with get_db_with_commit() as db:
+                row = crud_task.advance_progress(db, id=task_id, delta=delta)
+                if row is None:
+                    return False
+                progress, status = row
+                publish_task_event(db, task_id=task_id, status=status, progress=progress)
+        except Exception as e:
+            logger.warning(f"任务 {task_id} 的进度写入失败: {e}")
+        return True
+
+    def discard(self, task_id: str) -> None:
+        """丢弃尚未写入的增量，在写入终态之前调用，避免迟到的进度覆盖最终状态。"""
+        with self._lock:
+            self._pending.pop(task_id, None)
+            self._last_write.pop(task_id, None)
+
+    def close(self, task_id: str) -> None:
+        """任务结束时写入剩余增量并释放该任务的记录。"""
+        self.flush(task_id)
+        with self._lock:
+            self._last_write.pop(task_id, None)
+
+
+# 每个 Worker 进程一个实例，线程池下由多个任务共享
+progress_reporter = ProgressReporter(min_interval_seconds=settings.events.progress_min_interval_seconds)
@@ -0,0 +1,178 @@
+# src/pdf_extractor/services/result_cache.py
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.logger import logger
+from ..crud import result_cache as crud_result_cache
+from ..schemas.task import TERMINAL_STATUSES, TaskStatus
+
+# 这些状态的任务不能再被复用，需要重新解析 (失败、被取消、超时只有部分结果)
+FAILED_STATUSES = TERMINAL_STATUSES - {TaskStatus.COMPLETED.value}
+
+
+def build_cache_key(file_digest: str, options: Optional[Dict[str, Any]] = None,
+                    parser_version: Optional[str] = None) -> str:
+    """
+    由文件摘要 + 解析器版本 + 解析参数生成缓存键。
+    参数以排序后的 JSON 参与哈希，保证相同参数得到相同的键。
+    """
+    parser_version = parser_version or settings.cache.parser_version
+    options_json = json.dumps(options or {}, sort_keys=True, separators=(",", ":"))
+    raw = f"{file_digest}|{parser_version}|{options_json}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResultCacheService:
+    """
+    内容寻址的结果缓存。
+
+    查询顺序：进程内 LRU -> PostgreSQL 索引表。
+    - LRU 只保存已完成任务的ID，命中时不需要访问数据库。
+    - 数据库查询通过一次 JOIN 同时取回缓存条目和任务状态。
+    """
+
+    def __init__(self, lru_size: int, ttl_seconds: int):
+        self.lru_size = lru_size
+        self.ttl_seconds = ttl_seconds
+        self._lru: "OrderedDict[str, tuple[UUID, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # --- 进程内 LRU ---
+    def _lru_get(self, cache_key: str) -> Optional[UUID]:
+        with self._lock:
+            item = self._lru.get(cache_key)
+            if item is None:
+                return None
+            task_id, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._lru[cache_key]
+                return None
+            self._lru.move_to_end(cache_key)
+            return task_id
+
+    def _lru_put(self, cache_key: str, task_id: UUID) -> None:
+        with self._lock:
+            self._lru[cache_key] = (task_id, time.monotonic() + self.ttl_seconds)
+            self._lru.move_to_end(cache_key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+    def _lru_discard(self, cache_key: str) -> None:
+        with self._lock:
+            self._lru.pop(cache_key, None)
+
+    def _resolve(self, rows: List[Tuple[Any, Any]]) -> Dict[str, UUID]:
+        """
+        处理数据库查询结果：跳过已失败、被取消或超时的任务，已完成的任务放入 LRU。
+        """
+        hits: Dict[str, UUID] = {}
+        for entry, db_task in rows:
+            if db_task.status in FAILED_STATUSES:
+                logger.info(f"缓存条目 {entry.cache_key} 指向的任务 {db_task.id} 已失败或未完成 (取消、超时)，忽略该条目。")
+                continue
+            # 只有结果不会再变化的任务才放入 LRU
+            if db_task.status == TaskStatus.COMPLETED.value:
+                self._lru_put(entry.cache_key, db_task.id)
+            hits[entry.cache_key] = db_task.id
+        return hits
+
+    @staticmethod
+    def _entry_rows(entries: List[Tuple[str, str, UUID]],
+                    options: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "cache_key": cache_key,
+                "file_digest": file_digest,
+                "parser_version": settings.cache.parser_version,
+                "options": options or {},
+                "task_id": task_id,
+            }
+            for cache_key, file_digest, task_id in entries
+        ]
+
+    # --- 对外接口 ---
+    async def lookup(self, db: AsyncSession, cache_key: str) -> Optional[UUID]:
+        """
+        查找可复用的任务ID。
+
+        Returns:
+            已完成或仍在处理中的任务ID；未命中或旧任务已失败时返回 None。
+        """
+        hits = await self.lookup_many(db, [cache_key])
+        return hits.get(cache_key)
+
+    async def lookup_many(self, db: AsyncSession, cache_keys: List[str]) -> Dict[str, UUID]:
+        """
+        批量查找可复用的任务。LRU 未命中的键通过一次数据库查询处理。
+
+        Returns:
+            {cache_key: task_id}，只包含命中的键。
+        """
+        if not settings.cache.enabled:
+            return {}
+
+        hits: Dict[str, UUID] = {}
+        missing = []
+        for cache_key in dict.fromkeys(cache_keys):
+            task_id = self._lru_get(cache_key)
+            if task_id is not None:
+                hits[cache_key] = task_id
+            else:
+                missing.append(cache_key)
+
+        if missing:
+            rows = await crud_result_cache.async_result_cache.get_many_with_task(
+                db, cache_keys=missing, ttl_seconds=self.ttl_seconds
+            )
+            hits.update(self._resolve(rows))
+        return hits
+
+    async def register(self, db: AsyncSession, *, cache_key: str, file_digest: str,
+                       options: Optional[Dict[str, Any]], task_id: UUID) -> None:
+        """
+        把新创建的任务登记为该缓存键的持有者。
+        后续相同内容的上传会直接关联到这个任务，即便它仍在处理中。
+        """
+        await self.register_many(db, entries=[(cache_key, file_digest, task_id)], options=options)
+
+    async def register_many(self, db: AsyncSession, *, entries: List[Tuple[str, str, UUID]],
+                            options: Optional[Dict[str, Any]]) -> None:
+        """
+        批量登记缓存条目。
+
+        Args:
+            entries: [(cache_key, file_digest, task_id), ...]
+        """
+        if not settings.cache.enabled or not entries:
+            return
+        await crud_result_cache.async_result_cache.upsert_many(
+            db, entries=self._entry_rows(entries, options)
+        )
+        for cache_key, _, _ in entries:
+            self._lru_discard(cache_key)
+
+    def evict(self, db: Session) -> int:
+        """按 TTL 和最大条目数淘汰数据库中的缓存条目。"""
+        removed = crud_result_cache.result_cache.evict(
+            db, ttl_seconds=self.ttl_seconds, max_entries=settings.cache.max_entries
+        )
+        with self._lock:
+            self._lru.clear()
+        return removed
+
+
+# 进程级单例
+result_cache_service = ResultCacheService(
+    lru_size=settings.cache.lru_size,
+    ttl_seconds=settings.cache.ttl_seconds,
+)
@@ -0,0 +1,167 @@
+# src/pdf_extractor/services/result_store.py
+
+import gzip
+import hashlib
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Tuple
+
+from ..core.config import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd 为可选依赖
+    zstandard = None
+
+CODEC_ZSTD = "zstd"
+CODEC_GZIP = "gzip"
+CODEC_IDENTITY = "identity"
+
+
+@dataclass
+class EncodedResult:
+    """
+    压缩后的任务结果。
+    """
+    codec: str
+    data: bytes
+    raw_size: int
+    etag: str
+
+
+def _preferred_codec() -> str:
+    if settings.result_store.codec == CODEC_ZSTD and zstandard is None:
+        return CODEC_GZIP
+    return settings.result_store.codec
+
+
+def compress(raw: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdCompressor(level=settings.result_store.zstd_level).compress(raw)
+    if codec == CODEC_GZIP:
+        return gzip.compress(raw, compresslevel=settings.result_store.gzip_level)
+    return raw
+
+
+def decompress(data: bytes, codec: str) -> bytes:
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("结果使用 zstd 压缩，但当前环境未安装 zstandard。")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == CODEC_GZIP:
+        return gzip.decompress(data)
+    return data
+
+
+def encode_result(result: Any) -> EncodedResult:
+    """
+    把结果序列化为紧凑 JSON 并压缩。ETag 基于未压缩内容计算，
+    因此与压缩格式无关。
+    """
+    raw = json.dumps(result, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    codec = _preferred_codec()
+    return EncodedResult(
+        codec=codec,
+        data=compress(raw, codec),
+        raw_size=len(raw),
+        etag=hashlib.sha256(raw).hexdigest(),
+    )
+
+
+def decode_result(data: bytes, codec: str) -> Any:
+    return json.loads(decompress(data, codec))
+
+
+class PageRanges:
+    """
+    页码集合，只保存合并后的闭区间，不展开为逐个页码，
+    因此 "0-999999999" 这样的参数也只占用一个区间。
+    """
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, ranges: Iterable[Tuple[int, int]]):
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [start for start, _ in merged]
+        self._ends = [end for _, end in merged]
+
+    @property
+    def ranges(self) -> List[Tuple[int, int]]:
+        return list(zip(self._starts, self._ends))
+
+    def __contains__(self, page: Any) -> bool:
+        if not isinstance(page, int):
+            return False
+        index = bisect_right(self._starts, page) - 1
+        return index >= 0 and page <= self._ends[index]
+
+
+def parse_page_spec(spec: Optional[str]) -> Optional[PageRanges]:
+    """
+    解析页码投影参数，例如 "0-9,12"。页码从 0 开始，与 middle json 的 page_idx 一致。
+
+    Raises:
+        ValueError: 参数格式不正确。
+    """
+    if not spec:
+        return None
+    ranges: List[Tuple[int, int]] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(v) for v in part.split("-", 1))
+            if start > end:
+                raise ValueError(f"无效的页码范围: {part}")
+            ranges.append((start, end))
+        else:
+            page = int(part)
+            ranges.append((page, page))
+    return PageRanges(ranges)
+
+
+def _filter_pages(obj: Any, pages: PageRanges) -> Any:
+    """
+    递归过滤结果中按页组织的列表 (元素为带 page_idx 的字典，例如 middle json 的 pdf_info)。
+    """
+    if isinstance(obj, dict):
+        return {key: _filter_pages(value, pages) for key, value in obj.items()}
+    if isinstance(obj, list):
+        if obj and all(isinstance(item, dict) and "page_idx" in item for item in obj):
+            return [item for item in obj if item["page_idx"] in pages]
+        return [_filter_pages(item, pages) for item in obj]
+    return obj
+
+
+def _project_fields(result: Any, fields: Iterable[str]) -> Any:
+    if not isinstance(result, dict):
+        return result
+    wanted: List[str] = [field for field in fields if field]
+    return {key: result[key] for key in wanted if key in result}
+
+
+def project_result(result: Any, fields: Optional[Iterable[str]] = None,
+                   pages: Optional[PageRanges] = None) -> Any:
+    """
+    对结果做字段和页码投影。
+    存储的结果形如 {"result": {...}}，字段投影作用于 "result" 内部的字段，外层结构保持不变。
+
+    Args:
+        fields: 需要保留的结果字段 (例如 middle_json、page_count)；为空时保留全部字段。
+        pages: 需要保留的页码；为空时保留全部页面。
+    """
+    if fields:
+        if isinstance(result, dict) and isinstance(result.get("result"), dict):
+            result = {**result, "result": _project_fields(result["result"], fields)}
+        else:
+            result = _project_fields(result, fields)
+    if pages is not None:
+        result = _filter_pages(result, pages)
+    return result
@@ -0,0 +1,89 @@
+# src/pdf_extractor/services/routing.py
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from ..core.config import settings
+
+LANE_INTERACTIVE = "interactive"
+LANE_STANDARD = "standard"
+LANE_LARGE = "large"
+LANE_BATCH = "batch"
+LANE_SHARD = "shard"
+
+LANES: List[str] = [LANE_INTERACTIVE, LANE_STANDARD, LANE_LARGE, LANE_BATCH, LANE_SHARD]
+
+
+@dataclass
+class Route:
+    """
+    任务的投递目标。
+    """
+    queue: str
+    priority: int
+    lane: str
+    # Celery 的软/硬时限 (秒)，关闭时限时为 None
+    soft_time_limit: Optional[int] = None
+    time_limit: Optional[int] = None
+
+
+def queue_name(lane: str) -> str:
+    """通道对应的 RabbitMQ 队列名，例如 pdf_parsing_queue.large"""
+    return f"{settings.rabbitmq.queue_name}.{lane}"
+
+
+def estimate_cost(page_count: Optional[int], scanned: bool) -> int:
+    """
+    以"折算页数"估算解析代价：扫描件需要 OCR，每页按 scanned_page_weight 计。
+    页数未知时按大文档处理，避免阻塞交互通道。
+    """
+    if page_count is None:
+        return settings.routing.large_min_cost
+    weight = settings.routing.scanned_page_weight if scanned else 1
+    return page_count * weight
+
+
+def time_limits(cost: Optional[int]) -> Tuple[Optional[int], Optional[int]]:
+    """
+    按折算页数计算 (软时限, 硬时限)，软时限不超过 max_pdf_parse_time_seconds；
+    cost 为 None (未做预检) 时直接使用该上限。
+    """
+    cfg = settings.deadlines
+    if not cfg.enabled:
+        return None, None
+    soft = settings.max_pdf_parse_time_seconds
+    if cost is not None:
+        soft = min(int(cfg.base_seconds + cfg.per_page_seconds * cost), soft)
+    return soft, soft + cfg.hard_grace_seconds
+
+
+def choose_route(page_count: Optional[int], size_bytes: int, scanned: bool, batch: bool = False) -> Route:
+    """
+    根据上传时的预检结果选择队列和优先级。
+
+    - 大文档进入 large 通道，无论来源是交互请求还是批量导入。
+    - 批量导入的其余文档进入 batch 通道，不与交互请求竞争。
+    - 交互请求按代价分为 interactive / standard 两个通道。
+    - 同一通道内代价越小优先级越高。
+    """
+    cfg = settings.routing
+    cost = estimate_cost(page_count, scanned)
+
+    if cost >= cfg.large_min_cost:
+        lane = LANE_LARGE
+    elif batch:
+        lane = LANE_BATCH
+    elif cost <= cfg.interactive_max_cost and size_bytes <= cfg.interactive_max_bytes:
+        lane = LANE_INTERACTIVE
+    else:
+        lane = LANE_STANDARD
+
+    priority = max(cfg.max_priority - cost // max(cfg.priority_step_cost, 1), 0)
+    soft, hard = time_limits(cost)
+    return Route(queue=queue_name(lane), priority=int(priority), lane=lane, soft_time_limit=soft, time_limit=hard)
+
+
+def default_route() -> Route:
+    soft, hard = time_limits(None)
+    return Route(queue=queue_name(LANE_STANDARD), priority=0, lane=LANE_STANDARD,
+                 soft_time_limit=soft, time_limit=hard)
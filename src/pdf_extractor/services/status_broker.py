@@ -0,0 +1,80 @@
+# src/pdf_extractor/services/status_broker.py
+
+import asyncio
+import json
+from typing import Any, Dict, Optional, Set
+
+import psycopg
+
+from ..core.config import settings
+from ..core.logger import logger
+
+
+class TaskStatusBroker:
+    """
+    把 PostgreSQL NOTIFY 推送的任务状态变更分发给订阅者。
+
+    每个 API 进程只维护一个 LISTEN 连接，所有 SSE 客户端共享它，
+    因此客户端数量不会增加数据库连接数或查询量。
+    """
+
+    def __init__(self, dsn: str, channel: str):
+        self.dsn = dsn
+        self.channel = channel
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def subscribe(self, task_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(task_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, task_id: str, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(task_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[task_id]
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            event: Dict[str, Any] = json.loads(payload)
+        except ValueError:
+            logger.warning(f"忽略无法解析的任务状态通知: {payload}")
+            return
+        for queue in self._subscribers.get(event.get("task_id"), ()):
+            queue.put_nowait(event)
+
+    async def _listen(self) -> None:
+        """
+        保持一个 LISTEN 连接，断开后自动重连。
+        """
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self.dsn, autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {self.channel}")
+                    logger.info(f"已开始监听任务状态频道: {self.channel}")
+                    async for notify in conn.notifies():
+                        self._dispatch(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"任务状态监听连接中断，将在 {settings.events.reconnect_delay_seconds}s 后重连: {e}")
+                await asyncio.sleep(settings.events.reconnect_delay_seconds)
+
+
+status_broker = TaskStatusBroker(dsn=settings.postgres.libpq_url, channel=settings.events.channel)
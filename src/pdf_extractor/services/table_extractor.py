@@ -0,0 +1,318 @@
+# src/pdf_extractor/services/table_extractor.py
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+
+# get_text("words") 返回的单词: (x0, y0, x1, y1, text, block_no, line_no, word_no)
+Word = Tuple[float, float, float, float, str, int, int, int]
+
+
+@dataclass
+class Segment:
+    """
+    水平或竖直的线段。水平线段: pos 为 y，start/end 为 x；竖直线段反之。
+    """
+    pos: float
+    start: float
+    end: float
+
+
+@dataclass
+class TableExtractorConfig:
+    # 坐标吸附容差 (pt)，用于合并几乎重合的线
+    snap_tolerance: float = 3.0
+    # 矩形的宽或高小于该值时视为一条线
+    line_max_thickness: float = 3.0
+    # 线段最短长度，过滤装饰性短线
+    min_segment_length: float = 8.0
+    # 表格至少需要的行列数
+    min_rows: int = 2
+    min_cols: int = 2
+    # 无框线表格至少需要的连续行数
+    text_min_rows: int = 3
+    # 单词间距超过 字高 * 该值 时视为分列
+    text_column_gap_ratio: float = 1.2
+    # 合并后的线段总数超过该值 (例如矢量图、地图) 时跳过框线表格检测，只做无框线检测
+    max_segments_per_page: int = 5000
+
+
+@dataclass
+class ExtractedTable:
+    page: int
+    bbox: Tuple[float, float, float, float]
+    rows: List[List[str]]
+    method: str
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "page": self.page,
+            "bbox": [round(v, 2) for v in self.bbox],
+            "n_rows": len(self.rows),
+            "n_cols": max((len(row) for row in self.rows), default=0),
+            "method": self.method,
+            "rows": self.rows,
+        }
+
+
+def _cluster(values: Sequence[float], tolerance: float) -> List[float]:
+    """把相近的坐标聚为一类，返回每类的均值 (升序)。"""
+    clusters: List[List[float]] = []
+    for value in sorted(values):
+        if clusters and value - clusters[-1][-1] <= tolerance:
+            clusters[-1].append(value)
+        else:
+            clusters.append([value])
+    return [sum(c) / len(c) for c in clusters]
+
+
+def _merge_segments(segments: List[Segment], tolerance: float) -> List[Segment]:
+    """合并位于同一直线上且相互重叠/相接的线段。"""
+    merged: List[Segment] = []
+    for seg in sorted(segments, key=lambda s: (round(s.pos / tolerance), s.start)):
+        last = merged[-1] if merged else None
+        if last and abs(last.pos - seg.pos) <= tolerance and seg.start <= last.end + tolerance:
+            last.end = max(last.end, seg.end)
+        else:
+            merged.append(Segment(seg.pos, seg.start, seg.end))
+    return merged
+
+
+class NativeTableExtractor:
+    """
+    基于 PyMuPDF 文本层和矢量层的表格提取引擎，不依赖任何模型。
+
+    1. 有框线的表格：从 get_drawings() 中提取水平/竖直线段，
+       按相交关系分组为表格区域，由线的坐标确定行列网格，再把单词按中心点分配到单元格。
+    2. 无框线的表格：按 y 坐标把单词聚为文本行，按较大的水平间距切分单元格，
+       连续多行都被切分为多列且列起点对齐时，视为一个表格。
+    """
+
+    def __init__(self, config: Optional[TableExtractorConfig] = None):
+        self.config = config or TableExtractorConfig()
+
+    # --- 框线提取 ---
+    def _ruling_segments(self, page: fitz.Page) -> Tuple[List[Segment], List[Segment]]:
+        cfg = self.config
+        horizontal: List[Segment] = []
+        vertical: List[Segment] = []
+
+        def add_line(x0: float, y0: float, x1: float, y1: float) -> None:
+            if abs(y1 - y0) <= cfg.line_max_thickness and abs(x1 - x0) >= cfg.min_segment_length:
+                horizontal.append(Segment((y0 + y1) / 2, min(x0, x1), max(x0, x1)))
+            elif abs(x1 - x0) <= cfg.line_max_thickness and abs(y1 - y0) >= cfg.min_segment_length:
+                vertical.append(Segment((x0 + x1) / 2, min(y0, y1), max(y0, y1)))
+
+        for path in page.get_drawings():
+            for item in path["items"]:
+                kind = item[0]
+                if kind == "l":
+                    p1, p2 = item[1], item[2]
+                    add_line(p1.x, p1.y, p2.x, p2.y)
+                elif kind == "re":
+                    rect = item[1]
+                    if rect.height <= cfg.line_max_thickness:
+                        # 用细长矩形绘制的水平线
+                        add_line(rect.x0, rect.y0, rect.x1, rect.y1)
+                    elif rect.width <= cfg.line_max_thickness:
+                        # 用细长矩形绘制的竖直线
+                        add_line(rect.x0, rect.y0, rect.x1, rect.y1)
+                    else:
+                        # 普通矩形 (单元格边框) 拆为四条边
+                        add_line(rect.x0, rect.y0, rect.x1, rect.y0)
+                        add_line(rect.x0, rect.y1, rect.x1, rect.y1)
+                        add_line(rect.x0, rect.y0, rect.x0, rect.y1)
+                        add_line(rect.x1, rect.y0, rect.x1, rect.y1)
+
+        tol = cfg.snap_tolerance
+        return _merge_segments(horizontal, tol), _merge_segments(vertical, tol)
+
+    def _group_by_intersection(
+            self, horizontal: List[Segment], vertical: List[Segment]
+    ) -> List[Tuple[List[Segment], List[Segment]]]:
+        """
+        用并查集把相交的水平/竖直线段分组，每组对应一个候选表格。
+        竖直线段按 x 排序，每条水平线段只检查 x 落在其范围内的竖直线段 (二分查找)。
+        """
+        tol = self.config.snap_tolerance
+        parent = list(range(len(horizontal) + len(vertical)))
+        v_order = sorted(range(len(vertical)), key=lambda i: vertical[i].pos)
+        v_pos = [vertical[i].pos for i in v_order]
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for hi, h in enumerate(horizontal):
+            for vi in v_order[bisect_left(v_pos, h.start - tol):bisect_right(v_pos, h.end + tol)]:
+                v = vertical[vi]
+                if v.start - tol <= h.pos <= v.end + tol:
+                    parent[find(hi)] = find(len(horizontal) + vi)
+
+        groups: Dict[int, Tuple[List[Segment], List[Segment]]] = {}
+        for hi, h in enumerate(horizontal):
+            groups.setdefault(find(hi), ([], []))[0].append(h)
+        for vi, v in enumerate(vertical):
+            groups.setdefault(find(len(horizontal) + vi), ([], []))[1].append(v)
+        return list(groups.values())
+
+    @staticmethod
+    def _fill_grid(words: List[Word], xs: List[float], ys: List[float]) -> List[List[str]]:
+        """按单词中心点把单词分配到网格单元格中，同一单元格内按阅读顺序拼接。"""
+        n_rows, n_cols = len(ys) - 1, len(xs) - 1
+        cells: List[List[List[Word]]] = [[[] for _ in range(n_cols)] for _ in range(n_rows)]
+        for word in words:
+            cx, cy = (word[0] + word[2]) / 2, (word[1] + word[3]) / 2
+            if not (xs[0] <= cx <= xs[-1] and ys[0] <= cy <= ys[-1]):
+                continue
+            col = next((c for c in range(n_cols) if cx <= xs[c + 1]), n_cols - 1)
+            row = next((r for r in range(n_rows) if cy <= ys[r + 1]), n_rows - 1)
+            cells[row][col].append(word)
+        return [
+            [" ".join(w[4] for w in sorted(cell, key=lambda w: (w[5], w[6], w[7]))) for cell in row]
+            for row in cells
+        ]
+
+    def _ruled_tables(self, page: fitz.Page, words: List[Word]) -> List[ExtractedTable]:
+        cfg = self.config
+        horizontal, vertical = self._ruling_segments(page)
+        if len(horizontal) + len(vertical) > cfg.max_segments_per_page:
+            return []
+        tables = []
+        for h_group, v_group in self._group_by_intersection(horizontal, vertical):
+            ys = _cluster([h.pos for h in h_group], cfg.snap_tolerance)
+            xs = _cluster([v.pos for v in v_group], cfg.snap_tolerance)
+            if len(ys) - 1 < cfg.min_rows or len(xs) - 1 < cfg.min_cols:
+                continue
+            rows = self._fill_grid(words, xs, ys)
+            # 完全没有文本的网格通常是装饰性图形
+            if not any(any(cell for cell in row) for row in rows):
+                continue
+            tables.append(ExtractedTable(
+                page=page.number + 1,
+                bbox=(xs[0], ys[0], xs[-1], ys[-1]),
+                rows=rows,
+                method="lines",
+            ))
+        return tables
+
+    # --- 无框线表格 ---
+    def _text_rows(self, words: List[Word]) -> List[List[Word]]:
+        """按 y 中心把单词聚为文本行。"""
+        rows: List[List[Word]] = []
+        for word in sorted(words, key=lambda w: ((w[1] + w[3]) / 2, w[0])):
+            cy, height = (word[1] + word[3]) / 2, word[3] - word[1]
+            if rows:
+                last = rows[-1]
+                last_cy = sum((w[1] + w[3]) / 2 for w in last) / len(last)
+                if abs(cy - last_cy) <= max(height, 1.0) * 0.5:
+                    last.append(word)
+                    continue
+            rows.append([word])
+        return [sorted(row, key=lambda w: w[0]) for row in rows]
+
+    def _split_cells(self, row: List[Word]) -> List[List[Word]]:
+        """水平间距明显大于词间距的位置视为列分隔。"""
+        cells: List[List[Word]] = [[row[0]]]
+        for prev, word in zip(row, row[1:]):
+            gap = word[0] - prev[2]
+            if gap > (prev[3] - prev[1]) * self.config.text_column_gap_ratio:
+                cells.append([word])
+            else:
+                cells[-1].append(word)
+        return cells
+
+    def _text_tables(self, page: fitz.Page, words: List[Word],
+                     occupied: List[fitz.Rect]) -> List[ExtractedTable]:
+        cfg = self.config
+        free_words = [
+            w for w in words
+            if not any(rect.contains(fitz.Point((w[0] + w[2]) / 2, (w[1] + w[3]) / 2)) for rect in occupied)
+        ]
+        if not free_words:
+            return []
+
+        # 连续的多列文本行组成候选块
+        blocks: List[List[List[List[Word]]]] = []
+        current: List[List[List[Word]]] = []
+        last_bottom: Optional[float] = None
+        for row in self._text_rows(free_words):
+            cells = self._split_cells(row)
+            top = min(w[1] for w in row)
+            height = max(w[3] - w[1] for w in row)
+            adjacent = last_bottom is not None and top - last_bottom <= height * 1.5
+            if len(cells) >= cfg.min_cols and (not current or adjacent):
+                current.append(cells)
+            else:
+                if len(current) >= cfg.text_min_rows:
+                    blocks.append(current)
+                current = [cells] if len(cells) >= cfg.min_cols else []
+            last_bottom = max(w[3] for w in row)
+        if len(current) >= cfg.text_min_rows:
+            blocks.append(current)
+
+        tables = []
+        for block in blocks:
+            starts = [cell[0][0] for cells in block for cell in cells]
+            anchors = _cluster(starts, cfg.snap_tolerance * 3)
+            # 只保留在至少一半的行中出现的列起点
+            anchors = [
+                a for a in anchors
+                if sum(1 for cells in block if any(abs(c[0][0] - a) <= cfg.snap_tolerance * 3 for c in cells))
+                >= len(block) / 2
+            ]
+            if len(anchors) < cfg.min_cols:
+                continue
+            rows = []
+            for cells in block:
+                row = [""] * len(anchors)
+                for cell in cells:
+                    col = max(
+                        (i for i, a in enumerate(anchors) if a <= cell[0][0] + cfg.snap_tolerance * 3),
+                        default=0,
+                    )
+                    text = " ".join(w[4] for w in cell)
+                    row[col] = f"{row[col]} {text}".strip()
+                rows.append(row)
+            all_words = [w for cells in block for cell in cells for w in cell]
+            tables.append(ExtractedTable(
+                page=page.number + 1,
+                bbox=(
+                    min(w[0] for w in all_words), min(w[1] for w in all_words),
+                    max(w[2] for w in all_words), max(w[3] for w in all_words),
+                ),
+                rows=rows,
+                method="text",
+            ))
+        return tables
+
+    # --- 对外接口 ---
+    def extract_page(self, page: fitz.Page) -> List[ExtractedTable]:
+        words: List[Word] = page.get_text("words")
+        if not words:
+            return []
+        tables = self._ruled_tables(page, words)
+        occupied = [fitz.Rect(t.bbox) for t in tables]
+        tables.extend(self._text_tables(page, words, occupied))
+        return sorted(tables, key=lambda t: (t.bbox[1], t.bbox[0]))
+
+    def extract(self, doc: fitz.Document, pages: Optional[Sequence[int]] = None,
+                results: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        提取文档 (或指定页) 中的表格。
+
+        Args:
+            pages: 需要处理的页码 (从 0 开始)；为空时处理全部页面。
+            results: 给定时表格逐页追加到该列表，提取被中断 (例如软时限) 后调用方仍能拿到已完成页面的表格。
+        """
+        page_numbers = pages if pages is not None else range(doc.page_count)
+        if results is None:
+            results = []
+        for number in page_numbers:
+            results.extend(table.to_dict() for table in self.extract_page(doc[number]))
+        return results
@@ -0,0 +1,162 @@
+# src/pdf_extractor/services/upload_service.py
+
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Tuple
+
+import fitz  # PyMuPDF
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from ..core.exceptions import UploadTooLargeError
+from ..core.logger import logger
+from ..core.metrics import STAGE_UPLOAD_WRITE, UPLOAD_BYTES_TOTAL, stage_timer
+from .blob_store import blob_store, upload_key
+
+
+# 文本层探测时最多抽样的页数，以及判定为"有文本"的最少字符数
+TEXT_PROBE_PAGES = 5
+TEXT_PROBE_MIN_CHARS = 50
+
+
+@dataclass
+class StoredUpload:
+    """
+    已经落盘的上传文件信息。
+    path 为 API 节点上的临时文件；publish_upload 之后文件移入共享存储，key 为其存储键。
+    """
+    path: str
+    size: int
+    sha256: str
+    page_count: Optional[int]
+    # 抽样页面中带有文本层的比例，用于粗略区分电子版和扫描件
+    text_ratio: Optional[float] = None
+    key: Optional[str] = None
+
+    @property
+    def is_scanned(self) -> bool:
+        return self.text_ratio is not None and self.text_ratio < 0.5
+
+
+def _write_chunk(out: BinaryIO, digest: "hashlib._Hash", chunk: bytes) -> None:
+    """在线程池中执行：更新摘要并把数据块写入磁盘。"""
+    digest.update(chunk)
+    out.write(chunk)
+
+
+def file_sha256(path: str) -> str:
+    """分块计算文件的 SHA-256，用于消息中缺少上传时摘要的任务。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(settings.upload.chunk_size_bytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def probe_page_count(pdf_path: str) -> Optional[int]:
+    """
+    只读取 xref 获取页数，不会解析页面内容。
+    文件无法作为 PDF 打开时返回 None，由后续流程决定如何处理。
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            return doc.page_count
+    except Exception as e:
+        logger.warning(f"页数探测失败 '{pdf_path}': {e}")
+        return None
+
+
+def probe_pdf(pdf_path: str) -> Tuple[Optional[int], Optional[float]]:
+    """
+    上传时的轻量预检：页数 + 抽样页面的文本层比例。
+    只读取少量页面的文本，耗时与文档总页数基本无关。
+
+    Returns:
+        (page_count, text_ratio)；文件无法打开时均为 None。
+    """
+    try:
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+            if page_count == 0:
+                return 0, None
+            # 在文档中均匀抽样，避免只看封面
+            step = max(page_count // TEXT_PROBE_PAGES, 1)
+            sampled = list(range(0, page_count, step))[:TEXT_PROBE_PAGES]
+            text_pages = sum(
+                1 for index in sampled
+                if len(doc[index].get_text("text").strip()) >= TEXT_PROBE_MIN_CHARS
+            )
+            return page_count, text_pages / len(sampled)
+    except Exception as e:
+        logger.warning(f"PDF 预检失败 '{pdf_path}': {e}")
+        return None, None
+
+
+async def save_upload_file(
+        file: UploadFile,
+        max_size: Optional[int] = None,
+        chunk_size: Optional[int] = None,
+) -> StoredUpload:
+    """
+    以固定大小的块把 UploadFile 流式写入临时文件。
+
+    - 每次只在内存中保留一个块，内存峰值与文件大小无关。
+    - 写盘和 SHA-256 计算都放到线程池中执行，不阻塞事件循环。
+    - 累计字节数一旦超过 max_size 立即中断并删除临时文件。
+
+    Raises:
+        UploadTooLargeError: 文件超过允许的最大大小。
+    """
+    max_size = max_size or settings.upload.max_size_bytes
+    chunk_size = chunk_size or settings.upload.chunk_size_bytes
+
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_file_path = tempfile.mkstemp(suffix=".pdf", dir=settings.upload.tmp_dir)
+    try:
+        with stage_timer(STAGE_UPLOAD_WRITE), os.fdopen(fd, "wb") as temp_file:
+            while chunk := await file.read(chunk_size):
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadTooLargeError(max_size)
+                await run_in_threadpool(_write_chunk, temp_file, digest, chunk)
+    except BaseException:
+        # 写入失败或超限时清理半成品文件
+        try:
+            os.unlink(temp_file_path)
+        except OSError:
+            pass
+        raise
+
+    UPLOAD_BYTES_TOTAL.inc(size)
+    page_count, text_ratio = await run_in_threadpool(probe_pdf, temp_file_path)
+    return StoredUpload(
+        path=temp_file_path,
+        size=size,
+        sha256=digest.hexdigest(),
+        page_count=page_count,
+        text_ratio=text_ratio,
+    )
+
+
+async def publish_upload(stored: StoredUpload) -> str:
+    """
+    把临时文件流式写入共享存储 (按内容摘要寻址)，随后删除临时文件。
+    Worker 通过返回的存储键取回文件，不需要与 API 共享文件系统。
+
+    Returns:
+        存储键。
+    """
+    key = upload_key(stored.sha256)
+    try:
+        await run_in_threadpool(blob_store.put_file, key, stored.path)
+    finally:
+        try:
+            os.unlink(stored.path)
+        except OSError:
+            pass
+    stored.key = key
+    return key
@@ -1,54 +1,551 @@
 # src/pdf_extractor/worker/task.py
 
+import os
 import time
-from ..celery_app import celery_app
+from contextlib import ExitStack, contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from celery import chord
+from celery.exceptions import SoftTimeLimitExceeded
+
+from ..celery_app import celery_app, revoke_pdf_task
+from ..core.config import settings
+from ..core.exceptions import BlobNotFoundError, ParseMemoryError, TaskCancelledError
 from ..core.logger import logger
-from ..db.session import Session
+from ..core.metrics import (
+    PARSE_SECONDS_PER_PAGE,
+    STAGE_CLASSIFY,
+    STAGE_DB_WRITE,
+    STAGE_MERGE,
+    STAGE_NATIVE_PARSE,
+    STAGE_TITLES,
+    stage_timer,
+)
+from ..db.session import get_db, get_db_with_commit
+from ..crud.task import publish_task_event
+from ..crud.task import task as crud_task
+from ..crud.task_artifact import task_artifact as crud_task_artifact
+from ..crud.task_result import task_result as crud_task_result
 from ..db.models import Task
-from ..schemas.task import TaskStatus
-from ..services.parser_service import PDFParserService  # 1. 导入新的服务
+from ..schemas.task import TERMINAL_STATUSES, TaskStatus
+from ..services.parser_service import PDFParserService
+from ..services import mineru_service
+from ..services.blob_store import blob_store, purge_uploads
+from ..services.upload_service import file_sha256, probe_page_count, probe_pdf
+from ..services.result_cache import result_cache_service
+from ..services.result_store import encode_result
+from ..services.profiling import TaskProfiler, should_profile
+from ..services.progress import progress_reporter
+from ..services.routing import estimate_cost, time_limits
 
 
 @celery_app.task(name="process_pdf_file_task")
-def process_pdf_file(task_id: str, file_path: str, original_filename: str, db: Session = None):
+def process_pdf_file(task_id: str, file_path: Optional[str], original_filename: str,
+                     page_count: Optional[int] = None, text_ratio: Optional[float] = None,
+                     profile: bool = False, file_digest: Optional[str] = None, file_key: Optional[str] = None,
+                     titles_only: bool = False):
     """
     后台任务：使用 PDFParserService 处理PDF，并更新数据库状态。
+    带有可用文本层的文档直接使用原生引擎提取表格；
+    其余文档在启用 MinerU 时交给 MinerU，大文档会被切分为多个页码范围并行解析；
+    未启用 MinerU 时任务以 FAILURE 结束。
+
+    MinerU 按 file_digest (上传时计算的 SHA-256)、任务ID和页码段保存检查点，
+    Worker 重启后重新投递的任务从中断处继续，而不是从第一页开始重新解析。
+
+    投递时按页数设置软/硬时限 (见 routing.time_limits)：到达软时限时保存已完成部分的结果，
+    任务以 TIMEOUT 结束；任务被取消时尽快停止，不再写入任何状态。
+
+    profile 为 True (或按 profiling.sample_rate 抽样命中) 时记录性能分析数据，
+    作为任务产物保存，可通过 /api/tasks/{task_id}/artifacts 下载。
+
+    file_key 为上传文件在共享存储中的键，解析前取回到本地；
+    只带 file_path (本地路径) 的消息来自旧版本 API 或测试任务，直接使用该路径。
+
+    titles_only 为 True 时先走只提取标题的快速路径 (内嵌目录或字体统计，不加载模型)，
+    置信度低于 headings.min_confidence 时再按上述流程完整解析。
     """
+    if not should_profile(profile):
+        return _process_pdf_file(task_id, file_path, original_filename, page_count, text_ratio,
+                                 file_digest, False, file_key, titles_only)
+    with _profiled(task_id):
+        return _process_pdf_file(task_id, file_path, original_filename, page_count, text_ratio,
+                                 file_digest, True, file_key, titles_only)
+
+
+def _process_pdf_file(task_id: str, file_path: Optional[str], original_filename: str, page_count: Optional[int],
+                      text_ratio: Optional[float], file_digest: Optional[str], profile: bool,
+                      file_key: Optional[str] = None, titles_only: bool = False):
     logger.info(f"Worker 收到任务 {task_id}，处理文件: {original_filename}")
-    update_task_status(db, task_id, "STARTED")
+    # 开启 acks_late 后消息可能被重复投递，已进入终态的任务直接跳过
+    with get_db() as db:
+        current_status = db.query(Task.status).filter(Task.id == task_id).scalar()
+    if current_status in TERMINAL_STATUSES:
+        logger.info(f"任务 {task_id} 已处于终态 {current_status}，忽略重复投递。")
+        return {"task_id": task_id, "status": current_status}
+    # 独立提交，解析期间轮询方即可看到 STARTED
+    if not update_task_status(task_id, TaskStatus.STARTED.value, progress=0.0):
+        logger.info(f"任务 {task_id} 在开始前已被取消。")
+        return {"task_id": task_id, "status": TaskStatus.CANCELLED.value}
 
+    # 原生引擎逐步写入的结果，软时限到达时保存其中已完成的部分
+    partial: Dict[str, Any] = {}
+    engine = None
+    local_files = ExitStack()
     try:
-        # 2. 实例化并使用服务
-        parser = PDFParserService()
-
-        # 提取目录
-        # toc = parser.get_toc(file_path)
-        toc = {"dd":11}
-        # 您还可以调用其他服务方法，例如：
-        # tables = parser.extract_tables(file_path)
-        # text_content = parser.extract_text(file_path)
-
-        # 准备成功的结果
-        success_result = {"result": toc}
-        update_task_status(db, task_id, TaskStatus.COMPLETED.strip(), success_result)
+        file_path = local_files.enter_context(_local_file(file_path, file_key))
+        start = time.perf_counter()
+        titles = _detect_titles(file_path, page_count) if titles_only else None
+        if titles is None:
+            with stage_timer(STAGE_CLASSIFY):
+                native = _has_text_layer(file_path, text_ratio)
+        if titles is not None:
+            engine = "titles"
+            success_result = titles
+            _observe_per_page("titles", time.perf_counter() - start, success_result["result"]["page_count"])
+        elif native:
+            engine = "native"
+            with stage_timer(STAGE_NATIVE_PARSE):
+                success_result = _parse_native(file_path, page_count, partial)
+            _observe_per_page("native", time.perf_counter() - start, success_result["result"]["page_count"])
+        elif settings.mineru.enabled:
+            engine = "mineru"
+            if file_digest is None and settings.mineru.checkpoint_enabled:
+                file_digest = file_sha256(file_path)
+            success_result = _parse_with_mineru(task_id, file_path, original_filename, page_count,
+                                                file_digest, profile, file_key)
+            if success_result is None:
+                # 已拆分为分片子任务，最终状态由 merge_pdf_shards 写入
+                return {"sharded": True}
+            _observe_per_page("mineru", time.perf_counter() - start, success_result["result"]["page_count"])
+        else:
+            # 没有可用文本层的文档 (扫描件) 只能由 MinerU 解析；失败的任务不会被结果缓存复用
+            logger.error(f"任务 {task_id} 的文件 {original_filename} 没有可用的文本层，且未启用 MinerU。")
+            update_task_status(task_id, TaskStatus.FAILURE.value,
+                               error_message="文档没有可用的文本层 (扫描件)，需要启用 MinerU 才能解析。")
+            return {"task_id": task_id, "status": TaskStatus.FAILURE.value}
+        if not update_task_status(task_id, TaskStatus.COMPLETED.value, success_result):
+            logger.info(f"任务 {task_id} 已被取消，丢弃解析结果。")
+            return {"task_id": task_id, "status": TaskStatus.CANCELLED.value}
+        if file_digest is not None and settings.mineru.enabled:
+            # 最终结果已持久化，检查点不再需要
+            mineru_service.clear_checkpoints(file_digest, task_id)
         logger.info(f"任务 {task_id} 处理文件 {original_filename} 成功。")
-        return success_result
+        # 完整结果已写入 task_result 表，这里只返回摘要
+        return {"task_id": task_id, "status": TaskStatus.COMPLETED.value}
+
+    except SoftTimeLimitExceeded:
+        logger.warning(f"任务 {task_id} 超过解析时限，保存已完成部分的结果。")
+        update_task_status(
+            task_id, TaskStatus.TIMEOUT.value, _partial_result(task_id, engine, partial, file_digest, page_count),
+            error_message="解析超时，结果只包含时限内完成的部分。",
+        )
+        return {"task_id": task_id, "status": TaskStatus.TIMEOUT.value}
+
+    except TaskCancelledError:
+        logger.info(f"任务 {task_id} 已被取消，停止解析。")
+        return {"task_id": task_id, "status": TaskStatus.CANCELLED.value}
+
+    except BlobNotFoundError as be:
+        # 上传文件已被清理 (例如任务在队列中积压超过 storage.upload_ttl_seconds)，重试也无法成功
+        logger.error(f"任务 {task_id} 的上传文件不存在: {be}")
+        update_task_status(task_id, TaskStatus.FAILURE.value, error_message="上传的文件已不存在，请重新上传。")
+        return {"task_id": task_id, "status": TaskStatus.FAILURE.value}
+
+    except ParseMemoryError as me:
+        # 拆分到最小范围仍超出内存上限，重试也无法成功，只让该文档失败
+        logger.error(f"任务 {task_id} 解析超出内存上限: {me}")
+        update_task_status(task_id, TaskStatus.FAILURE.value, error_message=str(me))
+        return {"task_id": task_id, "status": TaskStatus.FAILURE.value}
 
     except ValueError as ve:  # 捕获我们自己定义的异常
         logger.error(f"任务 {task_id} 失败，文件 '{original_filename}' 解析错误: {ve}", exc_info=True)
-        failure_result = {"error": str(ve)}
-        update_task_status(db, task_id, "FAILURE", result=failure_result)
+        update_task_status(task_id, TaskStatus.FAILURE.value, error_message=str(ve))
         raise ve
 
     except Exception as e:
         logger.error(f"任务 {task_id} 发生未知错误，处理文件 {original_filename}: {e}", exc_info=True)
-        failure_result = {"error": "发生未知服务器错误，请查看日志。"}
-        update_task_status(db, task_id, "FAILURE", result=failure_result)
+        update_task_status(task_id, TaskStatus.FAILURE.value, error_message="发生未知服务器错误，请查看日志。")
         raise e
 
+    finally:
+        # 从共享存储取回的本地副本在任务结束时删除；分片各自取回，不依赖这里的副本
+        local_files.close()
+
+
+@contextmanager
+def _local_file(file_path: Optional[str], file_key: Optional[str]) -> Iterator[str]:
+    """解析用的本地文件：有存储键时从共享存储取回，否则直接使用消息中的本地路径。"""
+    if file_key is None:
+        yield file_path
+        return
+    with blob_store.local_copy(file_key) as path:
+        yield path
+
+
+@contextmanager
+def _profiled(task_id: str, prefix: str = "") -> Iterator[None]:
+    """
+    对代码块做性能分析，结束后 (无论成功与否) 把产物写入 task_artifact 表。
+    产物在独立的短事务中写入，写入失败只记录日志。
+    """
+    profiler = TaskProfiler(prefix=prefix)
+    try:
+        with profiler:
+            yield
+    finally:
+        try:
+            artifacts = profiler.artifacts()
+            with get_db_with_commit() as session:
+                for artifact in artifacts:
+                    crud_task_artifact.save(
+                        session, task_id=task_id, name=artifact.name,
+                        content_type=artifact.content_type, data=artifact.data,
+                    )
+            logger.info(f"任务 {task_id} 的性能分析数据已保存: {[a.name for a in artifacts]}")
+        except Exception as e:
+            logger.error(f"任务 {task_id} 的性能分析数据保存失败: {e}", exc_info=True)
+
+
+def _observe_per_page(engine: str, seconds: float, page_count: Optional[int]) -> None:
+    if page_count:
+        PARSE_SECONDS_PER_PAGE.labels(engine=engine).observe(seconds / page_count)
+
+
+def _has_text_layer(file_path: str, text_ratio: Optional[float]) -> bool:
+    """
+    判断文档是否有可用的文本层。优先使用上传时预检得到的 text_ratio，缺失时重新抽样。
+    """
+    if not settings.tables.native_enabled:
+        return False
+    if text_ratio is None:
+        _, text_ratio = probe_pdf(file_path)
+    return text_ratio is not None and text_ratio >= settings.tables.min_text_ratio
+
+
+def _detect_titles(file_path: str, page_count: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    只提取标题的快速路径：内嵌目录或字体统计，耗时与页数成正比且不加载任何模型。
+    置信度低于 headings.min_confidence 时返回 None，由后续流程按文本层判断走原生引擎或 MinerU 完整解析。
+    """
+    with stage_timer(STAGE_TITLES):
+        titles = PDFParserService().detect_titles(file_path)
+    if titles["confidence"] < settings.headings.min_confidence:
+        logger.info(f"标题检测置信度 {titles['confidence']} 低于阈值，改为完整解析。")
+        return None
+    return {
+        "result": {
+            "engine": "titles",
+            "page_count": page_count if page_count is not None else probe_page_count(file_path),
+            "titles": titles,
+        }
+    }
+
+
+def _parse_native(file_path: str, page_count: Optional[int], result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    使用原生引擎解析有文本层的文档：只读取文本层和矢量层，不加载任何模型。
+    结果逐步写入 result，解析被软时限中断时其中保留已完成的部分。
+    """
+    parser = PDFParserService()
+    result["engine"] = "native"
+    result["page_count"] = page_count if page_count is not None else probe_page_count(file_path)
+    result["toc"] = parser.get_toc(file_path)
+    result["titles"] = parser.detect_titles(file_path)
+    result["tables"] = []
+    parser.extract_tables(file_path, results=result["tables"])
+    return {"result": result}
+
+
+def _partial_result(task_id: str, engine: Optional[str], partial: Dict[str, Any], file_digest: Optional[str],
+                    page_count: Optional[int]) -> Optional[Dict[str, Any]]:
+    """
+    解析超时时可以保存的部分结果：原生引擎取已写入的字段，MinerU 从检查点拼出已完成的页面。
+    """
+    if engine == "native" and partial:
+        return {"result": {**partial, "partial": True}}
+    if engine == "mineru" and file_digest is not None:
+        restored = mineru_service.load_partial_result(file_digest, task_id)
+        if restored is not None:
+            return {"result": {**restored, "page_count": page_count, "partial": True}}
+    return None
+
+
+def _parse_with_mineru(task_id: str, file_path: str, original_filename: str, page_count: Optional[int],
+                       file_digest: Optional[str] = None, profile: bool = False,
+                       file_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    使用 MinerU 解析文档。
+
+    - 页数较少时在当前任务中直接解析，返回结果。
+    - 页数达到 shard_min_pages 时，按页码范围拆分为一个 chord：
+      每个分片作为独立的子任务并行解析，全部完成后由 merge_pdf_shards 合并。
+      任务状态改为 PROCESSING，这种情况下返回 None。
+    """
+    if page_count is None:
+        page_count = probe_page_count(file_path)
+    if page_count is None:
+        raise ValueError(f"无法打开PDF文件: {file_path}")
+
+    if page_count >= settings.mineru.shard_min_pages:
+        page_ranges = mineru_service.plan_page_ranges(page_count)
+        header = [
+            parse_pdf_shard.s(
+                task_id=task_id, file_path=None if file_key else file_path, page_start=start, page_end=end,
+                page_count=page_count, profile=profile, file_digest=file_digest, file_key=file_key,
+            ).set(**_shard_time_limits(end - start + 1))
+            for start, end in page_ranges
+        ]
+        callback = merge_pdf_shards.s(
+            task_id=task_id, original_filename=original_filename, page_count=page_count,
+            file_digest=file_digest,
+        ).on_error(fail_sharded_task.s(task_id=task_id, page_count=page_count, file_digest=file_digest))
+        # PROCESSING 表示已拆分、等待分片完成，expire_stale 对其使用更长的停滞判定时间
+        if not update_task_status(task_id, TaskStatus.PROCESSING.value):
+            raise TaskCancelledError(task_id)
+        chord(header)(callback)
+        logger.info(f"任务 {task_id} 共 {page_count} 页，已拆分为 {len(page_ranges)} 个分片并行解析。")
+        return None
+
+    output_dir = mineru_service.task_output_dir(task_id)
+    middle_json_path = mineru_service.run_doc_parse(
+        file_path, output_dir,
+        progress=progress_reporter.callback(task_id, 0.95 / max(page_count, 1)),
+        file_digest=file_digest, page_count=page_count, task_id=task_id,
+    )
+    middle_json = mineru_service.load_middle_json(middle_json_path)
+    name_without_suff = os.path.basename(original_filename).split(".")[0]
+    # 输出上传到共享存储，结果中只记录存储键，不记录 worker 本地路径
+    middle_json_key = mineru_service.publish_output(
+        task_id, output_dir, middle_json_path, f"{name_without_suff}_middle.json",
+    )
+    return {
+        "result": {
+            "middle_json_key": middle_json_key,
+            "page_count": page_count,
+            "shards": 1,
+            "middle_json": middle_json,
+        }
+    }
+
 
-def update_task_status(db, task_id: str, status: str, result: dict = None):
-    db.query(Task).filter(Task.id == task_id).update({
-        "status": status,
-        "result": result
-    })
+def _shard_time_limits(pages: int) -> Dict[str, int]:
+    """分片的时限按分片页数计算；走到 MinerU 的文档没有可用文本层，按扫描件折算。"""
+    soft, hard = time_limits(estimate_cost(pages, scanned=True))
+    if soft is None:
+        return {}
+    return {"soft_time_limit": soft, "time_limit": hard}
+
+
+# chord 依赖分片任务的结果，因此分片任务始终发布结果
+@celery_app.task(name="parse_pdf_shard_task", ignore_result=False)
+def parse_pdf_shard(task_id: str, file_path: Optional[str], page_start: int, page_end: int,
+                    page_count: int, profile: bool = False, file_digest: Optional[str] = None,
+                    file_key: Optional[str] = None):
+    """
+    分片子任务：解析文档中的一段页码范围。
+    middle json 上传到共享存储，只返回其存储键 (outputs/<task_id>/<起始页>-<结束页>.json)，
+    避免通过结果后端传递大对象，也不依赖执行分片的 Worker 的本地目录。
+    父任务开启性能分析时，每个分片单独记录，产物名以 shard-<起始页>-<结束页>. 为前缀。
+    """
+    if not profile:
+        return _parse_pdf_shard(task_id, file_path, page_start, page_end, page_count, file_digest, file_key)
+    with _profiled(task_id, prefix=f"shard-{page_start}-{page_end}."):
+        return _parse_pdf_shard(task_id, file_path, page_start, page_end, page_count, file_digest, file_key)
+
+
+def _parse_pdf_shard(task_id: str, file_path: Optional[str], page_start: int, page_end: int,
+                     page_count: int, file_digest: Optional[str], file_key: Optional[str] = None):
+    # 任务已被取消或其他分片已失败时，尚在队列中的分片直接结束；
+    # 否则刷新父任务的 updated_at，作为分片开始执行的心跳
+    with get_db_with_commit() as db:
+        running = crud_task.touch(db, id=task_id)
+    if not running:
+        raise TaskCancelledError(task_id)
+    logger.info(f"任务 {task_id} 开始解析分片 {page_start}-{page_end}")
+    # 分片按解析完成的页数上报进度，合并阶段留出最后一小段进度
+    try:
+        # 同一 Worker 上可能同时执行同一任务的多个分片，各自使用独立的本地目录
+        output_dir = os.path.join(mineru_service.task_output_dir(task_id), f"{page_start}-{page_end}")
+        with _local_file(file_path, file_key) as local_path:
+            middle_json_path = mineru_service.run_doc_parse(
+                local_path, output_dir, page_start, page_end,
+                progress=progress_reporter.callback(task_id, 0.95 / max(page_count, 1)),
+                file_digest=file_digest, task_id=task_id,
+            )
+    except SoftTimeLimitExceeded as e:
+        # chord 的错误回调收到的是包装后的 ChordError，超时需要在分片中直接记录
+        _finish_sharded_timeout(task_id, page_count, file_digest, e)
+        raise
+    # 合并步骤可能在另一台机器上执行，分片结果经共享存储传递
+    middle_json_key = mineru_service.publish_output(
+        task_id, output_dir, middle_json_path, f"{page_start}-{page_end}.json",
+    )
+    return {"page_start": page_start, "page_end": page_end, "middle_json_key": middle_json_key}
+
+
+@celery_app.task(name="merge_pdf_shards_task")
+def merge_pdf_shards(shard_results: List[Dict[str, Any]], task_id: str, original_filename: str,
+                     page_count: int, file_digest: Optional[str] = None):
+    """
+    chord 回调：从共享存储读取所有分片的 middle json，修正页码并写入最终结果。
+    """
+    with stage_timer(STAGE_MERGE):
+        fragments = [
+            (shard["page_start"], mineru_service.load_output(shard["middle_json_key"]))
+            for shard in shard_results
+        ]
+        merged = mineru_service.merge_middle_json(fragments)
+        middle_json_key = mineru_service.write_merged_middle_json(task_id, original_filename, merged)
+
+    success_result = {
+        "result": {
+            "middle_json_key": middle_json_key,
+            "page_count": page_count,
+            "shards": len(shard_results),
+            "middle_json": merged,
+        }
+    }
+    completed = update_task_status(task_id, TaskStatus.COMPLETED.value, success_result)
+    # 合并结果已单独保存，分片结果不再需要
+    for shard in shard_results:
+        blob_store.delete(shard["middle_json_key"])
+    if not completed:
+        logger.info(f"任务 {task_id} 已被取消，丢弃合并结果。")
+        return {"middle_json_key": middle_json_key}
+    if file_digest is not None:
+        mineru_service.clear_checkpoints(file_digest, task_id)
+    logger.info(f"任务 {task_id} 的 {len(shard_results)} 个分片已合并完成。")
+    return {"middle_json_key": middle_json_key}
+
+
+# 经过结果后端传回的异常不一定能还原为原始类型，按类名判断
+_TIMEOUT_ERRORS = {"SoftTimeLimitExceeded", "TimeLimitExceeded"}
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    """
+    chord 的错误回调收到的是 ChordError，原始异常只出现在其消息中
+    (例如 "Dependency <id> raised SoftTimeLimitExceeded(...)")。
+    """
+    if type(exc).__name__ in _TIMEOUT_ERRORS:
+        return True
+    message = str(exc)
+    return any(name in message for name in _TIMEOUT_ERRORS)
+
+
+def _finish_sharded_timeout(task_id: str, page_count: Optional[int], file_digest: Optional[str],
+                            exc: BaseException) -> None:
+    """分片超时：以 TIMEOUT 结束任务，从检查点保存已完成页面的结果，并终止其他分片。"""
+    logger.warning(f"任务 {task_id} 的分片超过解析时限: {exc}")
+    updated = update_task_status(
+        task_id, TaskStatus.TIMEOUT.value, _partial_result(task_id, "mineru", {}, file_digest, page_count),
+        error_message="解析超时，结果只包含时限内完成的部分。",
+    )
+    if updated:
+        revoke_pdf_task(task_id)
+
+
+@celery_app.task(name="fail_sharded_task")
+def fail_sharded_task(request, exc, traceback, task_id: str, page_count: Optional[int] = None,
+                      file_digest: Optional[str] = None):
+    """
+    chord 的错误回调：任一分片失败时结束整个任务，并终止仍在执行的其他分片。
+    分片超时通常已由分片自身记录为 TIMEOUT (见 _parse_pdf_shard)，这里只处理
+    硬时限等分片来不及记录的情况；任务已处于终态 (取消、超时) 时状态不会被覆盖。
+    """
+    if _is_timeout(exc):
+        _finish_sharded_timeout(task_id, page_count, file_digest, exc)
+        return
+    logger.error(f"任务 {task_id} 的分片解析失败: {exc}")
+    if update_task_status(task_id, TaskStatus.FAILURE.value, error_message=str(exc)):
+        revoke_pdf_task(task_id)
+
+
+def update_task_status(task_id: str, status: str, result: dict = None, progress: float = None,
+                       error_message: str = None) -> bool:
+    """
+    更新任务状态。在独立的短事务中写入并立即提交，只在写入期间占用数据库连接。
+    结果写入独立的 task_result 表 (压缩存储)，
+    task 表只更新状态、进度等小字段，避免每次更新都重写大对象。
+
+    已进入终态 (例如被用户取消) 的任务不会被覆盖。
+
+    Returns:
+        是否写入成功；任务已处于终态时返回 False。
+    """
+    values = {"status": status}
+    if progress is None and status == TaskStatus.COMPLETED.value:
+        progress = 1.0
+    if progress is not None:
+        values["progress"] = progress
+    if error_message is not None:
+        values["error_message"] = error_message
+    if status in TERMINAL_STATUSES:
+        # 终态写入之后不应再有进度更新
+        progress_reporter.discard(task_id)
+    # 压缩在借用连接之前完成
+    encoded = encode_result(result) if result is not None else None
+    with stage_timer(STAGE_DB_WRITE), get_db_with_commit() as db:
+        if not crud_task.update_status(db, id=task_id, values=values):
+            return False
+        if encoded is not None:
+            crud_task_result.save(db, task_id=task_id, encoded=encoded)
+        # 在同一事务中发布通知，提交后 SSE 客户端即可收到
+        publish_task_event(db, task_id=task_id, status=status, progress=progress)
+    return True
+
+
+@celery_app.task(name="evict_result_cache_task")
+def evict_result_cache():
+    """
+    周期任务：按 TTL 和最大条目数淘汰结果缓存索引。
+    """
+    with get_db_with_commit() as db:
+        removed = result_cache_service.evict(db)
+    logger.info(f"结果缓存淘汰完成，共删除 {removed} 个条目。")
+    return removed
+
+
+@celery_app.task(name="purge_checkpoints_task")
+def purge_checkpoints():
+    """
+    周期任务：删除过期的解析检查点。
+    """
+    removed = mineru_service.purge_checkpoints()
+    logger.info(f"解析检查点清理完成，共删除 {removed} 个文档的检查点。")
+    return removed
+
+
+@celery_app.task(name="gc_storage_task")
+def gc_storage():
+    """
+    周期任务：删除过期的上传文件和 MinerU 输出 (中间 json 与图片)。
+    上传文件以任务记录中的 file_key 为准：执行中的任务、结束未满 upload_ttl_seconds 的任务引用的文件保留。
+    """
+    ttl = settings.storage.upload_ttl_seconds
+    with get_db() as db:
+        keep = crud_task.referenced_file_keys(db, retention_seconds=ttl)
+    uploads = purge_uploads(blob_store, ttl, keep)
+    outputs = mineru_service.purge_outputs() if settings.mineru.enabled else 0
+    logger.info(f"存储清理完成，删除上传文件 {uploads} 个、MinerU 输出 {outputs} 个。")
+    return {"uploads": uploads, "outputs": outputs}
+
+
+@celery_app.task(name="expire_stale_tasks_task")
+def expire_stale_tasks():
+    """
+    周期任务：把长时间没有任何状态/进度更新的执行中任务标记为失败。
+    被硬时限强制终止的 Worker 子进程来不及写入终态，消息也已确认，不会再被重新投递。
+    """
+    with get_db_with_commit() as db:
+        expired = crud_task.expire_stale(
+            db, stale_after_seconds=settings.deadlines.stale_after_seconds,
+            sharded_stale_after_seconds=settings.deadlines.sharded_stale_after_seconds,
+            error_message="任务长时间没有进展，可能已被强制终止。",
+        )
+        for expired_id in expired:
+            publish_task_event(db, task_id=str(expired_id), status=TaskStatus.FAILURE.value)
+    if expired:
+        logger.warning(f"已将 {len(expired)} 个长时间没有进展的任务标记为失败: {expired}")
+    return len(expired)
@@ -0,0 +1,104 @@
+import uuid
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("celery")
+pytest.importorskip("psycopg")
+
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from pdf_extractor.crud import task as crud_task  # noqa: E402
+from pdf_extractor.db import models, session  # noqa: E402
+from pdf_extractor.schemas.task import TaskUpdate  # noqa: E402
+
+
+class _AsyncSession:
+    """记录调用顺序的异步会话替身。"""
+
+    def __init__(self, row=None):
+        self.row = row
+        self.calls = []
+        self.statements = []
+
+    async def __aenter__(self):
+        self.calls.append("open")
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.calls.append("close")
+
+    async def commit(self):
+        self.calls.append("commit")
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+    def add(self, obj):
+        self.calls.append("add")
+
+    async def flush(self):
+        self.calls.append("flush")
+
+    async def refresh(self, obj):
+        self.calls.append("refresh")
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        row = self.row
+
+        class _Result:
+            def first(self):
+                return row
+
+        return _Result()
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    db = _AsyncSession()
+    monkeypatch.setattr(session, "AsyncSessionLocal", lambda: db)
+    return db
+
+
+async def test_get_async_db_never_commits(fake_session):
+    async for db in session.get_async_db():
+        assert db is fake_session
+    assert fake_session.calls == ["open", "close"]
+
+
+async def test_get_async_db_with_commit_commits(fake_session):
+    dependency = session.get_async_db_with_commit()
+    await anext(dependency)
+    with pytest.raises(StopAsyncIteration):
+        await anext(dependency)
+    assert fake_session.calls == ["open", "commit", "close"]
+
+
+async def test_get_async_db_with_commit_rolls_back(fake_session):
+    dependency = session.get_async_db_with_commit()
+    await anext(dependency)
+    with pytest.raises(RuntimeError):
+        await dependency.athrow(RuntimeError("请求处理失败"))
+    assert fake_session.calls == ["open", "rollback", "close"]
+
+
+async def test_async_crud_does_not_commit():
+    db = _AsyncSession()
+    task = models.Task(filename="a.pdf", status="PENDING")
+    await crud_task.async_task.update(db, db_obj=task, obj_in=TaskUpdate(status="STARTED"))
+    assert task.status == "STARTED"
+    assert "commit" not in db.calls
+
+
+async def test_get_with_result_meta_single_outer_join():
+    task = models.Task(id=uuid.uuid4(), filename="a.pdf")
+    db = _AsyncSession(row=(task, 1024, "etag"))
+    assert await crud_task.async_task.get_with_result_meta(db, id=task.id) == (task, 1024, "etag")
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    # 只读取结果的元数据，不读取结果本身
+    assert "LEFT OUTER JOIN task_result" in sql
+    assert "task_result.data" not in sql
+
+    assert await crud_task.async_task.get_with_result_meta(_AsyncSession(), id=task.id) is None
@@ -0,0 +1,121 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("celery")
+pytest.importorskip("fastapi")
+pytest.importorskip("fitz")
+
+from pdf_extractor.api import task as api_task  # noqa: E402
+from pdf_extractor.crud import batch as crud_batch  # noqa: E402
+from pdf_extractor.crud import task as crud_task  # noqa: E402
+from pdf_extractor.schemas.task import TaskStatus  # noqa: E402
+from pdf_extractor.services.upload_service import StoredUpload  # noqa: E402
+
+
+def test_new_task_positions_skips_cached_and_duplicates():
+    cached = {"k2": uuid.uuid4()}
+    # 批次内内容相同的文件只新建一个任务，命中缓存的文件不新建任务
+    assert api_task._new_task_positions(["k1", "k2", "k1", "k3"], cached) == {"k1": 0, "k3": 3}
+
+
+def test_item_rows_keep_upload_order():
+    batch_id, first, second = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    rows = crud_batch._item_rows(batch_id, [(first, "a.pdf"), (second, "b.pdf"), (first, "c.pdf")])
+    assert [(row["position"], row["task_id"], row["filename"]) for row in rows] == [
+        (0, first, "a.pdf"), (1, second, "b.pdf"), (2, first, "c.pdf"),
+    ]
+    assert {row["batch_id"] for row in rows} == {batch_id}
+
+
+async def test_batch_progress_counts_terminal_statuses(monkeypatch):
+    batch_id = uuid.uuid4()
+
+    async def get(db, id):
+        return SimpleNamespace(id=id, file_count=4)
+
+    async def get_status_counts(db, batch_id):
+        return {TaskStatus.COMPLETED.value: 2, TaskStatus.FAILURE.value: 1, TaskStatus.STARTED.value: 1}
+
+    monkeypatch.setattr(crud_batch.async_batch, "get", get)
+    monkeypatch.setattr(crud_batch.async_batch, "get_status_counts", get_status_counts)
+    progress = await api_task.get_batch_progress(batch_id, db=None)
+    assert progress["finished"] == 3
+    assert progress["progress"] == 0.75
+
+
+class _Db:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+async def test_batch_upload_creates_one_task_per_new_content(monkeypatch, tmp_path):
+    cached_id = uuid.uuid4()
+    digests = {"a.pdf": "a" * 64, "b.pdf": "b" * 64, "a-copy.pdf": "a" * 64, "c.pdf": "c" * 64}
+
+    async def save_upload_file(file):
+        path = tmp_path / file.filename
+        path.write_bytes(b"%PDF")
+        return StoredUpload(path=str(path), size=4, sha256=digests[file.filename], page_count=2, text_ratio=1.0)
+
+    published = []
+
+    async def publish_upload(stored):
+        published.append(stored.sha256)
+        stored.key = f"uploads/{stored.sha256[:2]}/{stored.sha256}.pdf"
+        return stored.key
+
+    async def lookup_many(db, cache_keys):
+        # c.pdf 的内容已处理过
+        return {key: cached_id for key in cache_keys if key == api_task.build_cache_key("c" * 64, {})}
+
+    registered = []
+
+    async def register_many(db, entries, options):
+        registered.extend(entries)
+
+    created = {}
+
+    async def create_many(db, filenames, file_keys):
+        created.update(zip(filenames, file_keys, strict=True))
+        return [uuid.uuid4() for _ in filenames]
+
+    batch_items = []
+
+    async def create_with_items(db, items):
+        batch_items.extend(items)
+        return SimpleNamespace(id=uuid.uuid4())
+
+    dispatched = []
+    monkeypatch.setattr(api_task, "save_upload_file", save_upload_file)
+    monkeypatch.setattr(api_task, "publish_upload", publish_upload)
+    monkeypatch.setattr(api_task.result_cache_service, "lookup_many", lookup_many)
+    monkeypatch.setattr(api_task.result_cache_service, "register_many", register_many)
+    monkeypatch.setattr(crud_task.async_task, "create_many", create_many)
+    monkeypatch.setattr(crud_batch.async_batch, "create_with_items", create_with_items)
+    monkeypatch.setattr(api_task, "group", lambda signatures: SimpleNamespace(
+        apply_async=lambda: dispatched.extend(signatures)))
+
+    files = [SimpleNamespace(filename=name, content_type="application/pdf") for name in digests]
+    db = _Db()
+    response = await api_task.create_batch_upload_task(files=files, titles_only=False, db=db)
+
+    assert sorted(published) == ["a" * 64, "b" * 64]
+    assert list(created) == ["a.pdf", "b.pdf"]
+    assert len(registered) == 2
+    assert db.commits == 1
+    # 结果与上传的文件一一对应；重复内容复用同一任务
+    tasks = response["tasks"]
+    assert [task["cached"] for task in tasks] == [False, False, True, True]
+    assert tasks[0]["task_id"] == tasks[2]["task_id"]
+    assert tasks[3]["task_id"] == str(cached_id)
+    assert [task_id for task_id, _ in batch_items] == [uuid.UUID(task["task_id"]) for task in tasks]
+    assert [signature.kwargs["original_filename"] for signature in dispatched] == ["a.pdf", "b.pdf"]
+    # 复用已有任务的文件不再需要临时文件
+    assert not (tmp_path / "a-copy.pdf").exists() and not (tmp_path / "c.pdf").exists()
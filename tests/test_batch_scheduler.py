@@ -0,0 +1,93 @@
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from mine_u.batch_scheduler import BATCH_SIZE_ENV, InferenceScheduler, _Request
+
+
+class _Dataset:
+    def __init__(self, name, pages):
+        self.name = name
+        self.pages = pages
+        self._lang = None
+
+    def __len__(self):
+        return self.pages
+
+    def apply(self, fn, **kwargs):
+        return fn(self, **kwargs)
+
+
+@pytest.fixture
+def analyzed(monkeypatch):
+    """替换 magic-pdf 的推理入口，记录每一批的数据集"""
+    batches = []
+    # configure 会写入该环境变量，测试结束后恢复
+    monkeypatch.setenv(BATCH_SIZE_ENV, "64")
+
+    def batch_doc_analyze(datasets, parse_method, lang=None):
+        batches.append(([dataset.name for dataset in datasets], parse_method, lang))
+        return [f"{dataset.name}-result" for dataset in datasets]
+
+    def doc_analyze(dataset, ocr, lang):
+        batches.append(([dataset.name], ocr, lang))
+        return f"{dataset.name}-inline"
+
+    registry = SimpleNamespace(ensure_loaded=lambda ocr, lang: 0.0, record_inference=lambda seconds: None)
+    monkeypatch.setitem(sys.modules, "magic_pdf.model.doc_analyze_by_custom_model",
+                        SimpleNamespace(batch_doc_analyze=batch_doc_analyze, doc_analyze=doc_analyze))
+    monkeypatch.setitem(sys.modules, "mine_u.model_pool", SimpleNamespace(model_registry=registry))
+    return batches
+
+
+def test_disabled_scheduler_runs_inline(analyzed):
+    scheduler = InferenceScheduler(enabled=False)
+    dataset = _Dataset("a", 3)
+    assert scheduler.analyze(dataset, ocr=True, lang="ch") == "a-inline"
+    assert dataset._lang == "ch"
+    assert analyzed == [(["a"], True, "ch")]
+
+
+def test_take_respects_batch_size():
+    scheduler = InferenceScheduler(max_batch_pages=10)
+    key = (False, "ch")
+    scheduler._pending[key] = [_Request(_Dataset(name, pages)) for name, pages in [("a", 4), ("b", 5), ("c", 3)]]
+    assert [request.dataset.name for request in scheduler._take(key)] == ["a", "b"]
+    assert [request.dataset.name for request in scheduler._take(key)] == ["c"]
+    assert key not in scheduler._pending
+    # 单个请求超过批大小时单独成批
+    scheduler._pending[key] = [_Request(_Dataset("big", 30)), _Request(_Dataset("d", 1))]
+    assert [request.dataset.name for request in scheduler._take(key)] == ["big"]
+
+
+def test_concurrent_requests_share_a_batch(analyzed):
+    scheduler = InferenceScheduler()
+    scheduler.configure(enabled=True, max_batch_pages=8, max_wait_seconds=5.0)
+    # 凑满 8 页立即执行，不必等到 max_wait_seconds
+    futures = [scheduler.submit(_Dataset(name, 4), ocr=False, lang="ch") for name in ("a", "b")]
+    assert [future.result(timeout=2) for future in futures] == ["a-result", "b-result"]
+    assert analyzed == [(["a", "b"], "txt", "ch")]
+    assert scheduler.stats() == {"batches": 1, "batched_pages": 8, "batched_requests": 2}
+
+
+def test_partial_batch_runs_after_max_wait(analyzed):
+    scheduler = InferenceScheduler()
+    scheduler.configure(enabled=True, max_batch_pages=64, max_wait_seconds=0.05)
+    ocr = scheduler.submit(_Dataset("scan", 2), ocr=True, lang="ch")
+    txt = scheduler.submit(_Dataset("text", 2), ocr=False, lang="ch")
+    assert ocr.result(timeout=2) == "scan-result"
+    assert txt.result(timeout=2) == "text-result"
+    # 不同解析方式的请求不会合并到同一批
+    assert sorted(analyzed) == [(["scan"], "ocr", "ch"), (["text"], "txt", "ch")]
+
+
+def test_result_count_mismatch_fails_the_batch(analyzed, monkeypatch):
+    module = sys.modules["magic_pdf.model.doc_analyze_by_custom_model"]
+    monkeypatch.setattr(module, "batch_doc_analyze", lambda datasets, parse_method, lang=None: ["only-one"])
+    scheduler = InferenceScheduler()
+    scheduler.configure(enabled=True, max_batch_pages=4, max_wait_seconds=5.0)
+    futures = [scheduler.submit(_Dataset(name, 2), ocr=False, lang="ch") for name in ("a", "b")]
+    for future in futures:
+        with pytest.raises(ValueError):
+            future.result(timeout=2)
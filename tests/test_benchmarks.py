@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from benchmarks import corpus  # noqa: E402
+from benchmarks.__main__ import main  # noqa: E402
+from benchmarks.compare import compare_results, format_report  # noqa: E402
+
+
+def _results(**metrics):
+    return {"cases": [{"name": "probe/text-20", "metrics": metrics}, {"name": "skipped", "skipped": "ImportError"}]}
+
+
+def test_compare_results_direction():
+    current = _results(pages_per_sec=80.0, median_seconds=0.9, peak_rss_mb=100.0)
+    baseline = _results(pages_per_sec=100.0, median_seconds=1.0, peak_rss_mb=0)
+    comparisons = {c.metric: c for c in compare_results(current, baseline)}
+    # 吞吐下降 20% 记为变差，耗时下降记为改善；基线为 0 的指标不比较
+    assert comparisons["pages_per_sec"].change == pytest.approx(0.2)
+    assert comparisons["pages_per_sec"].regressed
+    assert comparisons["median_seconds"].change == pytest.approx(-0.1)
+    assert not comparisons["median_seconds"].regressed
+    assert "peak_rss_mb" not in comparisons
+    assert format_report(list(comparisons.values())).splitlines()[1].startswith("probe/text-20")
+
+
+def test_compare_command_exit_code(tmp_path, capsys):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(_results(pages_per_sec=100.0)))
+    current.write_text(json.dumps(_results(pages_per_sec=95.0)))
+    assert main(["compare", str(current), "--baseline", str(baseline)]) == 0
+    # 收紧阈值后同样的变化视为回归
+    assert main(["compare", str(current), "--baseline", str(baseline), "--threshold", "pages_per_sec=0.01"]) == 1
+    assert "发现 1 项性能回归" in capsys.readouterr().out
+
+
+def test_corpus_is_deterministic(tmp_path):
+    spec = corpus.CorpusSpec(corpus.KIND_MIXED, 4)
+    with corpus.build_document(spec) as first, corpus.build_document(spec) as second:
+        assert first.page_count == 4
+        assert [page.get_text() for page in first] == [page.get_text() for page in second]
+        # 第 2 页为扫描页，没有文本层
+        assert first[1].get_text().strip() == "" and first[1].get_images()
+    paths = corpus.ensure_corpus([spec], directory=str(tmp_path))
+    assert paths == {"mixed-4": str(tmp_path / spec.filename)}
+    with pytest.raises(ValueError):
+        corpus.build_document(corpus.CorpusSpec("unknown", 1))
@@ -0,0 +1,148 @@
+import os
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from pdf_extractor.core.exceptions import BlobNotFoundError  # noqa: E402
+from pdf_extractor.services.blob_store import (  # noqa: E402
+    BlobStore,
+    LocalBlobStore,
+    output_key,
+    purge_outputs,
+    purge_uploads,
+    upload_key,
+)
+from pdf_extractor.services import mineru_service  # noqa: E402
+
+DIGEST = "ab" + "0" * 62
+
+
+@pytest.fixture
+def store(tmp_path):
+    return LocalBlobStore(str(tmp_path / "blobs"))
+
+
+def test_upload_key():
+    assert upload_key(DIGEST) == f"uploads/ab/{DIGEST}.pdf"
+
+
+def test_put_and_read(store):
+    key = upload_key(DIGEST)
+    assert store.put_stream(key, [b"%PDF-", b"1.7", b"\n"]) == 9
+    assert store.exists(key)
+    assert store.size(key) == 9
+    assert b"".join(store.iter_chunks(key)) == b"%PDF-1.7\n"
+    # Range 读取包含 end，与 HTTP Range 一致
+    assert store.read_range(key, 1, 3) == b"PDF"
+    assert store.read_range(key, 5, 100) == b"1.7\n"
+
+
+def test_put_file(store, tmp_path):
+    source = tmp_path / "upload.pdf"
+    source.write_bytes(b"x" * 1000)
+    assert store.put_file("uploads/aa/file.pdf", str(source)) == 1000
+    assert store.size("uploads/aa/file.pdf") == 1000
+
+
+def test_failed_write_leaves_nothing(store):
+    def chunks():
+        yield b"partial"
+        raise RuntimeError("上传中断")
+
+    with pytest.raises(RuntimeError):
+        store.put_stream("uploads/aa/broken.pdf", chunks())
+    assert not store.exists("uploads/aa/broken.pdf")
+    assert list(store.list()) == []
+
+
+def test_missing_object(store):
+    key = "uploads/aa/missing.pdf"
+    assert store.size(key) is None
+    assert not store.exists(key)
+    with pytest.raises(BlobNotFoundError):
+        store.iter_chunks(key)
+    with pytest.raises(BlobNotFoundError):
+        store.read_range(key, 0, 1)
+    with pytest.raises(BlobNotFoundError):
+        with store.local_copy(key):
+            pass
+    store.delete(key)  # 不存在时不报错
+
+
+@pytest.mark.parametrize("key", ["../escape.pdf", "uploads/../../escape.pdf", ""])
+def test_rejects_keys_outside_root(store, key):
+    with pytest.raises(ValueError):
+        store.put_stream(key, [b"x"])
+
+
+def test_list_and_delete(store):
+    store.put_stream("uploads/aa/a.pdf", [b"a"])
+    store.put_stream("uploads/bb/b.pdf", [b"bb"])
+    store.put_stream("other/c.bin", [b"ccc"])
+    listed = {info.key: info.size for info in store.list("uploads/")}
+    assert listed == {"uploads/aa/a.pdf": 1, "uploads/bb/b.pdf": 2}
+    store.delete("uploads/aa/a.pdf")
+    assert [info.key for info in store.list("uploads/")] == ["uploads/bb/b.pdf"]
+
+
+def test_local_copy_uses_file_in_place(store):
+    store.put_stream("uploads/aa/a.pdf", [b"data"])
+    with store.local_copy("uploads/aa/a.pdf") as path:
+        assert path == store._path("uploads/aa/a.pdf")
+    assert store.exists("uploads/aa/a.pdf")
+
+
+def test_generic_local_copy_is_removed(store):
+    # 其他后端使用的通用实现：取回到临时文件，退出时删除
+    store.put_stream("uploads/aa/a.pdf", [b"data"])
+    with BlobStore.local_copy(store, "uploads/aa/a.pdf") as path:
+        assert path.endswith(".pdf")
+        with open(path, "rb") as f:
+            assert f.read() == b"data"
+    assert not os.path.exists(path)
+
+
+def test_purge_uploads(store):
+    for name in ("old", "kept", "fresh"):
+        store.put_stream(f"uploads/aa/{name}.pdf", [b"x"])
+    old = time.time() - 3600
+    for name in ("old", "kept"):
+        os.utime(store._path(f"uploads/aa/{name}.pdf"), (old, old))
+    removed = purge_uploads(store, 600, keep_keys={"uploads/aa/kept.pdf"})
+    assert removed == 1
+    assert sorted(info.key for info in store.list("uploads/")) == ["uploads/aa/fresh.pdf", "uploads/aa/kept.pdf"]
+
+
+def test_purge_outputs_leaves_uploads(store):
+    store.put_stream(output_key("t1", "doc_middle.json"), [b"{}"])
+    store.put_stream("uploads/aa/a.pdf", [b"x"])
+    old = time.time() - 3600
+    for key in (output_key("t1", "doc_middle.json"), "uploads/aa/a.pdf"):
+        os.utime(store._path(key), (old, old))
+    assert purge_outputs(store, 600) == 1
+    assert [info.key for info in store.list()] == ["uploads/aa/a.pdf"]
+
+
+def test_publish_output(store, tmp_path, monkeypatch):
+    monkeypatch.setattr(mineru_service, "blob_store", store)
+    output_dir = tmp_path / "out"
+    (output_dir / "images").mkdir(parents=True)
+    (output_dir / "images" / "abc.jpg").write_bytes(b"jpg")
+    middle_json = output_dir / "doc_0-9_middle.json"
+    middle_json.write_text('{"pdf_info": [{"page_idx": 0}]}', encoding="utf-8")
+
+    key = mineru_service.publish_output("t1", str(output_dir), str(middle_json), "0-9.json")
+    assert key == "outputs/t1/0-9.json"
+    assert mineru_service.load_output(key) == {"pdf_info": [{"page_idx": 0}]}
+    assert b"".join(store.iter_chunks("outputs/t1/images/abc.jpg")) == b"jpg"
+    # 上传后本地目录删除，其他机器上的合并步骤只依赖存储键
+    assert not output_dir.exists()
+
+
+def test_write_merged_middle_json(store, monkeypatch):
+    monkeypatch.setattr(mineru_service, "blob_store", store)
+    key = mineru_service.write_merged_middle_json("t1", "dir/报告.v2.pdf", {"pdf_info": []})
+    assert key == "outputs/t1/报告_middle.json"
+    assert mineru_service.load_output(key) == {"pdf_info": []}
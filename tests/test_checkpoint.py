@@ -0,0 +1,96 @@
+import os
+import time
+
+from mine_u.checkpoint import DONE_MARKER, DocumentCheckpoint, purge_stale, restore_images
+
+
+def _commit(checkpoint, page_start, page_end, ocr, middle_json, images=()):
+    staging = checkpoint.staging_dir(page_start, page_end, ocr)
+    for name in images:
+        with open(os.path.join(staging, "images", name), "wb") as f:
+            f.write(name.encode())
+    checkpoint.commit(staging, page_start, page_end, ocr, middle_json)
+    return staging
+
+
+def test_load_missing(tmp_path):
+    assert DocumentCheckpoint(str(tmp_path), "doc").load(0, 9, False) is None
+
+
+def test_commit_and_load(tmp_path):
+    checkpoint = DocumentCheckpoint(str(tmp_path), "doc")
+    staging = _commit(checkpoint, 0, 9, False, {"pdf_info": [{"page_idx": 0}]}, images=["a.jpg"])
+    assert not os.path.exists(staging)
+    assert checkpoint.load(0, 9, False) == {"pdf_info": [{"page_idx": 0}]}
+    # 解析方式不同的同一段是不同的检查点
+    assert checkpoint.load(0, 9, True) is None
+    assert os.listdir(checkpoint.image_dir(0, 9, False)) == ["a.jpg"]
+
+
+def test_interrupted_commit_is_ignored_and_replaced(tmp_path):
+    checkpoint = DocumentCheckpoint(str(tmp_path), "doc")
+    _commit(checkpoint, 0, 9, False, {"v": 1})
+    # 模拟 rename 之后、写入 DONE 之前被杀掉
+    os.unlink(os.path.join(checkpoint.doc_dir, "0-9-txt", DONE_MARKER))
+    assert checkpoint.load(0, 9, False) is None
+    _commit(checkpoint, 0, 9, False, {"v": 2})
+    assert checkpoint.load(0, 9, False) == {"v": 2}
+
+
+def test_first_commit_wins(tmp_path):
+    checkpoint = DocumentCheckpoint(str(tmp_path), "doc")
+    _commit(checkpoint, 0, 9, False, {"v": 1})
+    staging = _commit(checkpoint, 0, 9, False, {"v": 2})
+    assert checkpoint.load(0, 9, False) == {"v": 1}
+    assert not os.path.exists(staging)
+
+
+def test_corrupt_middle_json(tmp_path):
+    checkpoint = DocumentCheckpoint(str(tmp_path), "doc")
+    _commit(checkpoint, 0, 9, False, {"v": 1})
+    with open(os.path.join(checkpoint.doc_dir, "0-9-txt", "middle.json"), "w") as f:
+        f.write("{")
+    assert checkpoint.load(0, 9, False) is None
+
+
+def test_completed_sorted_and_skips_staging(tmp_path):
+    checkpoint = DocumentCheckpoint(str(tmp_path), "doc")
+    _commit(checkpoint, 20, 29, True, {"v": 3})
+    _commit(checkpoint, 0, 9, False, {"v": 1})
+    checkpoint.staging_dir(10, 19, False)  # 未提交的临时目录
+    completed = checkpoint.completed()
+    assert [(start, end, ocr) for start, end, ocr, _ in completed] == [(0, 9, False), (20, 29, True)]
+    assert [middle_json for *_, middle_json in completed] == [{"v": 1}, {"v": 3}]
+
+
+def test_clear(tmp_path):
+    checkpoint = DocumentCheckpoint(str(tmp_path), "doc")
+    _commit(checkpoint, 0, 9, False, {"v": 1})
+    checkpoint.clear()
+    assert checkpoint.completed() == []
+    checkpoint.clear()  # 重复清理不报错
+
+
+def test_restore_images_skips_existing(tmp_path):
+    source, target = tmp_path / "src", tmp_path / "dst"
+    source.mkdir()
+    target.mkdir()
+    (source / "a.jpg").write_bytes(b"new")
+    (source / "b.jpg").write_bytes(b"b")
+    (target / "a.jpg").write_bytes(b"old")
+    restore_images(str(source), str(target))
+    assert (target / "a.jpg").read_bytes() == b"old"
+    assert (target / "b.jpg").read_bytes() == b"b"
+    restore_images(str(tmp_path / "missing"), str(target))
+
+
+def test_purge_stale(tmp_path):
+    fresh = DocumentCheckpoint(str(tmp_path), "fresh")
+    stale = DocumentCheckpoint(str(tmp_path), "stale")
+    _commit(fresh, 0, 9, False, {})
+    _commit(stale, 0, 9, False, {})
+    old = time.time() - 3600
+    os.utime(stale.doc_dir, (old, old))
+    assert purge_stale(str(tmp_path), 600) == 1
+    assert sorted(os.listdir(tmp_path)) == ["fresh"]
+    assert purge_stale(str(tmp_path / "missing"), 0) == 0
@@ -0,0 +1,80 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("numpy")
+
+from pdf_extractor.services.heading_detector import HeadingDetector  # noqa: E402
+
+BODY = "Body text of the section describes the results in some detail and keeps going"
+CHAPTERS = ["Introduction", "Methods", "Results", "Discussion", "Outlook"]
+SECTIONS = ["Background", "Scope"]
+
+
+def _document(chapters=4):
+    doc = fitz.open()
+    for chapter in range(1, chapters + 1):
+        page = doc.new_page()
+        page.insert_text((72, 40), "ACME Annual Report", fontsize=9)
+        page.insert_text((72, 90), f"{chapter} {CHAPTERS[chapter - 1]}", fontsize=20)
+        y = 130
+        for section in (1, 2):
+            page.insert_text((72, y), f"{chapter}.{section} {SECTIONS[section - 1]} of {CHAPTERS[chapter - 1]}",
+                             fontsize=14)
+            y += 24
+            for _ in range(8):
+                page.insert_text((72, y), BODY, fontsize=10)
+                y += 14
+            y += 10
+        page.insert_text((300, 800), str(chapter), fontsize=9)
+    return doc
+
+
+def test_detects_levels_and_drops_running_headers():
+    result = HeadingDetector().detect(_document())
+    assert result.body_size == 10.0
+    titles = [(t["level"], t["title"], t["page"]) for t in result.titles]
+    assert titles[:4] == [
+        (1, "1 Introduction", 1),
+        (2, "1.1 Background of Introduction", 1),
+        (2, "1.2 Scope of Introduction", 1),
+        (1, "2 Methods", 2),
+    ]
+    assert len(titles) == 12
+    assert all("ACME" not in title for _, title, _ in titles)
+    assert result.confidence >= 0.6
+
+
+def test_to_dict():
+    data = HeadingDetector().detect(_document(2)).to_dict()
+    assert data["source"] == "font_stats"
+    assert 0.0 < data["confidence"] <= 1.0
+    assert data["titles"][0]["level"] == 1
+
+
+def test_merges_wrapped_heading():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 90), "A Very Long Heading", fontsize=20)
+    page.insert_text((72, 112), "Continued Here", fontsize=20)
+    for i in range(10):
+        page.insert_text((72, 150 + i * 14), BODY, fontsize=10)
+    titles = HeadingDetector().detect(doc).titles
+    assert [t["title"] for t in titles] == ["A Very Long Heading Continued Here"]
+
+
+def test_no_text_layer():
+    doc = fitz.open()
+    doc.new_page()
+    result = HeadingDetector().detect(doc)
+    assert result.titles == []
+    assert result.confidence == 0.0
+
+
+def test_uniform_text_has_no_headings():
+    doc = fitz.open()
+    page = doc.new_page()
+    for i in range(20):
+        page.insert_text((72, 80 + i * 14), BODY, fontsize=10)
+    result = HeadingDetector().detect(doc)
+    assert result.titles == []
+    assert result.confidence == 0.0
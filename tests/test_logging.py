@@ -0,0 +1,98 @@
+import asyncio
+import json
+import logging
+import sys
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from pdf_extractor.core import logger as core_logger  # noqa: E402
+from pdf_extractor.core.logger import (  # noqa: E402
+    ContextFilter, JsonFormatter, NonBlockingQueueHandler, RateLimitFilter, log_context,
+)
+
+
+class _Collect(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.setFormatter(JsonFormatter())
+        self.lines = []
+
+    def emit(self, record):
+        self.lines.append(json.loads(self.format(record)))
+
+
+def _record(name="app", level=logging.INFO, msg="消息", args=(), exc_info=None):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, exc_info)
+
+
+@pytest.fixture
+def queued():
+    target = _Collect()
+    handler = NonBlockingQueueHandler(target, maxsize=100)
+    handler.addFilter(ContextFilter())
+    yield handler, target
+    handler.stop()
+
+
+def test_queued_record_keeps_context_and_extra(queued):
+    handler, target = queued
+    with log_context(task_id="t1", stage="inference"):
+        record = _record(msg="处理 %d 页", args=(3,))
+        record.duration = 1.5
+        handler.handle(record)
+    try:
+        raise ValueError("坏页")
+    except ValueError:
+        handler.handle(_record(level=logging.ERROR, msg="失败", exc_info=sys.exc_info()))
+    handler.stop()
+
+    first, second = target.lines
+    assert first["message"] == "处理 3 页"
+    assert (first["task_id"], first["stage"], first["duration"]) == ("t1", "inference", 1.5)
+    # 异常在调用线程中格式化，离开上下文后不再附加字段
+    assert "ValueError: 坏页" in second["exc_info"]
+    assert "task_id" not in second
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(_Collect(), maxsize=2)
+    handler.stop()
+    for _ in range(5):
+        handler.handle(_record())
+    assert handler.overflowed == 3
+
+
+async def test_context_is_isolated_between_tasks():
+    async def worker(task_id):
+        with log_context(task_id=task_id):
+            await asyncio.sleep(0)
+            return core_logger._current_context()["task_id"]
+
+    assert await asyncio.gather(worker("a"), worker("b")) == ["a", "b"]
+    assert core_logger._current_context() == {}
+
+
+def test_rate_limit_reports_dropped_records(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(core_logger.time, "monotonic", lambda: now[0])
+    rate_filter = RateLimitFilter({"pdf": 2}, {})
+    results = [rate_filter.filter(_record("pdf.worker")) for _ in range(4)]
+    assert results == [True, True, False, False]
+    # 警告和错误不受限流影响，其他 logger 也不受影响
+    assert rate_filter.filter(_record("pdf.worker", level=logging.WARNING))
+    assert rate_filter.filter(_record("other"))
+
+    now[0] += 1
+    record = _record("pdf.worker")
+    assert rate_filter.filter(record)
+    assert record.dropped == 2
+
+
+def test_sampling_uses_longest_prefix(monkeypatch):
+    monkeypatch.setattr(core_logger.random, "random", lambda: 0.5)
+    sample_filter = RateLimitFilter({}, {"pdf": 1.0, "pdf.noisy": 0.1})
+    assert sample_filter.filter(_record("pdf.worker"))
+    assert not sample_filter.filter(_record("pdf.noisy.detail"))
+    assert sample_filter.filter(_record("pdf.noisy", level=logging.ERROR))
@@ -0,0 +1,47 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from pdf_extractor.core import logger as core_logger  # noqa: E402
+from pdf_extractor.core import metrics  # noqa: E402
+
+
+@pytest.fixture
+def registry():
+    prometheus_client = pytest.importorskip("prometheus_client")
+    if not metrics._ENABLED:
+        pytest.skip("指标已关闭")
+    return prometheus_client.REGISTRY
+
+
+def _stage_count(registry, stage):
+    name = f"{metrics._NAMESPACE}_stage_seconds_count"
+    return registry.get_sample_value(name, {"stage": stage}) or 0.0
+
+
+def test_stage_timer_records_on_error(registry):
+    before = _stage_count(registry, "test_stage")
+    with pytest.raises(RuntimeError):
+        with metrics.stage_timer("test_stage"):
+            # 代码块内的日志带有 stage 字段
+            assert core_logger._current_context()["stage"] == "test_stage"
+            raise RuntimeError("失败")
+    assert _stage_count(registry, "test_stage") == before + 1
+    assert "stage" not in core_logger._current_context()
+
+
+def test_render_latest_exposes_metrics(registry):
+    metrics.observe_stage(metrics.STAGE_MERGE, 0.2)
+    metrics.UPLOADS_TOTAL.labels(outcome="accepted").inc()
+    body = metrics.render_latest().decode("utf-8")
+    assert f'{metrics._NAMESPACE}_stage_seconds_bucket{{le="0.25",stage="merge"}}' in body
+    assert f'{metrics._NAMESPACE}_uploads_total{{outcome="accepted"}}' in body
+
+
+def test_noop_metric_accepts_all_calls():
+    noop = metrics._NoopMetric()
+    assert noop.labels(stage="x") is noop
+    noop.inc()
+    noop.dec(2)
+    noop.set(1)
+    noop.observe(0.5)
@@ -0,0 +1,56 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from mine_u import page_classifier  # noqa: E402
+
+
+def _features(**overrides):
+    features = {"chars": 500, "text_coverage": 0.3, "image_coverage": 0.0, "fonts": 2, "garbled_ratio": 0.0}
+    features.update(overrides)
+    return features
+
+
+@pytest.mark.parametrize("overrides, ocr", [
+    ({}, False),
+    ({"fonts": 0}, True),
+    ({"chars": 5}, True),
+    ({"garbled_ratio": 0.5}, True),
+    # 扫描页上叠加少量页眉页脚文字
+    ({"image_coverage": 0.9, "text_coverage": 0.01}, True),
+    # 图文混排页面的文本层可用
+    ({"image_coverage": 0.9, "text_coverage": 0.2}, False),
+])
+def test_needs_ocr(overrides, ocr):
+    assert page_classifier.needs_ocr(_features(**overrides)) is ocr
+
+
+def test_classify_pages(tmp_path):
+    doc = fitz.open()
+    text_page = doc.new_page()
+    text_page.insert_textbox(fitz.Rect(50, 50, 550, 400), "这是一段可以直接提取的文本。 " * 20, fontname="china-s")
+    doc.new_page()
+    scanned = doc.new_page()
+    pixmap = fitz.Pixmap(fitz.csGRAY, fitz.IRect(0, 0, 60, 80), False)
+    pixmap.clear_with(200)
+    scanned.insert_image(scanned.rect, pixmap=pixmap)
+    path = tmp_path / "mixed.pdf"
+    doc.save(path)
+    doc.close()
+
+    assert page_classifier.classify_pages(str(path)) == [False, True, True]
+    assert page_classifier.classify_pages(str(path), page_start=1, page_end=1) == [True]
+
+
+def test_group_runs():
+    assert page_classifier.group_runs([]) == []
+    assert page_classifier.group_runs([False, False, True, False, False], offset=10) == [
+        (10, 11, False), (12, 12, True), (13, 14, False),
+    ]
+
+
+def test_split_runs():
+    runs = [(0, 6, False), (7, 7, True)]
+    assert page_classifier.split_runs(runs, max_pages=3) == [
+        (0, 2, False), (3, 5, False), (6, 6, False), (7, 7, True),
+    ]
@@ -0,0 +1,77 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from mine_u.isolation import ParseMemoryError as ChildMemoryError  # noqa: E402
+from pdf_extractor.core.config import settings  # noqa: E402
+from pdf_extractor.core.exceptions import ParseMemoryError  # noqa: E402
+from pdf_extractor.services import mineru_service  # noqa: E402
+
+
+def test_skip_progress_passthrough():
+    assert mineru_service._skip_progress(None, 5) is None
+    report = [].append
+    assert mineru_service._skip_progress(report, 0) is report
+
+
+def test_skip_progress_swallows_first_pages():
+    reports = []
+    report = mineru_service._skip_progress(reports.append, 25)
+    # 重试时先从检查点恢复首次尝试已上报的段，这部分不再累加
+    for pages in (10, 10, 10, 10):
+        report(pages)
+    assert reports == [5, 10]
+    assert sum(reports) == 40 - 25
+
+
+@pytest.fixture
+def split_settings(monkeypatch):
+    monkeypatch.setattr(settings.isolation, "min_split_pages", 5)
+    monkeypatch.setattr(settings.mineru, "checkpoint_pages", 10)
+
+
+def _fake_parse(monkeypatch, too_large):
+    """页数超过 too_large 的范围模拟子进程超出内存上限，其余范围返回只含该范围页码的 middle json。"""
+    calls = []
+
+    def parse(pdf_path, output_dir, start, end, progress, checkpoint_key):
+        calls.append((start, end))
+        if end - start + 1 > too_large:
+            raise ChildMemoryError("RSS 超过上限")
+        if progress is not None:
+            progress(end - start + 1)
+        return (start, end)
+
+    def load(path):
+        start, end = path
+        return {"pdf_info": [{"page_idx": i} for i in range(end - start + 1)], "_parse_type": "txt"}
+
+    monkeypatch.setattr(mineru_service, "_doc_parse_isolated", parse)
+    monkeypatch.setattr(mineru_service, "load_middle_json", load)
+    return calls
+
+
+def test_parse_split_aligns_to_checkpoint_pages(monkeypatch, split_settings):
+    calls = _fake_parse(monkeypatch, too_large=30)
+    fragments = mineru_service._parse_split("doc.pdf", "/tmp/out", 0, 59, None, None, ChildMemoryError())
+    # 60 页对半拆为 0-29 / 30-59，拆分点落在检查点段边界上
+    assert calls == [(0, 29), (30, 59)]
+    assert [start for start, _ in fragments] == [0, 30]
+
+
+def test_parse_split_recurses_and_reports_progress(monkeypatch, split_settings):
+    calls = _fake_parse(monkeypatch, too_large=10)
+    reports = []
+    fragments = mineru_service._parse_split("doc.pdf", "/tmp/out", 0, 39, reports.append, None,
+                                            ChildMemoryError())
+    assert [start for start, _ in fragments] == [0, 10, 20, 30]
+    assert (0, 19) in calls and (0, 9) in calls
+    assert sum(reports) == 40
+    merged = mineru_service.merge_middle_json(fragments)
+    assert [page["page_idx"] for page in merged["pdf_info"]] == list(range(40))
+
+
+def test_parse_split_gives_up_below_min_pages(monkeypatch, split_settings):
+    _fake_parse(monkeypatch, too_large=0)
+    with pytest.raises(ParseMemoryError):
+        mineru_service._parse_split("doc.pdf", "/tmp/out", 0, 19, None, None, ChildMemoryError())
@@ -0,0 +1,58 @@
+import json
+import pstats
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from pdf_extractor.services import profiling  # noqa: E402
+from pdf_extractor.services.profiling import TaskProfiler, should_profile  # noqa: E402
+
+
+def _allocate_blocks():
+    return [bytearray(1024) for _ in range(2048)]
+
+
+def test_should_profile(monkeypatch):
+    monkeypatch.setattr(profiling.settings.profiling, "sample_rate", 0.0)
+    assert should_profile(requested=True)
+    assert not should_profile()
+    monkeypatch.setattr(profiling.settings.profiling, "sample_rate", 0.1)
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.05)
+    assert should_profile()
+    monkeypatch.setattr(profiling.random, "random", lambda: 0.5)
+    assert not should_profile()
+
+
+def test_profiler_artifacts(tmp_path):
+    assert not tracemalloc.is_tracing()
+    with TaskProfiler(prefix="shard-0-9.") as profiler:
+        blocks = _allocate_blocks()
+    # 分析器自己启动的 tracemalloc 在退出时停止
+    assert not tracemalloc.is_tracing()
+    del blocks
+
+    artifacts = {artifact.name: artifact for artifact in profiler.artifacts()}
+    assert list(artifacts) == ["shard-0-9.profile.pstats", "shard-0-9.profile.txt", "shard-0-9.memory.json"]
+
+    stats_path = tmp_path / "profile.pstats"
+    stats_path.write_bytes(artifacts["shard-0-9.profile.pstats"].data)
+    functions = {name for _, _, name in pstats.Stats(str(stats_path)).stats}
+    assert "_allocate_blocks" in functions
+    assert "_allocate_blocks" in artifacts["shard-0-9.profile.txt"].data.decode("utf-8")
+
+    memory = json.loads(artifacts["shard-0-9.memory.json"].data)
+    assert memory["peak_traced_bytes"] >= 2048 * 1024
+    assert memory["wall_seconds"] > 0
+    assert memory["top_allocations"] and memory["top_allocations"][0]["traceback"]
+
+
+def test_profiler_keeps_existing_tracing():
+    tracemalloc.start()
+    try:
+        with TaskProfiler():
+            _allocate_blocks()
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,86 @@
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+
+from pdf_extractor.core.exceptions import TaskCancelledError  # noqa: E402
+from pdf_extractor.services import progress  # noqa: E402
+from pdf_extractor.services.progress import ProgressReporter  # noqa: E402
+
+
+@pytest.fixture
+def writes(monkeypatch):
+    """记录每次写入的增量；state["terminal"] 为 True 时模拟任务已进入终态"""
+    state = {"writes": [], "events": [], "terminal": False, "now": 100.0, "fail": False}
+
+    @contextmanager
+    def get_db_with_commit():
+        yield None
+
+    def advance_progress(db, *, id, delta):
+        if state["fail"]:
+            raise RuntimeError("数据库不可用")
+        if state["terminal"]:
+            return None
+        state["writes"].append((id, round(delta, 6)))
+        return round(sum(d for _, d in state["writes"]), 6), "STARTED"
+
+    def publish_task_event(db, *, task_id, status, progress):
+        state["events"].append((task_id, status, progress))
+
+    monkeypatch.setattr(progress, "get_db_with_commit", get_db_with_commit)
+    monkeypatch.setattr(progress.crud_task, "advance_progress", advance_progress)
+    monkeypatch.setattr(progress, "publish_task_event", publish_task_event)
+    monkeypatch.setattr(progress.time, "monotonic", lambda: state["now"])
+    return state
+
+
+def test_increments_are_coalesced(writes):
+    reporter = ProgressReporter(min_interval_seconds=1.0)
+    assert reporter.advance("t1", 0.1)
+    # 一秒内的增量只累积，不写库
+    for _ in range(3):
+        writes["now"] += 0.2
+        assert reporter.advance("t1", 0.1)
+    assert writes["writes"] == [("t1", 0.1)]
+    writes["now"] += 0.5
+    assert reporter.advance("t1", 0.1)
+    assert writes["writes"] == [("t1", 0.1), ("t1", 0.4)]
+    assert writes["events"][-1] == ("t1", "STARTED", 0.5)
+
+
+def test_close_flushes_remaining_delta(writes):
+    reporter = ProgressReporter(min_interval_seconds=10.0)
+    reporter.advance("t1", 0.1)
+    reporter.advance("t1", 0.2)
+    reporter.close("t1")
+    assert writes["writes"] == [("t1", 0.1), ("t1", 0.2)]
+    assert reporter._last_write == {}
+
+
+def test_discard_drops_pending_delta(writes):
+    reporter = ProgressReporter(min_interval_seconds=10.0)
+    reporter.advance("t1", 0.1)
+    reporter.advance("t1", 0.3)
+    reporter.discard("t1")
+    reporter.close("t1")
+    assert writes["writes"] == [("t1", 0.1)]
+
+
+def test_callback_raises_when_task_is_terminal(writes):
+    reporter = ProgressReporter(min_interval_seconds=0.0)
+    report = reporter.callback("t1", scale=0.01)
+    report(10)
+    assert writes["writes"] == [("t1", 0.1)]
+    writes["terminal"] = True
+    with pytest.raises(TaskCancelledError):
+        report(10)
+
+
+def test_write_failure_does_not_stop_parsing(writes):
+    reporter = ProgressReporter(min_interval_seconds=0.0)
+    writes["fail"] = True
+    assert reporter.advance("t1", 0.1)
+    assert writes["writes"] == []
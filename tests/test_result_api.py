@@ -0,0 +1,78 @@
+import gzip
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("celery")
+pytest.importorskip("fastapi")
+pytest.importorskip("fitz")
+
+from fastapi import HTTPException  # noqa: E402
+
+from pdf_extractor.api import task as api_task  # noqa: E402
+from pdf_extractor.crud import task_result as crud_task_result  # noqa: E402
+from pdf_extractor.services import result_store  # noqa: E402
+
+PAYLOAD = {"result": {"engine": "pymupdf", "page_count": 2,
+                      "pages": [{"page_idx": 0, "text": "a"}, {"page_idx": 1, "text": "b"}]}}
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    monkeypatch.setattr(result_store.settings.result_store, "codec", result_store.CODEC_GZIP)
+    encoded = result_store.encode_result(PAYLOAD)
+    row = SimpleNamespace(data=encoded.data, codec=encoded.codec, etag=encoded.etag)
+
+    async def get(db, id):
+        return row
+
+    monkeypatch.setattr(crud_task_result.async_task_result, "get", get)
+    return encoded
+
+
+def _request(**headers):
+    return SimpleNamespace(headers=headers)
+
+
+async def _get(request, fields=None, pages=None):
+    return await api_task.get_task_result(uuid.uuid4(), request, fields=fields, pages=pages, db=None)
+
+
+async def test_stored_bytes_are_served_without_recompression(stored):
+    response = await _get(_request(**{"accept-encoding": "br, gzip;q=0.8"}))
+    assert response.body == stored.data
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == f'"{stored.etag}"'
+
+
+async def test_plain_client_gets_identity_body(stored):
+    response = await _get(_request())
+    assert "content-encoding" not in response.headers
+    assert json.loads(response.body) == PAYLOAD
+
+
+async def test_matching_etag_returns_304(stored):
+    response = await _get(_request(**{"if-none-match": f'"{stored.etag}"'}))
+    assert response.status_code == 304
+    assert response.body == b""
+
+
+async def test_projection_uses_weak_etag(stored):
+    response = await _get(_request(**{"accept-encoding": "gzip"}), fields="pages", pages="1")
+    etag = response.headers["etag"]
+    assert etag.startswith(f'W/"{stored.etag}-')
+    assert json.loads(gzip.decompress(response.body)) == {"result": {"pages": [{"page_idx": 1, "text": "b"}]}}
+    # 不同的投影参数使用不同的 ETag
+    other = await _get(_request(), fields="pages", pages="0")
+    assert other.headers["etag"] != etag
+    assert (await _get(_request(**{"if-none-match": etag}), fields="pages", pages="1")).status_code == 304
+
+
+async def test_bad_page_spec_is_rejected(stored):
+    with pytest.raises(HTTPException) as excinfo:
+        await _get(_request(), pages="3-1")
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,157 @@
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from pdf_extractor.crud import result_cache as crud_result_cache  # noqa: E402
+from pdf_extractor.schemas.task import TaskStatus  # noqa: E402
+from pdf_extractor.services import result_cache  # noqa: E402
+from pdf_extractor.services.result_cache import ResultCacheService, build_cache_key  # noqa: E402
+
+
+class _FakeCrud:
+    """按缓存键返回 (条目, 任务) 行，记录每次查询的键。"""
+
+    def __init__(self):
+        self.rows = {}
+        self.queries = []
+        self.upserts = []
+        self.evictions = []
+
+    def add(self, cache_key, status):
+        task = SimpleNamespace(id=uuid.uuid4(), status=status)
+        self.rows[cache_key] = (SimpleNamespace(cache_key=cache_key), task)
+        return task.id
+
+    async def get_many_with_task(self, db, *, cache_keys, ttl_seconds):
+        self.queries.append(list(cache_keys))
+        return [self.rows[key] for key in cache_keys if key in self.rows]
+
+    async def upsert_many(self, db, *, entries):
+        self.upserts.extend(entries)
+
+    def evict(self, db, *, ttl_seconds, max_entries):
+        self.evictions.append((ttl_seconds, max_entries))
+        return 3
+
+
+@pytest.fixture
+def crud(monkeypatch):
+    fake = _FakeCrud()
+    monkeypatch.setattr(crud_result_cache, "async_result_cache", fake)
+    monkeypatch.setattr(crud_result_cache, "result_cache", fake)
+    monkeypatch.setattr(result_cache.settings.cache, "enabled", True)
+    return fake
+
+
+@pytest.fixture
+def service():
+    return ResultCacheService(lru_size=2, ttl_seconds=60)
+
+
+def test_build_cache_key_is_stable():
+    key = build_cache_key("d" * 64, {"b": 1, "a": 2}, parser_version="1.0.0")
+    assert key == build_cache_key("d" * 64, {"a": 2, "b": 1}, parser_version="1.0.0")
+    assert key != build_cache_key("d" * 64, {"a": 2, "b": 1}, parser_version="1.0.1")
+    assert key != build_cache_key("d" * 64, {"titles_only": True}, parser_version="1.0.0")
+
+
+async def test_completed_task_is_served_from_lru(crud, service):
+    task_id = crud.add("k1", TaskStatus.COMPLETED.value)
+    assert await service.lookup(None, "k1") == task_id
+    assert await service.lookup(None, "k1") == task_id
+    # 第二次查找由进程内 LRU 命中，不再查询数据库
+    assert crud.queries == [["k1"]]
+
+
+async def test_running_task_is_reused_but_not_cached(crud, service):
+    task_id = crud.add("k1", TaskStatus.STARTED.value)
+    assert await service.lookup(None, "k1") == task_id
+    assert await service.lookup(None, "k1") == task_id
+    assert crud.queries == [["k1"], ["k1"]]
+
+
+@pytest.mark.parametrize("status", [
+    TaskStatus.FAILURE.value, TaskStatus.FAILED.value, TaskStatus.CANCELLED.value, TaskStatus.TIMEOUT.value,
+])
+async def test_failed_results_are_never_served(crud, service, status):
+    crud.add("k1", status)
+    assert await service.lookup(None, "k1") is None
+    assert service._lru_get("k1") is None
+
+
+async def test_lookup_many_deduplicates_keys(crud, service):
+    first = crud.add("k1", TaskStatus.COMPLETED.value)
+    crud.add("k2", TaskStatus.FAILURE.value)
+    hits = await service.lookup_many(None, ["k1", "k2", "k1", "k3"])
+    assert hits == {"k1": first}
+    assert crud.queries == [["k1", "k2", "k3"]]
+
+
+async def test_lru_entries_expire(crud, service, monkeypatch):
+    crud.add("k1", TaskStatus.COMPLETED.value)
+    await service.lookup(None, "k1")
+    now = result_cache.time.monotonic()
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: now + 61)
+    assert service._lru_get("k1") is None
+
+
+def test_lru_is_bounded(service):
+    for key in ("k1", "k2", "k3"):
+        service._lru_put(key, uuid.uuid4())
+    assert service._lru_get("k1") is None
+    assert service._lru_get("k3") is not None
+
+
+async def test_register_replaces_lru_entry(crud, service):
+    old = crud.add("k1", TaskStatus.COMPLETED.value)
+    assert await service.lookup(None, "k1") == old
+    new = uuid.uuid4()
+    await service.register(None, cache_key="k1", file_digest="d", options={"titles_only": True}, task_id=new)
+    assert crud.upserts[0]["task_id"] == new
+    assert crud.upserts[0]["options"] == {"titles_only": True}
+    assert service._lru_get("k1") is None
+
+
+async def test_disabled_cache(crud, service, monkeypatch):
+    monkeypatch.setattr(result_cache.settings.cache, "enabled", False)
+    crud.add("k1", TaskStatus.COMPLETED.value)
+    assert await service.lookup(None, "k1") is None
+    await service.register(None, cache_key="k1", file_digest="d", options=None, task_id=uuid.uuid4())
+    assert crud.queries == [] and crud.upserts == []
+
+
+def test_evict_clears_lru(crud, service, monkeypatch):
+    monkeypatch.setattr(result_cache.settings.cache, "max_entries", 100)
+    service._lru_put("k1", uuid.uuid4())
+    assert service.evict(None) == 3
+    assert crud.evictions == [(60, 100)]
+    assert service._lru_get("k1") is None
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_ttl_uses_database_clock():
+    # 过期判断和 created_at 的 server_default 使用同一个时钟
+    assert "now() - " in _sql(crud_result_cache._valid_entries_stmt(["k1"], 60))
+    upsert = _sql(crud_result_cache._upsert_stmt([{
+        "cache_key": "k1", "file_digest": "d", "parser_version": "1", "options": {}, "task_id": uuid.uuid4(),
+    }]))
+    assert "created_at = now()" in upsert
+
+
+def test_evict_uses_database_clock():
+    db = MagicMock()
+    db.execute.return_value.rowcount = 1
+    assert crud_result_cache.result_cache.evict(db, ttl_seconds=60, max_entries=10) == 2
+    expired, overflow = (_sql(call.args[0]) for call in db.execute.call_args_list)
+    assert "created_at <= now() - " in expired
+    assert "LIMIT" in overflow
@@ -0,0 +1,105 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from pdf_extractor.services import result_store  # noqa: E402
+
+
+def test_parse_page_spec_empty():
+    assert result_store.parse_page_spec(None) is None
+    assert result_store.parse_page_spec("") is None
+
+
+def test_parse_page_spec_merges_ranges():
+    pages = result_store.parse_page_spec("12, 0-9,5-10,,11")
+    assert pages.ranges == [(0, 12)]
+    assert 0 in pages and 12 in pages
+    assert 13 not in pages
+    assert -1 not in pages
+
+
+def test_parse_page_spec_keeps_gaps():
+    pages = result_store.parse_page_spec("3,7-8")
+    assert pages.ranges == [(3, 3), (7, 8)]
+    assert [page for page in range(10) if page in pages] == [3, 7, 8]
+
+
+def test_parse_page_spec_huge_range_is_not_expanded():
+    # 区间不展开为逐个页码，超大范围也只占用一个区间
+    pages = result_store.parse_page_spec("0-999999999999")
+    assert pages.ranges == [(0, 999999999999)]
+    assert 123456789 in pages
+
+
+@pytest.mark.parametrize("spec", ["5-3", "a", "1-b", "-1", "1-2-3"])
+def test_parse_page_spec_invalid(spec):
+    with pytest.raises(ValueError):
+        result_store.parse_page_spec(spec)
+
+
+def _payload():
+    return {
+        "result": {
+            "engine": "mineru",
+            "page_count": 3,
+            "middle_json_key": "outputs/t1/doc_middle.json",
+            "middle_json": {
+                "pdf_info": [{"page_idx": 0, "text": "a"}, {"page_idx": 1, "text": "b"},
+                             {"page_idx": 2, "text": "c"}],
+                "_parse_type": "txt",
+            },
+        }
+    }
+
+
+def test_project_result_fields_inside_envelope():
+    projected = result_store.project_result(_payload(), fields=["page_count", "engine", "missing", ""])
+    assert projected == {"result": {"page_count": 3, "engine": "mineru"}}
+
+
+def test_project_result_pages():
+    projected = result_store.project_result(_payload(), pages=result_store.parse_page_spec("0,2"))
+    assert [page["page_idx"] for page in projected["result"]["middle_json"]["pdf_info"]] == [0, 2]
+    # 不按页组织的字段保持不变
+    assert projected["result"]["middle_json"]["_parse_type"] == "txt"
+
+
+def test_project_result_fields_and_pages():
+    projected = result_store.project_result(
+        _payload(), fields=["middle_json"], pages=result_store.parse_page_spec("1")
+    )
+    assert list(projected["result"]) == ["middle_json"]
+    assert projected["result"]["middle_json"]["pdf_info"] == [{"page_idx": 1, "text": "b"}]
+
+
+def test_project_result_without_envelope():
+    assert result_store.project_result({"a": 1, "b": 2}, fields=["b"]) == {"b": 2}
+
+
+def test_project_result_no_projection_returns_input():
+    payload = _payload()
+    assert result_store.project_result(payload) is payload
+
+
+def test_encode_decode_roundtrip():
+    payload = _payload()
+    encoded = result_store.encode_result(payload)
+    assert encoded.raw_size > 0
+    assert result_store.decode_result(encoded.data, encoded.codec) == payload
+
+
+@pytest.mark.parametrize("codec", [result_store.CODEC_GZIP, result_store.CODEC_IDENTITY])
+def test_etag_does_not_depend_on_codec(monkeypatch, codec):
+    monkeypatch.setattr(result_store.settings.result_store, "codec", codec)
+    encoded = result_store.encode_result(_payload())
+    assert encoded.codec == codec
+    assert encoded.etag == result_store.encode_result(dict(reversed(_payload().items()))).etag
+    assert encoded.raw_size == len(result_store.decompress(encoded.data, codec))
+
+
+def test_zstd_falls_back_to_gzip_when_missing(monkeypatch):
+    monkeypatch.setattr(result_store.settings.result_store, "codec", result_store.CODEC_ZSTD)
+    monkeypatch.setattr(result_store, "zstandard", None)
+    encoded = result_store.encode_result(_payload())
+    assert encoded.codec == result_store.CODEC_GZIP
+    assert result_store.decode_result(encoded.data, encoded.codec) == _payload()
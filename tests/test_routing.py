@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from pdf_extractor.services import routing  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def routing_settings(monkeypatch):
+    cfg = routing.settings.routing
+    for name, value in {
+        "scanned_page_weight": 4, "interactive_max_cost": 20, "interactive_max_bytes": 1024,
+        "large_min_cost": 400, "max_priority": 9, "priority_step_cost": 50,
+    }.items():
+        monkeypatch.setattr(cfg, name, value)
+    deadlines = routing.settings.deadlines
+    monkeypatch.setattr(deadlines, "enabled", True)
+    monkeypatch.setattr(deadlines, "base_seconds", 60)
+    monkeypatch.setattr(deadlines, "per_page_seconds", 3.0)
+    monkeypatch.setattr(deadlines, "hard_grace_seconds", 30)
+    monkeypatch.setattr(routing.settings, "max_pdf_parse_time_seconds", 3000)
+
+
+def test_estimate_cost_weights_scanned_pages():
+    assert routing.estimate_cost(10, scanned=False) == 10
+    assert routing.estimate_cost(10, scanned=True) == 40
+    # 页数未知时按大文档处理
+    assert routing.estimate_cost(None, scanned=False) == 400
+
+
+@pytest.mark.parametrize("page_count, size_bytes, scanned, batch, lane", [
+    (5, 512, False, False, routing.LANE_INTERACTIVE),
+    (5, 4096, False, False, routing.LANE_STANDARD),
+    (10, 512, True, False, routing.LANE_STANDARD),
+    (5, 512, False, True, routing.LANE_BATCH),
+    (400, 512, False, False, routing.LANE_LARGE),
+    (100, 512, True, True, routing.LANE_LARGE),
+    (None, 512, False, False, routing.LANE_LARGE),
+])
+def test_choose_route_lanes(page_count, size_bytes, scanned, batch, lane):
+    route = routing.choose_route(page_count, size_bytes, scanned, batch=batch)
+    assert route.lane == lane
+    assert route.queue == routing.queue_name(lane)
+
+
+def test_smaller_documents_get_higher_priority():
+    assert routing.choose_route(1, 512, False).priority == 9
+    assert routing.choose_route(120, 512, False).priority == 7
+    assert routing.choose_route(5000, 512, False).priority == 0
+
+
+def test_time_limits_scale_with_cost():
+    assert routing.time_limits(10) == (90, 120)
+    # 软时限不超过 max_pdf_parse_time_seconds
+    assert routing.time_limits(10_000) == (3000, 3030)
+    assert routing.time_limits(None) == (3000, 3030)
+    route = routing.choose_route(10, 512, False)
+    assert (route.soft_time_limit, route.time_limit) == (90, 120)
+
+
+def test_time_limits_disabled(monkeypatch):
+    monkeypatch.setattr(routing.settings.deadlines, "enabled", False)
+    assert routing.time_limits(10) == (None, None)
+    route = routing.default_route()
+    assert route.lane == routing.LANE_STANDARD and route.time_limit is None
@@ -0,0 +1,95 @@
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from pdf_extractor.core.config import settings  # noqa: E402
+from pdf_extractor.services import mineru_service  # noqa: E402
+
+
+@pytest.fixture
+def shard_settings(monkeypatch):
+    monkeypatch.setattr(settings.mineru, "shard_target_count", 16)
+    monkeypatch.setattr(settings.mineru, "shard_min_size", 10)
+    monkeypatch.setattr(settings.mineru, "shard_max_size", 50)
+
+
+@pytest.mark.parametrize("page_count, expected", [
+    (1, 10),      # 小文档不被切得过碎
+    (160, 10),
+    (320, 20),    # 分片数接近 shard_target_count
+    (330, 21),
+    (10000, 50),  # 超大文档的单个分片不超过上限
+])
+def test_adaptive_shard_size(shard_settings, page_count, expected):
+    assert mineru_service.adaptive_shard_size(page_count) == expected
+
+
+@pytest.mark.parametrize("page_count", [0, -3])
+def test_plan_page_ranges_empty(page_count):
+    assert mineru_service.plan_page_ranges(page_count, 10) == []
+
+
+def test_plan_page_ranges_covers_document():
+    ranges = mineru_service.plan_page_ranges(25, 10)
+    assert ranges == [(0, 9), (10, 19), (20, 24)]
+
+
+@pytest.mark.parametrize("page_count", [1, 9, 10, 11, 99, 100, 1234])
+def test_plan_page_ranges_contiguous(shard_settings, page_count):
+    ranges = mineru_service.plan_page_ranges(page_count)
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == page_count - 1
+    for (_, end), (start, _) in zip(ranges, ranges[1:]):
+        assert start == end + 1
+    size = mineru_service.adaptive_shard_size(page_count)
+    assert all(end - start + 1 <= size for start, end in ranges)
+
+
+def _fragment(pages, parse_type="txt", version="1.3.0"):
+    return {
+        "pdf_info": [{"page_idx": i, "para_blocks": [f"p{i}"]} for i in range(pages)],
+        "_parse_type": parse_type,
+        "_version_name": version,
+    }
+
+
+def test_merge_middle_json_offsets_page_idx():
+    # 分片顺序不限，按起始页排序后合并
+    merged = mineru_service.merge_middle_json([(5, _fragment(2)), (0, _fragment(5))])
+    assert [page["page_idx"] for page in merged["pdf_info"]] == list(range(7))
+    assert merged["pdf_info"][5]["para_blocks"] == ["p0"]
+    assert merged["_parse_type"] == "txt"
+    assert merged["_version_name"] == "1.3.0"
+
+
+def test_merge_middle_json_mixed_parse_type():
+    merged = mineru_service.merge_middle_json([(0, _fragment(1, "txt")), (1, _fragment(1, "ocr"))])
+    assert merged["_parse_type"] == "mixed"
+
+
+def test_merge_middle_json_does_not_modify_fragments():
+    fragment = _fragment(2)
+    mineru_service.merge_middle_json([(10, fragment)])
+    assert [page["page_idx"] for page in fragment["pdf_info"]] == [0, 1]
+
+
+def test_merge_middle_json_empty():
+    assert mineru_service.merge_middle_json([])["pdf_info"] == []
+
+
+def test_checkpoints_are_scoped_to_task(monkeypatch, tmp_path):
+    from mine_u.checkpoint import DocumentCheckpoint
+
+    monkeypatch.setattr(settings.mineru, "checkpoint_dir", str(tmp_path))
+    for task_id, text in (("t1", "a"), ("t2", "b")):
+        checkpoint = DocumentCheckpoint(mineru_service._checkpoint_root(),
+                                        mineru_service._checkpoint_key("digest", task_id))
+        staging = checkpoint.staging_dir(0, 0, False)
+        checkpoint.commit(staging, 0, 0, False, {"pdf_info": [{"page_idx": 0, "text": text}]})
+
+    # 同一文档的另一个任务结束时只清除自己的检查点
+    mineru_service.clear_checkpoints("digest", "t1")
+    assert mineru_service.load_partial_result("digest", "t1") is None
+    restored = mineru_service.load_partial_result("digest", "t2")
+    assert restored["completed_ranges"] == [[0, 0]]
+    assert restored["middle_json"]["pdf_info"][0]["text"] == "b"
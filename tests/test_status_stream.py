@@ -0,0 +1,93 @@
+import json
+import uuid
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("celery")
+pytest.importorskip("fastapi")
+pytest.importorskip("psycopg")
+pytest.importorskip("fitz")
+
+from pdf_extractor.api import task as api_task  # noqa: E402
+from pdf_extractor.crud import task as crud_task  # noqa: E402
+from pdf_extractor.schemas.task import TaskStatus  # noqa: E402
+from pdf_extractor.services.status_broker import TaskStatusBroker  # noqa: E402
+
+
+def _notify(task_id, status, progress=None):
+    # 与 Worker 发布的 NOTIFY 负载一致
+    return crud_task._notify_params(task_id, status, progress)["payload"]
+
+
+async def test_broker_fans_out_to_subscribers_of_the_task():
+    broker = TaskStatusBroker(dsn="", channel="task_status")
+    first, second, other = broker.subscribe("t1"), broker.subscribe("t1"), broker.subscribe("t2")
+    broker._dispatch(_notify("t1", TaskStatus.STARTED.value, 0.5))
+    assert first.get_nowait() == {"task_id": "t1", "status": "STARTED", "progress": 0.5}
+    assert second.get_nowait()["progress"] == 0.5
+    assert other.empty()
+
+
+async def test_broker_unsubscribe_and_bad_payload():
+    broker = TaskStatusBroker(dsn="", channel="task_status")
+    queue = broker.subscribe("t1")
+    broker._dispatch("not json")
+    assert queue.empty()
+    broker.unsubscribe("t1", queue)
+    broker.unsubscribe("t1", queue)
+    assert broker._subscribers == {}
+
+
+class _SessionContext:
+    async def __aenter__(self):
+        return None
+
+    async def __aexit__(self, *exc_info):
+        return None
+
+
+async def test_event_stream_ends_on_terminal_status(monkeypatch):
+    task_id = uuid.uuid4()
+    broker = TaskStatusBroker(dsn="", channel="task_status")
+
+    async def get(db, id):
+        return SimpleNamespace(status=TaskStatus.PENDING.value, progress=None)
+
+    async def is_disconnected():
+        return False
+
+    monkeypatch.setattr(api_task, "status_broker", broker)
+    monkeypatch.setattr(api_task, "AsyncSessionLocal", _SessionContext)
+    monkeypatch.setattr(crud_task.async_task, "get", get)
+
+    response = await api_task.stream_task_events(task_id, SimpleNamespace(is_disconnected=is_disconnected))
+    assert response.media_type == "text/event-stream"
+    # 读取初始状态之前已经订阅，之后的变更不会遗漏
+    broker._dispatch(_notify(str(task_id), TaskStatus.STARTED.value, 0.4))
+    broker._dispatch(_notify(str(task_id), TaskStatus.COMPLETED.value, 1.0))
+    broker._dispatch(_notify(str(task_id), TaskStatus.STARTED.value, 0.9))
+
+    chunks = [chunk async for chunk in response.body_iterator]
+    events = [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks]
+    assert [event["status"] for event in events] == ["PENDING", "STARTED", "COMPLETED"]
+    assert all(chunk.startswith("event: status\n") for chunk in chunks)
+    assert broker._subscribers == {}
+
+
+async def test_event_stream_for_finished_task_sends_one_event(monkeypatch):
+    broker = TaskStatusBroker(dsn="", channel="task_status")
+
+    async def get(db, id):
+        return SimpleNamespace(status=TaskStatus.CANCELLED.value, progress=0.3)
+
+    monkeypatch.setattr(api_task, "status_broker", broker)
+    monkeypatch.setattr(api_task, "AsyncSessionLocal", _SessionContext)
+    monkeypatch.setattr(crud_task.async_task, "get", get)
+
+    response = await api_task.stream_task_events(uuid.uuid4(), SimpleNamespace())
+    chunks = [chunk async for chunk in response.body_iterator]
+    assert len(chunks) == 1 and '"CANCELLED"' in chunks[0]
+    assert broker._subscribers == {}
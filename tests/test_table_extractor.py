@@ -0,0 +1,92 @@
+import pytest
+
+fitz = pytest.importorskip("fitz")
+
+from pdf_extractor.services.table_extractor import (  # noqa: E402
+    NativeTableExtractor,
+    Segment,
+    TableExtractorConfig,
+)
+
+CELLS = [["Name", "Qty", "Price"], ["apple", "3", "1.20"], ["pear", "5", "0.80"]]
+
+
+def _ruled_page(doc, x0=72, y0=100, col_width=100, row_height=24):
+    page = doc.new_page()
+    n_rows, n_cols = len(CELLS), len(CELLS[0])
+    for r in range(n_rows + 1):
+        y = y0 + r * row_height
+        page.draw_line((x0, y), (x0 + n_cols * col_width, y))
+    for c in range(n_cols + 1):
+        x = x0 + c * col_width
+        page.draw_line((x, y0), (x, y0 + n_rows * row_height))
+    for r, row in enumerate(CELLS):
+        for c, text in enumerate(row):
+            page.insert_text((x0 + c * col_width + 5, y0 + r * row_height + 16), text, fontsize=10)
+    return page
+
+
+def _text_page(doc):
+    page = doc.new_page()
+    for r, row in enumerate(CELLS + [["plum", "7", "2.10"]]):
+        for c, text in enumerate(row):
+            page.insert_text((72 + c * 120, 100 + r * 16), text, fontsize=10)
+    return page
+
+
+def test_ruled_table():
+    doc = fitz.open()
+    _ruled_page(doc)
+    tables = NativeTableExtractor().extract(doc)
+    assert len(tables) == 1
+    table = tables[0]
+    assert table["method"] == "lines"
+    assert table["page"] == 1
+    assert (table["n_rows"], table["n_cols"]) == (3, 3)
+    assert table["rows"] == CELLS
+
+
+def test_borderless_table():
+    doc = fitz.open()
+    _text_page(doc)
+    tables = NativeTableExtractor().extract(doc)
+    assert len(tables) == 1
+    assert tables[0]["method"] == "text"
+    assert tables[0]["rows"][0] == ["Name", "Qty", "Price"]
+    assert tables[0]["rows"][-1] == ["plum", "7", "2.10"]
+
+
+def test_plain_text_is_not_a_table():
+    doc = fitz.open()
+    page = doc.new_page()
+    page.insert_text((72, 100), "Just a paragraph of ordinary prose.", fontsize=10)
+    page.insert_text((72, 116), "Another line of the same paragraph.", fontsize=10)
+    assert NativeTableExtractor().extract(doc) == []
+
+
+def test_selected_pages_and_incremental_results():
+    doc = fitz.open()
+    _ruled_page(doc)
+    _ruled_page(doc)
+    results = []
+    returned = NativeTableExtractor().extract(doc, pages=[1], results=results)
+    assert returned is results
+    assert [table["page"] for table in results] == [2]
+
+
+def test_segment_cap_skips_ruled_detection():
+    doc = fitz.open()
+    _ruled_page(doc)
+    extractor = NativeTableExtractor(TableExtractorConfig(max_segments_per_page=4))
+    assert all(table["method"] != "lines" for table in extractor.extract(doc))
+
+
+def test_group_by_intersection():
+    extractor = NativeTableExtractor()
+    # 两个互不相交的网格，以及一条孤立的水平线
+    horizontal = [Segment(0, 0, 100), Segment(50, 0, 100), Segment(300, 0, 100), Segment(400, 200, 300),
+                  Segment(600, 500, 600)]
+    vertical = [Segment(250, 390, 450), Segment(0, 0, 50), Segment(100, 0, 50), Segment(200, 390, 450)]
+    groups = extractor._group_by_intersection(horizontal, vertical)
+    shapes = sorted((len(h), len(v)) for h, v in groups)
+    assert shapes == [(1, 0), (1, 0), (1, 2), (2, 2)]
@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("celery")
+pytest.importorskip("fastapi")
+pytest.importorskip("fitz")
+
+from fastapi import HTTPException  # noqa: E402
+from sqlalchemy.dialects import postgresql  # noqa: E402
+
+from pdf_extractor.api import task as api_task  # noqa: E402
+from pdf_extractor.crud import task as crud_task  # noqa: E402
+
+
+class _Session:
+    """记录执行的语句，返回预设的行。"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.statements = []
+
+    async def scalars(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(all=lambda: self.rows)
+
+
+def _sql(stmt):
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.parametrize("created_at", [
+    datetime(2026, 3, 1, 12, 30, 15, 123456),
+    datetime(2026, 3, 1, 12, 30, tzinfo=timezone(timedelta(hours=8))),
+])
+def test_cursor_round_trip(created_at):
+    task_id = uuid.uuid4()
+    cursor = crud_task.encode_cursor(created_at, task_id)
+    # 游标可直接放在查询参数中
+    assert "=" not in cursor and "+" not in cursor and "/" not in cursor
+    assert crud_task.decode_cursor(cursor) == (created_at, task_id)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-a-cursor", crud_task.encode_cursor(datetime(2026, 1, 1), uuid.uuid4())[:-4]])
+def test_decode_cursor_rejects_garbage(cursor):
+    with pytest.raises(ValueError):
+        crud_task.decode_cursor(cursor)
+
+
+async def test_list_page_uses_row_value_comparison():
+    db = _Session()
+    cursor = (datetime(2026, 3, 1), uuid.uuid4())
+    await crud_task.async_task.list_page(db, limit=21, cursor=cursor, status="FAILURE", filename_prefix="Report_1%")
+    sql = _sql(db.statements[0])
+    assert "(task.created_at, task.id) < (" in sql
+    assert "ORDER BY task.created_at DESC, task.id DESC" in sql
+    assert "LIMIT" in sql
+    assert "lower(task.filename) LIKE" in sql
+    params = db.statements[0].compile(dialect=postgresql.dialect()).params
+    # 前缀中的通配符按字面匹配
+    assert "report\\_1\\%%" in params.values()
+
+
+def test_row_value_order_matches_listing_order():
+    # 同一时刻创建的任务按 id 排序，游标之后的行严格小于游标，翻页不重不漏
+    now = datetime(2026, 3, 1)
+    rows = sorted(
+        [(now, uuid.UUID(int=i)) for i in range(5)] + [(now - timedelta(seconds=1), uuid.UUID(int=9))],
+        reverse=True,
+    )
+    first_page, cursor = rows[:3], rows[2]
+    second_page = [row for row in rows if row < cursor]
+    assert first_page + second_page == rows
+
+
+async def test_list_tasks_returns_next_cursor(monkeypatch):
+    now = datetime(2026, 3, 1)
+    tasks = [SimpleNamespace(id=uuid.UUID(int=i), created_at=now - timedelta(minutes=i)) for i in range(3)]
+    calls = []
+
+    async def list_page(db, **kwargs):
+        calls.append(kwargs)
+        return tasks[:kwargs["limit"]]
+
+    monkeypatch.setattr(crud_task.async_task, "list_page", list_page)
+    page = await api_task.list_tasks(limit=2, cursor=None, status=None, filename=None,
+                                     created_from=None, created_to=None, db=None)
+    # 多取一条判断是否还有下一页
+    assert calls[0]["limit"] == 3
+    assert page["items"] == tasks[:2]
+    assert crud_task.decode_cursor(page["next_cursor"]) == (tasks[1].created_at, tasks[1].id)
+
+    last = await api_task.list_tasks(limit=5, cursor=page["next_cursor"], status=None, filename=None,
+                                     created_from=None, created_to=None, db=None)
+    assert calls[1]["cursor"] == (tasks[1].created_at, tasks[1].id)
+    assert last["next_cursor"] is None
+
+
+async def test_list_tasks_rejects_bad_cursor():
+    with pytest.raises(HTTPException) as excinfo:
+        await api_task.list_tasks(limit=2, cursor="garbage", status=None, filename=None,
+                                  created_from=None, created_to=None, db=None)
+    assert excinfo.value.status_code == 400
@@ -0,0 +1,239 @@
+import json
+import os
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("celery")
+pytest.importorskip("fitz")
+
+from celery.exceptions import ChordError, SoftTimeLimitExceeded  # noqa: E402
+
+from pdf_extractor.core.exceptions import TaskCancelledError  # noqa: E402
+from pdf_extractor.schemas.task import TERMINAL_STATUSES, TaskStatus  # noqa: E402
+from pdf_extractor.services.result_cache import FAILED_STATUSES  # noqa: E402
+from pdf_extractor.worker import tasks  # noqa: E402
+
+
+class _Recorder:
+    """记录 update_task_status 的调用；accept 为 False 时模拟任务已处于终态 (例如已被取消)。"""
+
+    def __init__(self, accept=True):
+        self.accept = accept
+        self.calls = []
+
+    def __call__(self, task_id, status, result=None, progress=None, error_message=None):
+        self.calls.append(SimpleNamespace(task_id=task_id, status=status, result=result,
+                                          error_message=error_message))
+        return self.accept
+
+    @property
+    def statuses(self):
+        return [call.status for call in self.calls]
+
+
+@pytest.fixture
+def status_updates(monkeypatch):
+    recorder = _Recorder()
+    monkeypatch.setattr(tasks, "update_task_status", recorder)
+    return recorder
+
+
+@pytest.fixture
+def revoked(monkeypatch):
+    calls = []
+    monkeypatch.setattr(tasks, "revoke_pdf_task", calls.append)
+    return calls
+
+
+@pytest.fixture
+def current_status(monkeypatch):
+    """让任务开始前读取到的状态 (以及分片心跳的结果) 可配置，不访问数据库。"""
+    state = {"status": TaskStatus.PENDING.value}
+    query = SimpleNamespace(filter=lambda *args: query, scalar=lambda: state["status"])
+
+    @contextmanager
+    def get_db():
+        yield SimpleNamespace(query=lambda *args: query)
+
+    def touch(db, id):
+        # 分片开始时的心跳：任务仍在执行时刷新 updated_at
+        state["touched"].append(id)
+        return state["status"] not in TERMINAL_STATUSES
+
+    state["touched"] = []
+    monkeypatch.setattr(tasks, "get_db", get_db)
+    monkeypatch.setattr(tasks, "get_db_with_commit", get_db)
+    monkeypatch.setattr(tasks.crud_task, "touch", touch)
+    return state
+
+
+def test_failed_statuses_cover_cancel_and_timeout():
+    assert FAILED_STATUSES == TERMINAL_STATUSES - {TaskStatus.COMPLETED.value}
+    assert {TaskStatus.CANCELLED.value, TaskStatus.TIMEOUT.value} <= FAILED_STATUSES
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (SoftTimeLimitExceeded("SoftTimeLimitExceeded(True,)"), True),
+    (ChordError("Dependency 1f2e raised SoftTimeLimitExceeded('SoftTimeLimitExceeded(True,)')"), True),
+    (ChordError("Dependency 1f2e raised TimeLimitExceeded(330.0)"), True),
+    (ChordError("Dependency 1f2e raised ValueError('bad pdf')"), False),
+    (RuntimeError("boom"), False),
+])
+def test_is_timeout(exc, expected):
+    assert tasks._is_timeout(exc) is expected
+
+
+def test_fail_sharded_task_records_timeout(monkeypatch, status_updates, revoked):
+    monkeypatch.setattr(tasks, "_partial_result",
+                        lambda task_id, engine, partial, digest, pages: {"result": {"partial": True}})
+    exc = ChordError("Dependency 1f2e raised SoftTimeLimitExceeded('SoftTimeLimitExceeded(True,)')")
+    tasks.fail_sharded_task(None, exc, None, task_id="t1", page_count=100, file_digest="d")
+    assert status_updates.statuses == [TaskStatus.TIMEOUT.value]
+    assert status_updates.calls[0].result == {"result": {"partial": True}}
+    assert revoked == ["t1"]
+
+
+def test_fail_sharded_task_records_failure(status_updates, revoked):
+    tasks.fail_sharded_task(None, ChordError("Dependency 1f2e raised ValueError('bad')"), None, task_id="t1")
+    assert status_updates.statuses == [TaskStatus.FAILURE.value]
+    assert revoked == ["t1"]
+
+
+def test_fail_sharded_task_keeps_terminal_state(status_updates, revoked):
+    # 任务已被取消或已由分片记录为超时，状态不被覆盖，也不再重复撤销
+    status_updates.accept = False
+    tasks.fail_sharded_task(None, RuntimeError("boom"), None, task_id="t1")
+    assert revoked == []
+
+
+def test_shard_skips_terminal_task(monkeypatch, current_status):
+    current_status["status"] = TaskStatus.CANCELLED.value
+    monkeypatch.setattr(tasks.mineru_service, "run_doc_parse",
+                        lambda *args, **kwargs: pytest.fail("已取消的任务不应再解析"))
+    with pytest.raises(TaskCancelledError):
+        tasks._parse_pdf_shard("t1", "/tmp/doc.pdf", 0, 9, 20, None)
+
+
+def test_shard_soft_time_limit_records_timeout(monkeypatch, current_status, status_updates, revoked):
+    def run_doc_parse(*args, **kwargs):
+        raise SoftTimeLimitExceeded()
+
+    monkeypatch.setattr(tasks.mineru_service, "run_doc_parse", run_doc_parse)
+    monkeypatch.setattr(tasks, "_partial_result", lambda task_id, engine, partial, digest, pages: None)
+    # 分片自己记录超时后仍然抛出，让 chord 停止合并
+    with pytest.raises(SoftTimeLimitExceeded):
+        tasks._parse_pdf_shard("t1", "/tmp/doc.pdf", 0, 9, 20, "d")
+    assert status_updates.statuses == [TaskStatus.TIMEOUT.value]
+    assert revoked == ["t1"]
+
+
+def test_duplicate_delivery_of_terminal_task_is_ignored(current_status, status_updates):
+    current_status["status"] = TaskStatus.TIMEOUT.value
+    outcome = tasks._process_pdf_file("t1", "/tmp/doc.pdf", "doc.pdf", 10, 1.0, None, False)
+    assert outcome == {"task_id": "t1", "status": TaskStatus.TIMEOUT.value}
+    assert status_updates.calls == []
+
+
+def test_cancelled_before_start(current_status, status_updates):
+    status_updates.accept = False
+    outcome = tasks._process_pdf_file("t1", "/tmp/doc.pdf", "doc.pdf", 10, 1.0, None, False)
+    assert outcome["status"] == TaskStatus.CANCELLED.value
+    assert status_updates.statuses == [TaskStatus.STARTED.value]
+
+
+def test_native_timeout_saves_partial_result(monkeypatch, current_status, status_updates):
+    def parse_native(file_path, page_count, result):
+        result.update(engine="native", page_count=page_count, toc=[[1, "Intro", 1]])
+        raise SoftTimeLimitExceeded()
+
+    monkeypatch.setattr(tasks, "_has_text_layer", lambda file_path, text_ratio: True)
+    monkeypatch.setattr(tasks, "_parse_native", parse_native)
+    outcome = tasks._process_pdf_file("t1", "/tmp/doc.pdf", "doc.pdf", 10, 1.0, None, False)
+    assert outcome["status"] == TaskStatus.TIMEOUT.value
+    assert status_updates.statuses == [TaskStatus.STARTED.value, TaskStatus.TIMEOUT.value]
+    partial = status_updates.calls[-1].result["result"]
+    assert partial["partial"] is True
+    assert partial["toc"] == [[1, "Intro", 1]]
+
+
+def test_cancel_during_parse_writes_nothing(monkeypatch, current_status, status_updates):
+    def parse_native(file_path, page_count, result):
+        raise TaskCancelledError("t1")
+
+    monkeypatch.setattr(tasks, "_has_text_layer", lambda file_path, text_ratio: True)
+    monkeypatch.setattr(tasks, "_parse_native", parse_native)
+    outcome = tasks._process_pdf_file("t1", "/tmp/doc.pdf", "doc.pdf", 10, 1.0, None, False)
+    assert outcome["status"] == TaskStatus.CANCELLED.value
+    assert status_updates.statuses == [TaskStatus.STARTED.value]
+
+
+def test_shards_hand_off_through_blob_store(monkeypatch, tmp_path, current_status, status_updates):
+    from pdf_extractor.services.blob_store import LocalBlobStore
+
+    store = LocalBlobStore(str(tmp_path / "blobs"))
+    monkeypatch.setattr(tasks, "blob_store", store)
+    monkeypatch.setattr(tasks.mineru_service, "blob_store", store)
+    monkeypatch.setattr(tasks.mineru_service.settings.mineru, "output_dir", str(tmp_path / "local"))
+
+    def run_doc_parse(pdf_path, output_dir, page_start, page_end, **kwargs):
+        os.makedirs(output_dir)
+        path = os.path.join(output_dir, "doc_middle.json")
+        pages = [{"page_idx": i, "para_blocks": []} for i in range(page_end - page_start + 1)]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"pdf_info": pages, "_parse_type": "ocr", "_version_name": "x"}, f)
+        return path
+
+    monkeypatch.setattr(tasks.mineru_service, "run_doc_parse", run_doc_parse)
+    shards = [tasks._parse_pdf_shard("t1", "/tmp/doc.pdf", start, end, 4, None) for start, end in [(2, 3), (0, 1)]]
+    assert [shard["middle_json_key"] for shard in shards] == ["outputs/t1/2-3.json", "outputs/t1/0-1.json"]
+    # 分片的本地输出已删除，合并只依赖共享存储
+    assert os.listdir(tmp_path / "local" / "t1") == []
+
+    outcome = tasks.merge_pdf_shards.run(shards, task_id="t1", original_filename="doc.pdf", page_count=4)
+    assert outcome == {"middle_json_key": "outputs/t1/doc_middle.json"}
+    result = status_updates.calls[-1].result["result"]
+    assert [page["page_idx"] for page in result["middle_json"]["pdf_info"]] == [0, 1, 2, 3]
+    assert [info.key for info in store.list("outputs/")] == ["outputs/t1/doc_middle.json"]
+
+
+def test_scanned_document_without_mineru_fails(monkeypatch, current_status, status_updates):
+    monkeypatch.setattr(tasks, "_has_text_layer", lambda file_path, text_ratio: False)
+    monkeypatch.setattr(tasks.settings.mineru, "enabled", False)
+    outcome = tasks._process_pdf_file("t1", "/tmp/doc.pdf", "doc.pdf", 10, 0.0, None, False)
+    assert outcome["status"] == TaskStatus.FAILURE.value
+    assert status_updates.statuses == [TaskStatus.STARTED.value, TaskStatus.FAILURE.value]
+    assert "MinerU" in status_updates.calls[-1].error_message
+    # 失败的任务不会被结果缓存复用
+    assert TaskStatus.FAILURE.value in FAILED_STATUSES
+
+
+def test_shard_start_heartbeats_parent(monkeypatch, current_status):
+    def run_doc_parse(*args, **kwargs):
+        raise RuntimeError("解析失败")
+
+    monkeypatch.setattr(tasks.mineru_service, "run_doc_parse", run_doc_parse)
+    with pytest.raises(RuntimeError):
+        tasks._parse_pdf_shard("t1", "/tmp/doc.pdf", 0, 9, 20, None)
+    assert current_status["touched"] == ["t1"]
+
+
+def test_sharding_marks_task_processing(monkeypatch, status_updates):
+    dispatched = []
+    monkeypatch.setattr(tasks, "chord", lambda header: dispatched.append)
+    monkeypatch.setattr(tasks.settings.mineru, "shard_min_pages", 10)
+    assert tasks._parse_with_mineru("t1", "/tmp/doc.pdf", "doc.pdf", 40) is None
+    # 等待分片期间父任务为 PROCESSING，expire_stale 对其使用更长的停滞判定时间
+    assert status_updates.statuses == [TaskStatus.PROCESSING.value]
+    assert len(dispatched) == 1
+
+
+def test_sharding_cancelled_task_dispatches_nothing(monkeypatch, status_updates):
+    status_updates.accept = False
+    monkeypatch.setattr(tasks, "chord", lambda header: pytest.fail("已取消的任务不应再分派分片"))
+    monkeypatch.setattr(tasks.settings.mineru, "shard_min_pages", 10)
+    with pytest.raises(TaskCancelledError):
+        tasks._parse_with_mineru("t1", "/tmp/doc.pdf", "doc.pdf", 40)
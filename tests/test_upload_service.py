@@ -0,0 +1,118 @@
+import hashlib
+import io
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+pytest.importorskip("fastapi")
+fitz = pytest.importorskip("fitz")
+
+from fastapi import FastAPI, Request, UploadFile  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from pdf_extractor.core.config import settings  # noqa: E402
+from pdf_extractor.core.exceptions import UploadTooLargeError  # noqa: E402
+from pdf_extractor.core.middleware import MaxBodySizeMiddleware  # noqa: E402
+from pdf_extractor.services import upload_service  # noqa: E402
+
+TEXT = "A line of body text long enough to count as a real text layer on this page."
+
+
+def _pdf_bytes(pages, text_pages=()):
+    doc = fitz.open()
+    for index in range(pages):
+        page = doc.new_page()
+        if index in text_pages:
+            page.insert_text((72, 72), TEXT)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+@pytest.fixture
+def upload_tmp(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings.upload, "tmp_dir", str(tmp_path))
+    return tmp_path
+
+
+async def test_save_upload_file_streams_in_chunks(upload_tmp):
+    data = _pdf_bytes(3, text_pages={0, 1, 2})
+    stored = await upload_service.save_upload_file(UploadFile(io.BytesIO(data), filename="a.pdf"),
+                                                   max_size=len(data), chunk_size=64)
+    assert stored.size == len(data)
+    assert stored.sha256 == hashlib.sha256(data).hexdigest()
+    assert stored.page_count == 3
+    assert stored.text_ratio == 1.0
+    assert not stored.is_scanned
+    with open(stored.path, "rb") as f:
+        assert f.read() == data
+
+
+async def test_save_upload_file_aborts_over_limit(upload_tmp):
+    data = _pdf_bytes(3)
+    with pytest.raises(UploadTooLargeError):
+        await upload_service.save_upload_file(UploadFile(io.BytesIO(data), filename="a.pdf"),
+                                              max_size=len(data) - 1, chunk_size=64)
+    # 超限时删除写了一半的临时文件
+    assert list(upload_tmp.iterdir()) == []
+
+
+def test_file_sha256(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"x" * 100_000)
+    assert upload_service.file_sha256(str(path)) == hashlib.sha256(b"x" * 100_000).hexdigest()
+
+
+def test_probe_pdf_samples_evenly(tmp_path):
+    # 20 页按步长 4 抽样 0、4、8、12、16 页，只有第 0、8 页有文本
+    path = tmp_path / "a.pdf"
+    path.write_bytes(_pdf_bytes(20, text_pages={0, 3, 8}))
+    assert upload_service.probe_pdf(str(path)) == (20, 0.4)
+
+
+def test_probe_pdf_scanned(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(_pdf_bytes(4))
+    page_count, text_ratio = upload_service.probe_pdf(str(path))
+    assert (page_count, text_ratio) == (4, 0.0)
+    assert upload_service.StoredUpload("p", 1, "d", page_count, text_ratio).is_scanned
+
+
+def test_probe_pdf_invalid_file(tmp_path):
+    path = tmp_path / "a.pdf"
+    path.write_bytes(b"not a pdf")
+    assert upload_service.probe_pdf(str(path)) == (None, None)
+    assert upload_service.probe_page_count(str(path)) is None
+
+
+@pytest.fixture
+def limited_client():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    @app.post("/big")
+    async def big(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(MaxBodySizeMiddleware, max_body_size=10, path_limits={"/big": 100})
+    return TestClient(app)
+
+
+def test_max_body_size_rejects_by_content_length(limited_client):
+    response = limited_client.post("/echo", content=b"x" * 11)
+    assert response.status_code == 413
+    assert limited_client.post("/echo", content=b"x" * 10).json() == {"size": 10}
+
+
+def test_max_body_size_rejects_streamed_body(limited_client):
+    # 没有 Content-Length 的分块请求在累计超限时中断
+    response = limited_client.post("/echo", content=iter([b"x" * 6, b"x" * 6]))
+    assert response.status_code == 413
+
+
+def test_max_body_size_path_limit(limited_client):
+    assert limited_client.post("/big", content=b"x" * 50).json() == {"size": 50}
+    assert limited_client.post("/big", content=b"x" * 101).status_code == 413